@@ -262,8 +262,7 @@ if __name__ == "__main__":
     wandb.init(project="pgx-az", config=config.model_dump())
 
     # Initialize model and opt_state
-    dummy_state = jax.vmap(env.init)(jax.random.split(jax.random.PRNGKey(0), 2))
-    dummy_input = dummy_state.observation
+    dummy_input = jnp.zeros((2,) + env.spec.observation_shape, dtype=env.spec.observation_dtype)
     model = forward.init(jax.random.PRNGKey(0), dummy_input)  # (params, state)
     opt_state = optimizer.init(params=model[0])
     # replicates to all devices
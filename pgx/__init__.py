@@ -1,8 +1,16 @@
 from pgx._src.api_test import api_test
+from pgx._src.compact import CompactState, compact, expand
+from pgx._src.export import ExportedEnv, deserialize_env, export_env
+from pgx._src.memmap import MemmapReader, MemmapWriter
+from pgx._src.observation import unpack_observation
+from pgx._src.profile import profile
+from pgx._src.rollout import Trajectory, rollout
+from pgx._src.sharding import ShardedEnv
 from pgx._src.baseline import BaselineModelId, make_baseline_model
 from pgx._src.types import Array, PRNGKey
 from pgx._src.visualizer import save_svg, save_svg_animation, set_visualization_config
-from pgx.core import Env, EnvId, State, available_envs, make
+from pgx._src.warmup import warmup
+from pgx.core import Env, EnvId, EnvParams, EnvSpec, State, available_envs, make
 
 __version__ = "2.4.2"
 
@@ -14,12 +22,34 @@ __all__ = [
     "State",
     "Env",
     "EnvId",
+    "EnvSpec",
+    "EnvParams",
     "make",
     "available_envs",
     # visualization
     "set_visualization_config",
     "save_svg",
     "save_svg_animation",
+    # compact state
+    "compact",
+    "expand",
+    "CompactState",
+    # observation
+    "unpack_observation",
+    # storage
+    "MemmapWriter",
+    "MemmapReader",
+    # rollout
+    "rollout",
+    "Trajectory",
+    "ShardedEnv",
+    # compilation
+    "warmup",
+    "export_env",
+    "deserialize_env",
+    "ExportedEnv",
+    # profiling
+    "profile",
     # baseline model
     "BaselineModelId",
     "make_baseline_model",
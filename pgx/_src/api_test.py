@@ -43,12 +43,17 @@ def api_test_single(env: Env, num: int = 100, use_key=True):
       - (TODO) player change at the last step before terminal
     - observe
       - Returns different observations when player_ids are different (except the initial state)
+    - observe_all
+      - Returns the same observations as observe of each player
     - TODO: reward must be zero when step is called after terminated
     - TODO: observation type (bool, int32 or int32) for efficiency; https://jax.readthedocs.io/en/latest/type_promotion.html
     """
 
     init = jax.jit(env.init)
     step = jax.jit(env.step)
+    observe_all = jax.jit(env.observe_all)
+    observe_each = jax.jit(jax.vmap(env.observe, in_axes=(None, 0)))
+    player_ids = jnp.arange(env.num_players)
 
     rng = jax.random.PRNGKey(849020)
     for _ in range(num):
@@ -63,6 +68,7 @@ def api_test_single(env: Env, num: int = 100, use_key=True):
         _validate_init_reward(state)
         _validate_current_player(state)
         _validate_legal_actions(state)
+        _validate_observe_all(observe_all(state), observe_each(state, player_ids))
 
         while True:
             rng, subkey = jax.random.split(rng)
@@ -77,6 +83,7 @@ def api_test_single(env: Env, num: int = 100, use_key=True):
             _validate_state(state)
             _validate_current_player(state)
             _validate_legal_actions(state)
+            _validate_observe_all(observe_all(state), observe_each(state, player_ids))
 
             if state.terminated:
                 break
@@ -121,6 +128,12 @@ def api_test_batch(env: Env, num: int = 100, use_key=True):
         pass
 
 
+def _validate_observe_all(obs_all, obs_each):
+    assert obs_all.shape == obs_each.shape, f"{obs_all.shape}, {obs_each.shape}"
+    assert obs_all.dtype == obs_each.dtype, f"{obs_all.dtype}, {obs_each.dtype}"
+    assert (obs_all == obs_each).all()
+
+
 def _validate_init_reward(state: State):
     assert (state.rewards == jnp.zeros_like(state.rewards)).all()
 
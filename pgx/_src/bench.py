@@ -0,0 +1,146 @@
+# Copyright 2023 The Pgx Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Throughput benchmark of environments
+#
+#   python -m pgx.bench --output bench.json
+#   python -m pgx.bench --envs chess shogi --batch-sizes 1 256 --baseline bench.json --threshold 0.2
+
+import argparse
+import json
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import jax
+
+import pgx
+from pgx._src.compact import compact
+from pgx._src.rollout import rollout
+from pgx.core import available_envs, make
+from pgx.experimental.utils import act_randomly
+
+
+def _random_policy(key, state):
+    return act_randomly(key, state.legal_action_mask)
+
+
+def benchmark(
+    env_ids: Sequence[str],
+    batch_sizes: Sequence[int] = (1, 64, 1024),
+    num_steps: int = 100,
+    verbose: bool = True,
+) -> Dict[str, Any]:
+    """Measure compile time and steps/sec of vmapped random play (`pgx.rollout` with auto-reset) and per-state memory
+    of each env. Both numbers of each batch size are from the same compiled executable.
+    Environments which cannot be loaded (e.g., MinAtar without `pgx-minatar`) are skipped.
+    """
+    results: Dict[str, Any] = {}
+    for env_id in env_ids:
+        try:
+            env = make(env_id)  # type: ignore
+        except ImportError as e:
+            print(f"{env_id}: skipped ({e})", file=sys.stderr)
+            continue
+        state_spec = env.spec.state
+        result: Dict[str, Any] = {
+            "version": env.version,
+            "state_bytes": sum(x.size * x.dtype.itemsize for x in jax.tree_util.tree_leaves(state_spec)),
+            "compact_state_bytes": sum(
+                x.size * x.dtype.itemsize for x in jax.tree_util.tree_leaves(jax.eval_shape(compact, state_spec))
+            ),
+            "compile_time": {},
+            "steps_per_sec": {},
+        }
+        for batch_size in batch_sizes:
+            key = jax.random.PRNGKey(0)
+            state = jax.jit(jax.vmap(env.init))(jax.random.split(key, batch_size))
+            start = time.perf_counter()
+            lowered = rollout.lower(env, _random_policy, num_steps, batch_size, key, state=state, fields=())
+            compiled = lowered.compile()
+            result["compile_time"][batch_size] = time.perf_counter() - start
+            # static arguments are fixed in the compiled executable
+            jax.block_until_ready(compiled(key, state=state))  # warm up
+            start = time.perf_counter()
+            state, _ = compiled(key, state=state)
+            jax.block_until_ready(state)
+            sps = num_steps * batch_size / (time.perf_counter() - start)
+            result["steps_per_sec"][batch_size] = sps
+            if verbose:
+                print(f"{env_id} (batch_size={batch_size}): {sps:.1f} steps/sec", file=sys.stderr)
+        results[env_id] = result
+    return {
+        "pgx_version": pgx.__version__,
+        "jax_version": jax.__version__,
+        "backend": jax.default_backend(),
+        "device": jax.devices()[0].device_kind,
+        "num_steps": num_steps,
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.2) -> List[str]:
+    """Return regressions where steps/sec is slower than the baseline by more than `threshold` (ratio)."""
+    regressions = []
+    for env_id, result in current["results"].items():
+        if env_id not in baseline["results"]:
+            continue
+        # json keys are strings
+        baseline_sps = {str(k): v for k, v in baseline["results"][env_id]["steps_per_sec"].items()}
+        for batch_size, sps in result["steps_per_sec"].items():
+            if str(batch_size) not in baseline_sps:
+                continue
+            ratio = sps / baseline_sps[str(batch_size)]
+            if ratio < 1.0 - threshold:
+                regressions.append(f"{env_id} (batch_size={batch_size}): {sps:.1f} steps/sec ({ratio:.2f}x)")
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark Pgx environments")
+    parser.add_argument("--envs", nargs="+", default=list(available_envs()), help="env ids (default: all)")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 64, 1024])
+    parser.add_argument("--num-steps", type=int, default=100, help="number of timed steps for each batch size")
+    parser.add_argument("--output", type=str, default=None, help="write results to this JSON file")
+    parser.add_argument("--baseline", type=str, default=None, help="compare steps/sec with this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown ratio against the baseline")
+    args = parser.parse_args(argv)
+
+    results = benchmark(args.envs, args.batch_sizes, args.num_steps)
+
+    print(f"{'env':<24} {'batch':>6} {'steps/sec':>12} {'compile(s)':>10} {'state(B)':>9} {'compact(B)':>10}")
+    for env_id, result in results["results"].items():
+        for batch_size, sps in result["steps_per_sec"].items():
+            print(
+                f"{env_id:<24} {batch_size:>6} {sps:>12.1f} {result['compile_time'][batch_size]:>10.2f} "
+                f"{result['state_bytes']:>9} {result['compact_state_bytes']:>10}"
+            )
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for r in regressions:
+            print(f"REGRESSION: {r}")
+        if regressions:
+            sys.exit(1)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# Copyright 2023 The Pgx Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pickle
+from typing import Optional, Sequence
+
+import jax
+import jax.numpy as jnp
+
+from pgx._src.types import Array
+from pgx.core import Env, State
+
+
+def export_env(env: Env, platforms: Optional[Sequence[str]] = None) -> bytes:
+    """Export batched `init`, `step`, and `observe` of the environment by `jax.export` with a symbolic batch size.
+
+    The returned bytes can be loaded by `deserialize_env` in another process without tracing the game code again,
+    and one artifact serves any batch size. `env.lazy_observation` is fixed at the export time.
+    Requires `jax.export` (or `jax.experimental.export` of jax>=0.4.14); raises `ImportError` otherwise.
+
+    !!! example "Example usage"
+
+        ```py
+        data = pgx.export_env(pgx.make("chess"))
+        env = pgx.deserialize_env(data)
+        state = env.init(jax.random.split(jax.random.PRNGKey(0), 1024))
+        state = env.step(state, action, keys)
+        ```
+
+    Args:
+        env: environment
+        platforms: platforms to export for (e.g., `["cpu", "cuda"]`). Default (None) is the default JAX backend.
+
+    Returns:
+        bytes: serialized environment functions
+    """
+    export = _export_module()
+    (b,) = export.symbolic_shape("b")
+
+    def batched(x):
+        return jax.ShapeDtypeStruct((b,) + x.shape, x.dtype)
+
+    # custom pytrees (State) are not serializable, so functions are exported over flattened leaves
+    state = jax.tree_util.tree_map(batched, env.spec.state)
+    state_leaves, state_tree = jax.tree_util.tree_flatten(state)
+    num_leaves = len(state_leaves)
+    keys = batched(jax.ShapeDtypeStruct((2,), jnp.uint32))
+
+    def init(keys):
+        return jax.tree_util.tree_leaves(jax.vmap(env.init)(keys))
+
+    def step(*args):
+        state = jax.tree_util.tree_unflatten(state_tree, args[:num_leaves])
+        return jax.tree_util.tree_leaves(jax.vmap(env.step)(state, *args[num_leaves:]))
+
+    def observe(*args):
+        state = jax.tree_util.tree_unflatten(state_tree, args[:num_leaves])
+        return jax.vmap(env.observe)(state, args[num_leaves])
+
+    fns = {
+        "init": (init, (keys,)),
+        "step": (step, (*state_leaves, batched(jax.ShapeDtypeStruct((), jnp.int32)), keys)),
+        "observe": (observe, (*state_leaves, state.current_player)),
+    }
+    exported = {name: export.export(jax.jit(fn), platforms=platforms)(*args) for name, (fn, args) in fns.items()}
+    exported = {name: _serialize(export, exp) for name, exp in exported.items()}
+    return pickle.dumps(
+        {
+            "env_id": env.id,
+            "version": env.version,
+            "state_tree": state_tree,
+            "exported": exported,
+        }
+    )
+
+
+def deserialize_env(data: bytes) -> "ExportedEnv":
+    """Load the environment exported by `export_env`.
+    Note that it uses `pickle`, so do not load untrusted data.
+    """
+    return ExportedEnv(**pickle.loads(data))
+
+
+class ExportedEnv:
+    """Batched environment functions loaded by `deserialize_env`.
+    All the arguments and returned values have a leading batch dimension of any size.
+    """
+
+    def __init__(self, env_id, version, state_tree, exported):
+        export = _export_module()
+        self.id = env_id
+        self.version = version
+        self._state_tree = state_tree
+        self._init = _callable(export, export.deserialize(bytearray(exported["init"])))
+        self._step = _callable(export, export.deserialize(bytearray(exported["step"])))
+        self._observe = _callable(export, export.deserialize(bytearray(exported["observe"])))
+
+    def init(self, keys: Array) -> State:
+        return jax.tree_util.tree_unflatten(self._state_tree, self._init(keys))
+
+    def step(self, state: State, action: Array, keys: Array) -> State:
+        leaves = self._step(*jax.tree_util.tree_leaves(state), action, keys)
+        return jax.tree_util.tree_unflatten(self._state_tree, leaves)
+
+    def observe(self, state: State, player_id: Array) -> Array:
+        return self._observe(*jax.tree_util.tree_leaves(state), player_id)
+
+
+def _export_module():
+    # `jax.export` (jax>=0.4.30) or its predecessor `jax.experimental.export`
+    try:
+        from jax import export
+    except ImportError:
+        try:
+            from jax.experimental import export  # type: ignore
+        except ImportError:
+            msg = f"pgx.export_env and pgx.deserialize_env require jax.export (jax>=0.4.14), not jax {jax.__version__}"
+            raise ImportError(msg) from None
+    return export
+
+
+def _serialize(export, exported) -> bytes:
+    # `Exported.serialize` is a function of the module in jax.experimental.export
+    return exported.serialize() if hasattr(exported, "serialize") else export.serialize(exported)
+
+
+def _callable(export, exported):
+    # `Exported.call` is `call_exported` of the module in jax.experimental.export
+    return exported.call if hasattr(exported, "call") else export.call_exported(exported)
@@ -83,8 +83,6 @@ ixs = [89, 90, 652, 656, 673, 674, 1257, 1258, 1841, 1842, 2425, 2426, 3009, 301
 INIT_LEGAL_ACTION_MASK[ixs] = True
 
 LEGAL_DEST = -np.ones((7, 64, 27), np.int32)  # LEGAL_DEST[0, :, :] == -1
-LEGAL_DEST_NEAR = -np.ones((64, 16), np.int32)  # king and knight moves
-LEGAL_DEST_FAR = -np.ones((64, 19), np.int32)   # queen moves except king moves
 CAN_MOVE = np.zeros((7, 64, 64), dtype=np.bool_)
 for from_ in range(64):
     legal_dest = {p: [] for p in range(7)}
@@ -107,10 +105,6 @@ for from_ in range(64):
     for p in range(1, 7):
         LEGAL_DEST[p, from_, : len(legal_dest[p])] = legal_dest[p]
         CAN_MOVE[p, from_, legal_dest[p]] = True
-    dests = list(set(legal_dest[KING]) | set(legal_dest[KNIGHT]))
-    LEGAL_DEST_NEAR[from_, : len(dests)] = dests
-    dests = list(set(legal_dest[QUEEN]).difference(set(legal_dest[KING])))
-    LEGAL_DEST_FAR[from_, : len(dests)] = dests
 
 BETWEEN = -np.ones((64, 64, 6), dtype=np.int32)
 for from_ in range(64):
@@ -125,9 +119,42 @@ for from_ in range(64):
                 break
             BETWEEN[from_, to, i] = c * 8 + r
 
-FROM_PLANE, TO_PLANE, INIT_LEGAL_ACTION_MASK, LEGAL_DEST, LEGAL_DEST_NEAR, LEGAL_DEST_FAR, CAN_MOVE, BETWEEN = (
-    jnp.array(x) for x in (FROM_PLANE, TO_PLANE, INIT_LEGAL_ACTION_MASK, LEGAL_DEST, LEGAL_DEST_NEAR, LEGAL_DEST_FAR, CAN_MOVE, BETWEEN)
+# rays from each square: up, down, right, left (rook-like), and up-right, up-left, down-right, down-left (bishop-like)
+RAYS = -np.ones((64, 8, 7), dtype=np.int32)
+DIRECTION = -np.ones((64, 64), dtype=np.int32)  # direction index of "to" seen from "from_"
+for from_ in range(64):
+    for d, (dr, dc) in enumerate([(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)]):
+        for i in range(7):
+            r, c = from_ % 8 + dr * (i + 1), from_ // 8 + dc * (i + 1)
+            if not (0 <= r < 8 and 0 <= c < 8):
+                break
+            RAYS[from_, d, i] = c * 8 + r
+            DIRECTION[from_, c * 8 + r] = d
+
+# Bitboards: 64 squares are packed into uint32 pairs (lower word: a1-d8, upper word: e1-h8).
+# +1 for sentinel (-1 and 64 are mapped to empty bitboards)
+def _to_bb(squares) -> np.ndarray:
+    bb = np.zeros(2, dtype=np.uint32)
+    for sq in squares:
+        if sq >= 0:
+            bb[sq // 32] |= np.uint32(1 << (sq % 32))
+    return bb
+
+
+SQUARE_BB = np.stack([_to_bb([sq]) for sq in range(64)] + [_to_bb([])])  # (65, 2)
+RAY_BB = np.stack([np.stack([_to_bb(RAYS[sq, d]) for d in range(8)]) for sq in range(64)] + [np.zeros((8, 2), np.uint32)])  # (65, 8, 2)
+BETWEEN_BB = np.stack([np.stack([_to_bb(BETWEEN[sq, to]) for to in range(64)]) for sq in range(64)])  # (64, 64, 2)
+KNIGHT_BB = np.stack([_to_bb(LEGAL_DEST[KNIGHT, sq]) for sq in range(64)])  # (64, 2)
+KING_BB = np.stack([_to_bb(LEGAL_DEST[KING, sq]) for sq in range(64)])  # (64, 2)
+PAWN_ATTACK_BB = np.stack([_to_bb([to for to in LEGAL_DEST[PAWN, sq] if to >= 0 and to // 8 != sq // 8]) for sq in range(64)])  # fmt: skip
+
+FROM_PLANE, TO_PLANE, INIT_LEGAL_ACTION_MASK, LEGAL_DEST, CAN_MOVE, BETWEEN, RAYS, DIRECTION = (
+    jnp.array(x) for x in (FROM_PLANE, TO_PLANE, INIT_LEGAL_ACTION_MASK, LEGAL_DEST, CAN_MOVE, BETWEEN, RAYS, DIRECTION)
+)
+SQUARE_BB, RAY_BB, BETWEEN_BB, KNIGHT_BB, KING_BB, PAWN_ATTACK_BB = (
+    jnp.array(x) for x in (SQUARE_BB, RAY_BB, BETWEEN_BB, KNIGHT_BB, KING_BB, PAWN_ATTACK_BB)
 )
+EMPTY_BB = jnp.zeros(2, dtype=jnp.uint32)
 
 keys = jax.random.split(jax.random.PRNGKey(12345), 4)
 ZOBRIST_BOARD = jax.random.randint(keys[0], shape=(64, 13, 2), minval=0, maxval=2**31 - 1, dtype=jnp.uint32)
@@ -144,8 +171,11 @@ class GameState(NamedTuple):
     en_passant: Array = jnp.int32(-1)
     halfmove_count: Array = jnp.int32(0)  # number of moves since the last piece capture or pawn move
     fullmove_count: Array = jnp.int32(1)  # increase every black move
+    zobrist_hash: Array = INIT_ZOBRIST_HASH  # hash of the position from white's view
+    # histories are ring buffers written at step_count (not shifted every step); use _history_ix to read them in order
     hash_history: Array = jnp.zeros((MAX_TERMINATION_STEPS + 1, 2), dtype=jnp.uint32).at[0].set(INIT_ZOBRIST_HASH)
     board_history: Array = jnp.zeros((8, 64), dtype=jnp.int32).at[0, :].set(INIT_BOARD)
+    rep_history: Array = jnp.zeros(8, dtype=jnp.int32)  # number of repetitions of each position in board_history
     legal_action_mask: Array = INIT_LEGAL_ACTION_MASK
     step_count: Array = jnp.int32(0)
 
@@ -172,9 +202,9 @@ class Game:
     def step(self, state: GameState, action: Array) -> GameState:
         state = _apply_move(state, Action._from_label(action))
         state = _flip(state)
+        state = state._replace(step_count=state.step_count + 1)
         state = _update_history(state)
         state = state._replace(legal_action_mask=_legal_action_mask(state))
-        state = state._replace(step_count=state.step_count + 1)
         return state
 
     def observe(self, state: GameState, color: Optional[Array] = None) -> Array:
@@ -191,16 +221,14 @@ class Game:
             my_pieces = jax.vmap(piece_feat)(jnp.arange(1, 7))
             opp_pieces = jax.vmap(piece_feat)(-jnp.arange(1, 7))
 
-            h = state.hash_history[i, :]
-            rep = (state.hash_history == h).all(axis=1).sum() - 1
-            rep = lax.select((h == 0).all(), 0, rep)
+            rep = state.rep_history[i]
             rep0 = ones * (rep == 0)
             rep1 = ones * (rep >= 1)
             return jnp.vstack([my_pieces, opp_pieces, rep0, rep1])
 
         return jnp.vstack(
             [
-                jax.vmap(make)(jnp.arange(8)).reshape(-1, 8, 8),  # board feature
+                jax.vmap(make)(_history_ix(state.step_count)).reshape(-1, 8, 8),  # board feature
                 color * ones,  # color
                 (state.step_count / MAX_TERMINATION_STEPS) * ones,  # total move count
                 state.castling_rights.flatten()[:, None, None] * ones,  # (my queen, my king, opp queen, opp king)
@@ -211,15 +239,16 @@ class Game:
     def legal_action_mask(self, state: GameState) -> Array:
         return state.legal_action_mask
 
+    @jax.named_scope("is_terminal")
     def is_terminal(self, state: GameState) -> Array:
         terminated = ~state.legal_action_mask.any()
         terminated |= state.halfmove_count >= 100
         terminated |= has_insufficient_pieces(state)
-        rep = (state.hash_history == _zobrist_hash(state)).all(axis=1).sum() - 1
-        terminated |= rep >= 2
+        terminated |= state.rep_history[state.step_count % 8] >= 2
         terminated |= MAX_TERMINATION_STEPS <= state.step_count
         return terminated
 
+    @jax.named_scope("rewards")
     def rewards(self, state: GameState) -> Array:
         is_checkmate = (~state.legal_action_mask.any()) & _is_checked(state)
         return lax.select(
@@ -229,12 +258,24 @@ class Game:
         )
 
 
+@jax.named_scope("update_history")
 def _update_history(state: GameState):
-    board_history = jnp.roll(state.board_history, 64)
-    board_history = board_history.at[0].set(state.board)
-    hash_hist = jnp.roll(state.hash_history, 2)
-    hash_hist = hash_hist.at[0].set(_zobrist_hash(state))
-    return state._replace(board_history=board_history, hash_history=hash_hist)
+    # O(1) writes to the ring buffers at the current step
+    ix = state.step_count
+    board_history = state.board_history.at[ix % 8].set(state.board)
+    hash_hist = state.hash_history.at[ix].set(state.zobrist_hash)
+    # count repetitions once when the position is pushed
+    # earlier occurrences in board_history share the same count
+    rep = (hash_hist == state.zobrist_hash).all(axis=1).sum() - 1
+    steps = ix - (ix - jnp.arange(8)) % 8  # step of the position stored in each slot of board_history
+    is_same = (steps >= 0) & (hash_hist[steps] == state.zobrist_hash).all(axis=1)
+    rep_history = jnp.where(is_same, rep, state.rep_history.at[ix % 8].set(rep))
+    return state._replace(board_history=board_history, hash_history=hash_hist, rep_history=rep_history)
+
+
+def _history_ix(step_count: Array) -> Array:
+    # slots of board_history and rep_history from the latest to the oldest position
+    return (step_count - jnp.arange(8)) % 8
 
 
 def has_insufficient_pieces(state: GameState):
@@ -258,16 +299,18 @@ def has_insufficient_pieces(state: GameState):
     return is_insufficient
 
 
+@jax.named_scope("apply_move")
 def _apply_move(state: GameState, a: Action) -> GameState:
     piece = state.board[a.from_]
     # en passant
     is_en_passant = (state.en_passant >= 0) & (piece == PAWN) & (state.en_passant == a.to)
     removed_pawn_pos = a.to - 1
-    state = state._replace(
-        board=state.board.at[removed_pawn_pos].set(lax.select(is_en_passant, EMPTY, state.board[removed_pawn_pos]))
-    )
+    state = _set_piece(state, removed_pawn_pos, lax.select(is_en_passant, EMPTY, state.board[removed_pawn_pos]))
     is_en_passant = (piece == PAWN) & (jnp.abs(a.to - a.from_) == 2)
-    state = state._replace(en_passant=lax.select(is_en_passant, (a.to + a.from_) // 2, -1))
+    en_passant = lax.select(is_en_passant, (a.to + a.from_) // 2, -1)
+    zobrist_hash = state.zobrist_hash ^ _en_passant_key(state.color, state.en_passant)
+    zobrist_hash ^= _en_passant_key(state.color, en_passant)
+    state = state._replace(en_passant=en_passant, zobrist_hash=zobrist_hash)
     # update counters
     captured = (state.board[a.to] < 0) | is_en_passant
     state = state._replace(
@@ -275,22 +318,49 @@ def _apply_move(state: GameState, a: Action) -> GameState:
         fullmove_count=state.fullmove_count + jnp.int32(state.color == 1),
     )
     # castling
-    board = state.board
     is_queen_side_castling = (piece == KING) & (a.from_ == 32) & (a.to == 16)
-    board = lax.select(is_queen_side_castling, board.at[0].set(EMPTY).at[24].set(ROOK), board)
+    state = _set_piece(state, 0, lax.select(is_queen_side_castling, EMPTY, state.board[0]))
+    state = _set_piece(state, 24, lax.select(is_queen_side_castling, ROOK, state.board[24]))
     is_king_side_castling = (piece == KING) & (a.from_ == 32) & (a.to == 48)
-    board = lax.select(is_king_side_castling, board.at[56].set(EMPTY).at[40].set(ROOK), board)
-    state = state._replace(board=board)
+    state = _set_piece(state, 56, lax.select(is_king_side_castling, EMPTY, state.board[56]))
+    state = _set_piece(state, 40, lax.select(is_king_side_castling, ROOK, state.board[40]))
     # update castling rights
     cond = jnp.bool_([[(a.from_ != 32) & (a.from_ != 0), (a.from_ != 32) & (a.from_ != 56)], [a.to != 7, a.to != 63]])
-    state = state._replace(castling_rights=state.castling_rights & cond)
+    castling_rights = state.castling_rights & cond
+    lost = _to_white_view(state.color, castling_rights != state.castling_rights)
+    to_reduce = jnp.where(lost.reshape(-1, 1), ZOBRIST_CASTLING, 0)
+    zobrist_hash = state.zobrist_hash ^ lax.reduce(to_reduce, 0, lax.bitwise_xor, (0,))
+    state = state._replace(castling_rights=castling_rights, zobrist_hash=zobrist_hash)
     # promotion to queen
     piece = lax.select((piece == PAWN) & (a.from_ % 8 == 6) & (a.underpromotion < 0), QUEEN, piece)
     # underpromotion
     piece = lax.select(a.underpromotion < 0, piece, jnp.int32([ROOK, BISHOP, KNIGHT])[a.underpromotion])
     # actually move
-    state = state._replace(board=state.board.at[a.from_].set(EMPTY).at[a.to].set(piece))  # type: ignore
-    return state
+    state = _set_piece(state, a.from_, EMPTY)
+    state = _set_piece(state, a.to, piece)
+    return state._replace(zobrist_hash=state.zobrist_hash ^ ZOBRIST_SIDE)
+
+
+def _set_piece(state: GameState, pos: Array, piece: Array) -> GameState:
+    # update the board and its Zobrist hash by XOR deltas
+    zobrist_hash = state.zobrist_hash ^ _piece_key(state.color, pos, state.board[pos])
+    zobrist_hash ^= _piece_key(state.color, pos, piece)
+    return state._replace(board=state.board.at[pos].set(piece), zobrist_hash=zobrist_hash)
+
+
+def _piece_key(color: Array, pos: Array, piece: Array) -> Array:
+    # keys are indexed from white's view, while the board is seen from the player to move
+    pos = lax.select(color == 0, pos, _flip_pos(pos))
+    piece = lax.select(color == 0, piece, -piece)
+    return ZOBRIST_BOARD[pos, piece + 6]  # 0, ..., 12 (b:king, ..., w:king)
+
+
+def _en_passant_key(color: Array, en_passant: Array) -> Array:
+    return ZOBRIST_EN_PASSANT[lax.select(color == 0, en_passant, _flip_pos(en_passant))]
+
+
+def _to_white_view(color: Array, castling_rights: Array) -> Array:
+    return lax.select(color == 0, castling_rights, castling_rights[::-1])
 
 
 def _flip_pos(x: Array):  # e.g., 37 <-> 34, -1 <-> -1
@@ -307,17 +377,50 @@ def _flip(state: GameState) -> GameState:
     )
 
 
+@jax.named_scope("legal_action_mask")
 def _legal_action_mask(state: GameState) -> Array:
+    # Legality is decided by the checkers and pins computed once per position (no per-move simulation):
+    # * king moves should not go to attacked squares
+    # * in check, the other pieces should capture the checker or block the check (impossible in double check)
+    # * pinned pieces should move along the pin ray
+    bbs = _to_bitboards(state.board)
+    my_occ, opp_occ = _bb_or(bbs[7:]), _bb_or(bbs[:6])
+    occ = my_occ | opp_occ
+    king_pos = jnp.argmin(jnp.abs(state.board - KING))
+    checkers = _attackers(bbs, occ, king_pos)
+    num_checkers = lax.population_count(checkers).sum()
+    checker_pos = _lsb(checkers)
+    blocks = BETWEEN_BB[king_pos, checker_pos % 64] | SQUARE_BB[checker_pos]
+    blocks = lax.select(num_checkers == 1, blocks, jnp.where(num_checkers == 0, ~EMPTY_BB, EMPTY_BB))
+    pin_dirs = _pin_directions(bbs, occ, king_pos)
+    # king does not block its attackers
+    king_dests = LEGAL_DEST[KING, king_pos, :8]
+    occ_wo_king = occ & ~SQUARE_BB[king_pos]
+    is_safe = jax.vmap(lambda to: ~_attackers(bbs, occ_wo_king, to).any())(king_dests)
+    king_safe = _bb_or(jnp.where(is_safe[:, None], SQUARE_BB[king_dests], EMPTY_BB))
+
     def legal_normal_moves(from_):
         piece = state.board[from_]
+        attacks = _slider_attacks(from_, occ)
+        dests = lax.switch(
+            jnp.clip(piece, 0, KING),
+            [
+                lambda: EMPTY_BB,
+                lambda: _pawn_dests(from_, occ, opp_occ),
+                lambda: KNIGHT_BB[from_],
+                lambda: attacks[1],
+                lambda: attacks[0],
+                lambda: attacks[0] | attacks[1],
+                lambda: KING_BB[from_] & king_safe,
+            ],
+        )
+        dests &= ~my_occ
+        # avoid checks and suicides
+        pin_ray = lax.select(pin_dirs[from_] == -1, ~EMPTY_BB, RAY_BB[king_pos, pin_dirs[from_]])
+        dests = lax.select(piece == KING, dests, dests & blocks & pin_ray)
 
         def legal_label(to):
-            ok = (from_ >= 0) & (piece > 0) & (to >= 0) & (state.board[to] <= 0)
-            between_ixs = BETWEEN[from_, to]
-            ok &= CAN_MOVE[piece, from_, to] & ((between_ixs < 0) | (state.board[between_ixs] == EMPTY)).all()
-            c0, c1 = from_ // 8, to // 8
-            pawn_should = ((c1 == c0) & (state.board[to] == EMPTY)) | ((c1 != c0) & (state.board[to] < 0))
-            ok &= (piece != PAWN) | pawn_should
+            ok = (from_ >= 0) & (piece > 0) & (to >= 0) & _bb_test(dests, to)
             return lax.select(ok, Action(from_=from_, to=to)._to_label(), -1)
 
         return jax.vmap(legal_label)(LEGAL_DEST[piece, from_])
@@ -328,14 +431,12 @@ def _legal_action_mask(state: GameState) -> Array:
         def legal_labels(from_):
             ok = (from_ >= 0) & (from_ < 64) & (to >= 0) & (state.board[from_] == PAWN) & (state.board[to - 1] == -PAWN)
             a = Action(from_=from_, to=to)
+            # en passant may discover a check along the rank, so simulate the move (at most two moves)
+            ok &= ~_is_checked(_apply_move(state, a))
             return lax.select(ok, a._to_label(), -1)
 
         return jax.vmap(legal_labels)(jnp.int32([to - 9, to + 7]))
 
-    def is_not_checked(label):
-        a = Action._from_label(label)
-        return ~_is_checked(_apply_move(state, a))
-
     def legal_underpromotions(mask):
         def legal_labels(label):
             a = Action._from_label(label)
@@ -351,11 +452,6 @@ def _legal_action_mask(state: GameState) -> Array:
     a1 = jax.vmap(legal_normal_moves)(possible_piece_positions).flatten()
     a2 = legal_en_passants()
     actions = jnp.hstack((a1, a2))  # include -1
-    # filter out -1. 200 is big enough for normal play.
-    ixs = jnp.nonzero(actions >= 0, size=200, fill_value=0)[0]
-    actions = actions[ixs]  # size: 19 * 27 -> 200
-    # filter ignoring checks and suicides
-    actions = jnp.where(jax.vmap(is_not_checked)(actions), actions, -1)
     mask = jnp.zeros(64 * 73 + 1, dtype=jnp.bool_)  # +1 for sentinel
     mask = mask.at[actions].set(True)
 
@@ -365,7 +461,7 @@ def _legal_action_mask(state: GameState) -> Array:
     can_castle_queen_side &= (b[0] == ROOK) & (b[8] == EMPTY) & (b[16] == EMPTY) & (b[24] == EMPTY) & (b[32] == KING)
     can_castle_king_side = state.castling_rights[0, 1]
     can_castle_king_side &= (b[32] == KING) & (b[40] == EMPTY) & (b[48] == EMPTY) & (b[56] == ROOK)
-    not_checked = ~jax.vmap(_is_attacked, in_axes=(None, 0))(state, jnp.int32([16, 24, 32, 40, 48]))
+    not_checked = jax.vmap(lambda pos: ~_attackers(bbs, occ, pos).any())(jnp.int32([16, 24, 32, 40, 48]))
     mask = mask.at[2364].set(mask[2364] | (can_castle_queen_side & not_checked[:3].all()))
     mask = mask.at[2367].set(mask[2367] | (can_castle_king_side & not_checked[2:].all()))
 
@@ -376,25 +472,39 @@ def _legal_action_mask(state: GameState) -> Array:
     return mask[:-1]
 
 
+def _pawn_dests(from_: Array, occ: Array, opp_occ: Array):
+    one_step = SQUARE_BB[from_ + 1] & ~occ
+    two_steps = lax.select((from_ % 8 == 1) & one_step.any(), SQUARE_BB[from_ + 2] & ~occ, EMPTY_BB)
+    return one_step | two_steps | (PAWN_ATTACK_BB[from_] & opp_occ)
+
+
+def _pin_directions(bbs: Array, occ: Array, king_pos: Array):
+    # (65,) direction index of the pin ray for each pinned piece (-1 if not pinned, +1 for sentinel)
+    def pinned(d):
+        first = _first_blocker(king_pos, occ, d)
+        second = _first_blocker(first, occ, d)
+        pinners = bbs[6 - QUEEN] | lax.select(d < 4, bbs[6 - ROOK], bbs[6 - BISHOP])
+        ok = _bb_test(_bb_or(bbs[7:]), first) & _bb_test(pinners, second)
+        return lax.select(ok, first, -1)
+
+    pinned_pos = jax.vmap(pinned)(jnp.arange(8))
+    return jnp.full(65, -1, dtype=jnp.int32).at[pinned_pos].set(jnp.arange(8)).at[-1].set(-1)
+
+
 def _is_attacked(state: GameState, pos: Array):
-    def attacked_far(to):
-        ok = (to >= 0) & (state.board[to] < 0)  # should be opponent's
-        piece = jnp.abs(state.board[to])
-        ok &= (piece == QUEEN) | (piece == ROOK) | (piece == BISHOP)
-        between_ixs = BETWEEN[pos, to]
-        ok &= CAN_MOVE[piece, pos, to] & ((between_ixs < 0) | (state.board[between_ixs] == EMPTY)).all()
-        return ok
-
-    def attacked_near(to):
-        ok = (to >= 0) & (state.board[to] < 0)  # should be opponent's
-        piece = jnp.abs(state.board[to])
-        ok &= CAN_MOVE[piece, pos, to]
-        ok &= ~((piece == PAWN) & (to // 8 == pos // 8))  # should move diagonally to capture
-        return ok
-
-    by_minor = jax.vmap(attacked_near)(LEGAL_DEST_NEAR[pos, :]).any()
-    by_major = jax.vmap(attacked_far)(LEGAL_DEST_FAR[pos, :]).any()
-    return by_minor | by_major
+    bbs = _to_bitboards(state.board)
+    return _attackers(bbs, _bb_or(bbs[:6]) | _bb_or(bbs[7:]), pos).any()
+
+
+def _attackers(bbs: Array, occ: Array, pos: Array):
+    # bitboard of opponent's pieces attacking pos
+    attacks = _slider_attacks(pos, occ)
+    attackers = attacks[0] & (bbs[6 - ROOK] | bbs[6 - QUEEN])
+    attackers |= attacks[1] & (bbs[6 - BISHOP] | bbs[6 - QUEEN])
+    attackers |= KNIGHT_BB[pos] & bbs[6 - KNIGHT]
+    attackers |= KING_BB[pos] & bbs[6 - KING]
+    attackers |= PAWN_ATTACK_BB[pos] & bbs[6 - PAWN]
+    return attackers
 
 
 def _is_checked(state: GameState):
@@ -402,11 +512,52 @@ def _is_checked(state: GameState):
     return _is_attacked(state, king_pos)
 
 
+def _to_bitboards(board: Array) -> Array:
+    # (13, 2) bitboards of each piece (index: piece + 6, i.e., 0: opp king, ..., 12: my king)
+    bits = (board[None, :] == jnp.arange(-6, 7)[:, None]).reshape(13, 2, 32).astype(jnp.uint32)
+    return (bits << jnp.arange(32, dtype=jnp.uint32)).sum(axis=-1, dtype=jnp.uint32)
+
+
+def _slider_attacks(pos: Array, occ: Array):
+    # (2, 2) bitboards of (rook-like, bishop-like) attacks from pos
+    attacks = jax.vmap(lambda d: RAY_BB[pos, d] & ~RAY_BB[_first_blocker(pos, occ, d), d])(jnp.arange(8))
+    return jnp.stack([_bb_or(attacks[:4]), _bb_or(attacks[4:])])
+
+
+def _first_blocker(pos: Array, occ: Array, d: Array):
+    # the first occupied square along the ray (64 if no blocker). Even directions go to larger indices.
+    blockers = RAY_BB[pos, d] & occ
+    return lax.select(d % 2 == 0, _lsb(blockers), _msb(blockers))
+
+
+def _lsb(bb: Array):
+    # index of the least significant bit (64 if empty)
+    ctz = lax.population_count((bb & (jnp.uint32(0) - bb)) - jnp.uint32(1))  # 32 if zero
+    return jnp.where(bb[0] != 0, ctz[0], 32 + ctz[1]).astype(jnp.int32)
+
+
+def _msb(bb: Array):
+    # index of the most significant bit (64 if empty)
+    ix = jnp.where(bb[1] != 0, 63 - lax.clz(bb[1]), 31 - lax.clz(bb[0])).astype(jnp.int32)
+    return jnp.where(ix < 0, 64, ix)
+
+
+def _bb_test(bb: Array, pos: Array):
+    return (bb & SQUARE_BB[pos]).any()
+
+
+def _bb_or(bbs: Array):
+    return lax.reduce(bbs, jnp.uint32(0), lax.bitwise_or, (0,))
+
+
+@jax.named_scope("hash")
 def _zobrist_hash(state: GameState) -> Array:
+    # computed from scratch (only for initialization from FEN and testing)
     hash_ = lax.select(state.color == 0, ZOBRIST_SIDE, jnp.zeros_like(ZOBRIST_SIDE))
-    to_reduce = ZOBRIST_BOARD[jnp.arange(64), state.board + 6]  # 0, ..., 12 (w:pawn, ..., b:king)
+    to_reduce = jax.vmap(_piece_key, in_axes=(None, 0, 0))(state.color, jnp.arange(64), state.board)
     hash_ ^= lax.reduce(to_reduce, 0, lax.bitwise_xor, (0,))
-    to_reduce = jnp.where(state.castling_rights.reshape(-1, 1), ZOBRIST_CASTLING, 0)
+    castling_rights = _to_white_view(state.color, state.castling_rights)
+    to_reduce = jnp.where(castling_rights.reshape(-1, 1), ZOBRIST_CASTLING, 0)
     hash_ ^= lax.reduce(to_reduce, 0, lax.bitwise_xor, (0,))
-    hash_ ^= ZOBRIST_EN_PASSANT[state.en_passant]
+    hash_ ^= _en_passant_key(state.color, state.en_passant)
     return hash_
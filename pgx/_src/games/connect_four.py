@@ -55,14 +55,17 @@ class Game:
         turns = jax.lax.select(color == 0, jnp.int32([0, 1]), jnp.int32([1, 0]))
         return jnp.stack(jax.vmap(make)(turns), -1)
 
+    @jax.named_scope("legal_action_mask")
     def legal_action_mask(self, state: GameState) -> Array:
         board2d = state.board.reshape(6, 7)
         return (board2d >= 0).sum(axis=0) < 6
 
+    @jax.named_scope("is_terminal")
     def is_terminal(self, state: GameState) -> Array:
         board2d = state.board.reshape(6, 7)
         return (state.winner >= 0) | jnp.all((board2d >= 0).sum(axis=0) == 6)
 
+    @jax.named_scope("rewards")
     def rewards(self, state: GameState) -> Array:
         return jax.lax.select(
             state.winner >= 0,
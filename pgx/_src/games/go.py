@@ -25,12 +25,15 @@ class GameState(NamedTuple):
     step_count: Array = jnp.int32(0)
     # ids of representative stone (smallest) in the connected stones
     board: Array = jnp.zeros(19 * 19, dtype=jnp.int32)  # b > 0, w < 0, empty = 0
-    board_history: Array = jnp.full((8, 19 * 19), 2, dtype=jnp.int32)  # for obs
+    # (num_pseudo, idx_sum, idx_squared_sum) of pseudo liberties, indexed by chain id - 1
+    liberty: Array = jnp.zeros((3, 19 * 19), dtype=jnp.int32)
+    board_history: Array = jnp.full((8, 19 * 19), 2, dtype=jnp.int32)  # for obs, ring buffer written at step_count
     num_captured: Array = jnp.zeros(2, dtype=jnp.int32)  # (b, w)
     consecutive_pass_count: Array = jnp.int32(0)
     ko: Array = jnp.int32(-1)  # by SSK
     is_psk: Array = jnp.bool_(False)
-    hash_history: Array = jnp.zeros((19 * 19 * 2, 2), dtype=jnp.uint32)
+    zobrist_hash: Array = jnp.zeros(2, dtype=jnp.uint32)  # hash of the current board (empty board: 0)
+    hash_history: Array = jnp.zeros((19 * 19 * 2, 2), dtype=jnp.uint32)  # ring buffer if superko_window is set
 
     @property
     def color(self) -> Array:
@@ -39,36 +42,48 @@ class GameState(NamedTuple):
 
 class Game:
     def __init__(
-        self, size: int = 19, komi: float = 7.5, history_length: int = 8, max_termination_steps: Optional[int] = None
+        self,
+        size: int = 19,
+        komi: float = 7.5,
+        history_length: int = 8,
+        max_termination_steps: Optional[int] = None,
+        superko_window: Optional[int] = None,
     ):
         self.size = size
         self.komi = komi
         self.history_length = history_length
         self.max_termination_steps = size * size * 2 if max_termination_steps is None else max_termination_steps
+        # PSK is checked only against the last `superko_window` positions (all positions if None)
+        self.superko_window = self.max_termination_steps if superko_window is None else superko_window
 
     def init(self) -> GameState:
         return GameState(
             board=jnp.zeros(self.size**2, dtype=jnp.int32),
+            liberty=jnp.zeros((3, self.size**2), dtype=jnp.int32),
             board_history=jnp.full((self.history_length, self.size**2), 2, dtype=jnp.int32),
-            hash_history=jnp.zeros((self.max_termination_steps, 2), dtype=jnp.uint32),
+            hash_history=jnp.zeros((self.superko_window, 2), dtype=jnp.uint32),
         )
 
     def step(self, state: GameState, action: Array) -> GameState:
         state = state._replace(ko=jnp.int32(-1))
         # update state
-        state = lax.cond(
-            (action < self.size * self.size),
-            lambda: _apply_action(state, action, self.size),
-            lambda: _apply_pass(state),
-        )
+        with jax.named_scope("apply_action"):
+            state = lax.cond(
+                (action < self.size * self.size),
+                lambda: _apply_action(state, action, self.size),
+                lambda: _apply_pass(state),
+            )
         # update board history
-        board_history = jnp.roll(state.board_history, self.size**2)
-        board_history = board_history.at[0].set(jnp.clip(state.board, -1, 1).astype(jnp.int32))
-        state = state._replace(board_history=board_history)
+        with jax.named_scope("update_history"):
+            # ring buffer written at step_count, instead of shifting the whole history
+            ix = state.step_count % self.history_length
+            board_history = state.board_history.at[ix].set(jnp.clip(state.board, -1, 1).astype(jnp.int32))
+            state = state._replace(board_history=board_history)
         # check PSK
-        hash_ = _compute_hash(state)
-        state = state._replace(hash_history=state.hash_history.at[state.step_count].set(hash_))
-        state = state._replace(is_psk=_is_psk(state))
+        with jax.named_scope("superko"):
+            ix = state.step_count % self.superko_window
+            state = state._replace(hash_history=state.hash_history.at[ix].set(state.zobrist_hash))
+            state = state._replace(is_psk=_is_psk(state))
         # increment turns
         state = state._replace(step_count=state.step_count + 1)
         return state
@@ -78,19 +93,23 @@ class Game:
             color = state.color
         my_sign, _ = _signs(color)
 
+        # slots of board_history from the latest to the oldest board
+        history_ix = (state.step_count - 1 - jnp.arange(self.history_length)) % self.history_length
+
         def _make(i):
             c = jnp.int32([1, -1])[i % 2] * my_sign
-            return state.board_history[i // 2] == c
+            return state.board_history[history_ix[i // 2]] == c
 
         log = jax.vmap(_make)(jnp.arange(self.history_length * 2))
         color = jnp.full_like(log[0], color)  # b = 0, w = 1
         return jnp.vstack([log, color]).transpose().reshape((self.size, self.size, -1))
 
+    @jax.named_scope("legal_action_mask")
     def legal_action_mask(self, state: GameState) -> Array:
         # some logic is inspired by OpenSpiel's Go implementation
         is_empty = state.board == 0
         my_sign, opp_sign = _signs(state.color)
-        num_pseudo, idx_sum, idx_squared_sum = _count(state, self.size)
+        num_pseudo, idx_sum, idx_squared_sum = state.liberty
         chain_ix = jnp.abs(state.board) - 1
         in_atari = (idx_sum[chain_ix] ** 2) == idx_squared_sum[chain_ix] * num_pseudo[chain_ix]
         has_liberty = (state.board * my_sign > 0) & ~in_atari
@@ -105,18 +124,44 @@ class Game:
         mask = lax.select(state.ko == -1, mask, mask.at[state.ko].set(False))
         return jnp.append(mask, True)  # pass is always legal
 
-    def is_terminal(self, state: GameState) -> Array:
+    @jax.named_scope("is_terminal")
+    def is_terminal(self, state: GameState, max_termination_steps: Optional[Array] = None) -> Array:
+        # komi and max_termination_steps can be given as traced values (see pgx.go.GoParams)
+        if max_termination_steps is None:
+            max_termination_steps = self.max_termination_steps
         two_consecutive_pass = state.consecutive_pass_count >= 2
-        timeover = self.max_termination_steps <= state.step_count
+        timeover = max_termination_steps <= state.step_count
         return two_consecutive_pass | state.is_psk | timeover
 
-    def rewards(self, state: GameState) -> Array:
+    @jax.named_scope("rewards")
+    def rewards(
+        self, state: GameState, komi: Optional[Array] = None, max_termination_steps: Optional[Array] = None
+    ) -> Array:
+        komi = self.komi if komi is None else komi
+        # Scores are only needed at the terminal state. Under vmap, lax.cond becomes select and computes the scores
+        # of every state, while a while loop keeps its predicate: this loop of at most one trip is skipped unless
+        # some state in the batch is terminal (in which case the whole batch pays for scoring).
+        def score_once(x):
+            is_terminal, _ = x
+            # depend on the loop variable, or XLA hoists the (loop-invariant) scoring out of the loop
+            board = jnp.where(is_terminal, state.board, 0)
+            return jnp.bool_(False), self._terminal_rewards(state._replace(board=board), komi)
+
+        is_terminal = self.is_terminal(state, max_termination_steps)
+        _, rewards = lax.while_loop(lambda x: x[0], score_once, (is_terminal, jnp.zeros(2, dtype=jnp.float32)))
+        return rewards
+
+    def score(self, state: GameState, komi: Optional[Array] = None) -> Array:
+        komi = self.komi if komi is None else komi
+        # area scores of (black, white), komi is added to white
+        return _count_scores(state, self.size).astype(jnp.float32) + jnp.zeros(2, dtype=jnp.float32).at[1].set(komi)
+
+    def _terminal_rewards(self, state: GameState, komi) -> Array:
         scores = _count_scores(state, self.size)
-        is_black_win = scores[0] - self.komi > scores[1]
+        is_black_win = scores[0] - komi > scores[1]
         rewards = lax.select(is_black_win, jnp.float32([1, -1]), jnp.float32([-1, 1]))
         to_play = state.color
         rewards = lax.select(state.is_psk, jnp.float32([-1, -1]).at[to_play].set(1.0), rewards)
-        rewards = lax.select(self.is_terminal(state), rewards, jnp.zeros(2, dtype=jnp.float32))
         return rewards
 
 
@@ -127,31 +172,45 @@ def _apply_pass(state: GameState) -> GameState:
 def _apply_action(state: GameState, action, size) -> GameState:
     state = state._replace(consecutive_pass_count=0)
     my_sign, opp_sign = _signs(state.color)
+    adj_ixs = _adj_ixs(action, size)
+    on_board = adj_ixs != -1
+
+    # the placed point is no longer a liberty of adjacent chains
+    adj_ids = jnp.where(on_board, state.board[adj_ixs], 0)
+    chain_ix = jnp.where(adj_ids != 0, jnp.abs(adj_ids) - 1, size**2)
+    liberty = state.liberty.at[:, chain_ix].add(-_liberty_vec(jnp.full(4, action)), mode="drop")
 
     # remove killed stones
-    adj_ixs = _adj_ixs(action, size)
-    adj_ids = state.board[adj_ixs]
-    num_pseudo, idx_sum, idx_squared_sum = _count(state, size)
-    chain_ix = jnp.abs(adj_ids) - 1
-    is_atari = (idx_sum[chain_ix] ** 2) == idx_squared_sum[chain_ix] * num_pseudo[chain_ix]
-    single_liberty = (idx_squared_sum[chain_ix] // idx_sum[chain_ix]) - 1
-    is_killed = (adj_ixs != -1) & (adj_ids * opp_sign > 0) & is_atari & (single_liberty == action)
+    is_killed = (adj_ids * opp_sign > 0) & (liberty[0, chain_ix % size**2] == 0)
     surrounded_stones = (state.board[:, None] == adj_ids) & (is_killed[None, :])
     num_captured = jnp.count_nonzero(surrounded_stones)
+    is_captured = surrounded_stones.any(axis=-1)
     ko_ix = jnp.nonzero(is_killed, size=1)[0][0]
     ko_may_occur = ((adj_ixs == -1) | (state.board[adj_ixs] * opp_sign > 0)).all()
+    board = jnp.where(is_captured, 0, state.board)
+    to_reduce = jnp.where(is_captured[:, None], ZOBRIST_BOARD[opp_sign, : size**2], 0)
+    zobrist_hash = state.zobrist_hash ^ lax.reduce(to_reduce, 0, lax.bitwise_xor, (0,))
+    liberty = liberty.at[:, jnp.where(is_killed, chain_ix, size**2)].set(0, mode="drop")
+    # captured points become liberties of the surrounding chains
+    stone_ix = jnp.where(board != 0, jnp.abs(board) - 1, size**2)
+    liberty = liberty.at[:, stone_ix].add(_adjacent_liberty(is_captured, size), mode="drop")
     state = state._replace(
-        board=jnp.where(surrounded_stones.any(axis=-1), 0, state.board),
+        board=board,
         num_captured=state.num_captured.at[state.color].add(num_captured),
         ko=lax.select(ko_may_occur & (num_captured == 1), adj_ixs[ko_ix], -1),
     )
 
     # set stone
-    state = state._replace(board=state.board.at[action].set((action + 1) * my_sign))
+    is_lib = on_board & (state.board[adj_ixs] == 0)
+    liberty = liberty.at[:, action].set(jnp.where(is_lib, _liberty_vec(adj_ixs), 0).sum(axis=-1))
+    state = state._replace(
+        board=state.board.at[action].set((action + 1) * my_sign),
+        zobrist_hash=zobrist_hash ^ ZOBRIST_BOARD[my_sign, action],
+    )
 
     # merge adjacent chains
     is_my_chain = state.board[adj_ixs] * my_sign > 0
-    should_merge = (adj_ixs != -1) & is_my_chain
+    should_merge = on_board & is_my_chain
     new_id = state.board[action]
     tgt_ids = state.board[adj_ixs]
     smallest_id = jnp.min(jnp.where(should_merge, jnp.abs(tgt_ids), 9999))
@@ -159,26 +218,32 @@ def _apply_action(state: GameState, action, size) -> GameState:
     mask = (state.board == new_id) | (should_merge[None, :] & (state.board[:, None] == tgt_ids[None, :])).any(axis=-1)
     state = state._replace(board=jnp.where(mask, smallest_id, state.board))
 
+    # sum up the liberties of merged chains (each chain once)
+    chain_ix = jnp.where(should_merge, jnp.abs(tgt_ids) - 1, size**2)
+    is_dup = ((chain_ix[:, None] == chain_ix[None, :]) & jnp.tri(4, k=-1, dtype=jnp.bool_)).any(axis=-1)
+    merged = liberty[:, action] + jnp.where(should_merge & ~is_dup, liberty[:, chain_ix % size**2], 0).sum(axis=-1)
+    liberty = liberty.at[:, chain_ix].set(0, mode="drop").at[:, action].set(0)
+    liberty = liberty.at[:, jnp.abs(smallest_id) - 1].set(merged)
+    state = state._replace(liberty=liberty)
+
     return state
 
 
-def _count(state: GameState, size):
-    board = jnp.abs(state.board)
-    is_empty = board == 0
-    idx_sum = jnp.where(is_empty, jnp.arange(1, size**2 + 1), 0)
-    idx_squared_sum = jnp.where(is_empty, jnp.arange(1, size**2 + 1) ** 2, 0)
+def _liberty_vec(ixs):
+    # contribution of liberty points to (num_pseudo, idx_sum, idx_squared_sum)
+    return jnp.stack([jnp.ones_like(ixs), ixs + 1, (ixs + 1) ** 2])
+
+
+def _adjacent_liberty(is_lib, size):
+    adj_mat = jax.vmap(_adj_ixs, in_axes=(0, None))(jnp.arange(size**2), size)  # (size**2, 4)
+    mask = (adj_mat != -1) & is_lib[adj_mat]
+    return jnp.where(mask[None], _liberty_vec(adj_mat), 0).sum(axis=-1)  # (3, size**2)
 
-    def _count_neighbor(xy):
-        adj_ixs = _adj_ixs(xy, size)
-        on_board = adj_ixs != -1
-        return (
-            jnp.where(on_board, is_empty[adj_ixs], 0).sum(),
-            jnp.where(on_board, idx_sum[adj_ixs], 0).sum(),
-            jnp.where(on_board, idx_squared_sum[adj_ixs], 0).sum(),
-        )
 
-    idx = jnp.arange(size**2)
-    num_pseudo, idx_sum, idx_squared_sum = jax.vmap(_count_neighbor)(idx)
+def _count(state: GameState, size):
+    # recompute `GameState.liberty` from scratch (reference for the incremental updates)
+    board = jnp.abs(state.board)
+    num_pseudo, idx_sum, idx_squared_sum = _adjacent_liberty(board == 0, size)
 
     def count_all(x):
         return (
@@ -187,7 +252,7 @@ def _count(state: GameState, size):
             jnp.where(board == x + 1, idx_squared_sum, 0).sum(),
         )
 
-    return jax.vmap(count_all)(idx)
+    return jnp.stack(jax.vmap(count_all)(jnp.arange(size**2)))
 
 
 def _signs(color):
@@ -202,34 +267,63 @@ def _adj_ixs(xy, size):
 
 
 def _compute_hash(state: GameState):
+    # recompute the hash from scratch (reference for the incremental updates)
     board = jnp.clip(state.board, -1, 1)
-    to_reduce = ZOBRIST_BOARD[board, jnp.arange(board.shape[-1])]
+    to_reduce = jnp.where(board[:, None] != 0, ZOBRIST_BOARD[board, jnp.arange(board.shape[-1])], 0)
     return lax.reduce(to_reduce, 0, lax.bitwise_xor, (0,))
 
 
 def _is_psk(state: GameState):
     not_passed = state.consecutive_pass_count == 0
-    curr_hash = state.hash_history[state.step_count]
-    has_same_hash = (curr_hash == state.hash_history).all(axis=-1).sum() > 1
+    has_same_hash = (state.zobrist_hash == state.hash_history).all(axis=-1).sum() > 1
     return not_passed & has_same_hash
 
 
+@jax.named_scope("score")
 def _count_scores(state: GameState, size):
+    region = _empty_region_ids(state.board, size)
+
     def calc_point(c):
-        return _count_ji(state, c, size) + jnp.count_nonzero(state.board * c > 0)
+        return _count_ji(state, c, size, region) + jnp.count_nonzero(state.board * c > 0)
 
     return jax.vmap(calc_point)(jnp.int32([1, -1]))
 
 
-def _count_ji(state: GameState, color: int, size: int):
+def _count_ji(state: GameState, color: int, size: int, region: Optional[Array] = None):
+    # empty points whose region does not touch any opponent's stone
+    if region is None:
+        region = _empty_region_ids(state.board, size)
     board = jnp.clip(state.board * color, -1, 1)  # my stone: 1, opp stone: -1
     adj_mat = jax.vmap(_adj_ixs, in_axes=(0, None))(jnp.arange(size**2), size)  # (size**2, 4)
-
-    def fill_opp(x):
-        b, _ = x
-        # true if empty and adjacent to opponent's stone
-        mask = (b == 0) & ((adj_mat != -1) & (b[adj_mat] == -1)).any(axis=1)
-        return jnp.where(mask, -1, b), mask.any()
-
-    board, _ = lax.while_loop(lambda x: x[1], fill_opp, (board, True))
-    return (board == 0).sum()
+    touch_opp = (board == 0) & ((adj_mat != -1) & (board[adj_mat] == -1)).any(axis=1)
+    touch_opp = jnp.zeros(size**2, dtype=jnp.int32).at[region].max(touch_opp.astype(jnp.int32))[region]
+    return ((board == 0) & (touch_opp == 0)).sum()
+
+
+def _empty_region_ids(board: Array, size: int):
+    # Label the connected empty regions by the smallest point index in each region, with a fixed number of rounds.
+    # Points are grouped into trees labeled by their roots (initially each point alone). Each round, every tree
+    # points to its smallest adjacent tree in the same region. Along these pointers, the label two steps ahead is at
+    # most the current one (the current tree is adjacent to the next), so the only cycles are pairs of trees pointing
+    # to each other, and breaking each pair at the smaller root leaves a forest rooted at the smallest labels.
+    # Merging each pointer tree (by pointer jumping) puts every tree that has a neighbor together with another one,
+    # so the number of trees in each region at least halves every round. Hence ceil(log2(size**2)) rounds suffice.
+    # In round i, a region has at most size**2 / 2**i trees, so num_rounds - i pointer jumps flatten the pointer trees.
+    num_points = size**2
+    num_rounds = max(1, (num_points - 1).bit_length())  # ceil(log2(num_points))
+    ixs = jnp.arange(num_points)
+    adj_mat = jax.vmap(_adj_ixs, in_axes=(0, None))(ixs, size)  # (size**2, 4)
+    is_empty = board == 0
+    is_edge = (adj_mat != -1) & is_empty[:, None] & is_empty[adj_mat]
+    adj_mat = jnp.where(is_edge, adj_mat, ixs[:, None])
+
+    def merge(i, root):
+        # smallest adjacent tree of each tree (itself if none)
+        adj_root = jnp.where(root[adj_mat] != root[:, None], root[adj_mat], num_points).min(axis=-1)
+        ptr = jnp.full(num_points, num_points).at[root].min(adj_root)
+        ptr = jnp.where(ptr == num_points, ixs, ptr)
+        ptr = jnp.where((ptr[ptr] == ixs) & (ixs < ptr), ixs, ptr)
+        ptr = lax.fori_loop(i, num_rounds, lambda _, p: p[p], ptr)
+        return ptr[root]
+
+    return lax.fori_loop(0, num_rounds, merge, ixs)
@@ -0,0 +1,296 @@
+# Copyright 2023 The Pgx Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Bitboard backend of Go 9x9.
+# The 81 points are packed into 3 uint32 words per color (point xy is the (xy % 32)-th bit of the (xy // 32)-th word).
+# Flood fills, liberties and captures are computed by shift-and-mask operations.
+# Game semantics (and Zobrist hashes) are the same as pgx._src.games.go.
+#
+# Flood fills and the loop over chains in legal_action_mask are data-dependent while loops. Under vmap,
+# every state runs until the slowest one finishes, but each iteration is only a few word operations.
+# A fixed trip count would have to cover the longest chain (80 flood steps) on every call.
+# Batched random play (pgx.rollout, 100 steps, 1 CPU core) is still faster than the array backend:
+#
+#   batch size      1      64     256    1024    4096
+#   default     42.6K   34.4K   41.5K   30.5K   27.3K  steps/sec
+#   bitboard    47.4K   55.5K   46.5K   53.0K   50.7K  steps/sec
+
+from typing import NamedTuple, Optional
+
+import jax
+import numpy as np
+from jax import Array, lax
+from jax import numpy as jnp
+
+from pgx._src.games.go import ZOBRIST_BOARD, _adj_ixs, _signs
+
+SIZE = 9
+NUM_POINTS = SIZE * SIZE
+NUM_WORDS = (NUM_POINTS + 31) // 32
+
+
+def _to_bitboard(mask: np.ndarray) -> np.ndarray:
+    bb = np.zeros(NUM_WORDS, dtype=np.uint32)
+    for xy in np.nonzero(mask)[0]:
+        bb[xy // 32] |= np.uint32(1 << (xy % 32))
+    return bb
+
+
+BIT = np.stack([_to_bitboard(np.arange(NUM_POINTS) == xy) for xy in range(NUM_POINTS)])  # (81, 3)
+FULL = _to_bitboard(np.ones(NUM_POINTS, dtype=np.bool_))
+NOT_FIRST_COL = _to_bitboard(np.arange(NUM_POINTS) % SIZE != 0)
+NOT_LAST_COL = _to_bitboard(np.arange(NUM_POINTS) % SIZE != SIZE - 1)
+BIT, FULL, NOT_FIRST_COL, NOT_LAST_COL = (jnp.array(x) for x in (BIT, FULL, NOT_FIRST_COL, NOT_LAST_COL))
+EMPTY_BOARD = jnp.zeros(NUM_WORDS, dtype=jnp.uint32)
+
+
+class GameState(NamedTuple):
+    step_count: Array = jnp.int32(0)
+    stones: Array = jnp.zeros((2, NUM_WORDS), dtype=jnp.uint32)  # bitboards of (black, white)
+    board_history: Array = jnp.zeros((8, 2, NUM_WORDS), dtype=jnp.uint32)  # for obs, ring buffer written at step_count
+    num_captured: Array = jnp.zeros(2, dtype=jnp.int32)  # (b, w)
+    consecutive_pass_count: Array = jnp.int32(0)
+    ko: Array = jnp.int32(-1)  # by SSK
+    is_psk: Array = jnp.bool_(False)
+    zobrist_hash: Array = jnp.zeros(2, dtype=jnp.uint32)  # hash of the current board (empty board: 0)
+    hash_history: Array = jnp.zeros((NUM_POINTS * 2, 2), dtype=jnp.uint32)  # ring buffer if superko_window is set
+
+    @property
+    def color(self) -> Array:
+        return self.step_count % 2
+
+    @property
+    def board(self) -> Array:
+        # b = 1, w = -1, empty = 0
+        return _unpack(self.stones[..., 0, :]).astype(jnp.int32) - _unpack(self.stones[..., 1, :]).astype(jnp.int32)
+
+
+class Game:
+    def __init__(
+        self,
+        size: int = 9,
+        komi: float = 7.5,
+        history_length: int = 8,
+        max_termination_steps: Optional[int] = None,
+        superko_window: Optional[int] = None,
+    ):
+        assert size == SIZE, f"bitboard backend only supports {SIZE}x{SIZE} board"
+        self.size = size
+        self.komi = komi
+        self.history_length = history_length
+        self.max_termination_steps = size * size * 2 if max_termination_steps is None else max_termination_steps
+        # PSK is checked only against the last `superko_window` positions (all positions if None)
+        self.superko_window = self.max_termination_steps if superko_window is None else superko_window
+
+    def init(self) -> GameState:
+        return GameState(
+            board_history=jnp.zeros((self.history_length, 2, NUM_WORDS), dtype=jnp.uint32),
+            hash_history=jnp.zeros((self.superko_window, 2), dtype=jnp.uint32),
+        )
+
+    def step(self, state: GameState, action: Array) -> GameState:
+        state = state._replace(ko=jnp.int32(-1))
+        # update state
+        with jax.named_scope("apply_action"):
+            state = lax.cond(
+                (action < NUM_POINTS),
+                lambda: _apply_action(state, action),
+                lambda: _apply_pass(state),
+            )
+        # update board history
+        with jax.named_scope("update_history"):
+            # ring buffer written at step_count, instead of shifting the whole history
+            board_history = state.board_history.at[state.step_count % self.history_length].set(state.stones)
+            state = state._replace(board_history=board_history)
+        # check PSK
+        with jax.named_scope("superko"):
+            ix = state.step_count % self.superko_window
+            state = state._replace(hash_history=state.hash_history.at[ix].set(state.zobrist_hash))
+            state = state._replace(is_psk=_is_psk(state))
+        # increment turns
+        state = state._replace(step_count=state.step_count + 1)
+        return state
+
+    def observe(self, state: GameState, color: Optional[Array] = None) -> Array:
+        if color is None:
+            color = state.color
+        # (my, opp) stones of each history from the latest to the oldest
+        history_ix = (state.step_count - 1 - jnp.arange(self.history_length)) % self.history_length
+        log = _unpack(state.board_history[history_ix[:, None], jnp.int32([color, 1 - color])]).reshape(-1, NUM_POINTS)
+        color = jnp.full_like(log[0], color)  # b = 0, w = 1
+        return jnp.vstack([log, color]).transpose().reshape((SIZE, SIZE, -1))
+
+    @jax.named_scope("legal_action_mask")
+    def legal_action_mask(self, state: GameState) -> Array:
+        my = state.stones[state.color]
+        opp = state.stones[1 - state.color]
+        empty = ~(my | opp) & FULL
+
+        # empty points adjacent to another empty point are always legal
+        # liberties of my chains not in atari and the last liberty of opponent's chains are also legal
+        def body(x):
+            remaining, legal = x
+            seed = _lowest_bit(remaining)
+            is_mine = (seed & my).any()
+            chain = _flood(seed, jnp.where(is_mine, my, opp))
+            libs = _neighbours(chain) & empty
+            num_libs = lax.population_count(libs).sum()
+            ok = (is_mine & (num_libs >= 2)) | (~is_mine & (num_libs == 1))
+            return remaining & ~chain, legal | jnp.where(ok, libs, EMPTY_BOARD)
+
+        _, legal = lax.while_loop(lambda x: x[0].any(), body, (my | opp, _neighbours(empty) & empty))
+        mask = _unpack(legal)
+        mask = lax.select(state.ko == -1, mask, mask.at[state.ko].set(False))
+        return jnp.append(mask, True)  # pass is always legal
+
+    @jax.named_scope("is_terminal")
+    def is_terminal(self, state: GameState, max_termination_steps: Optional[Array] = None) -> Array:
+        # komi and max_termination_steps can be given as traced values (see pgx.go.GoParams)
+        if max_termination_steps is None:
+            max_termination_steps = self.max_termination_steps
+        two_consecutive_pass = state.consecutive_pass_count >= 2
+        timeover = max_termination_steps <= state.step_count
+        return two_consecutive_pass | state.is_psk | timeover
+
+    @jax.named_scope("rewards")
+    def rewards(
+        self, state: GameState, komi: Optional[Array] = None, max_termination_steps: Optional[Array] = None
+    ) -> Array:
+        komi = self.komi if komi is None else komi
+        # Scores are only needed at the terminal state. Under vmap, lax.cond becomes select and computes the scores
+        # of every state, while a while loop keeps its predicate: this loop of at most one trip is skipped unless
+        # some state in the batch is terminal (in which case the whole batch pays for scoring).
+        def score_once(x):
+            is_terminal, _ = x
+            # depend on the loop variable, or XLA hoists the (loop-invariant) scoring out of the loop
+            stones = jnp.where(is_terminal, state.stones, 0)
+            return jnp.bool_(False), self._terminal_rewards(state._replace(stones=stones), komi)
+
+        is_terminal = self.is_terminal(state, max_termination_steps)
+        _, rewards = lax.while_loop(lambda x: x[0], score_once, (is_terminal, jnp.zeros(2, dtype=jnp.float32)))
+        return rewards
+
+    def score(self, state: GameState, komi: Optional[Array] = None) -> Array:
+        komi = self.komi if komi is None else komi
+        # area scores of (black, white), komi is added to white
+        return _count_scores(state).astype(jnp.float32) + jnp.zeros(2, dtype=jnp.float32).at[1].set(komi)
+
+    def _terminal_rewards(self, state: GameState, komi) -> Array:
+        scores = _count_scores(state)
+        is_black_win = scores[0] - komi > scores[1]
+        rewards = lax.select(is_black_win, jnp.float32([1, -1]), jnp.float32([-1, 1]))
+        to_play = state.color
+        rewards = lax.select(state.is_psk, jnp.float32([-1, -1]).at[to_play].set(1.0), rewards)
+        return rewards
+
+
+def _apply_pass(state: GameState) -> GameState:
+    return state._replace(consecutive_pass_count=state.consecutive_pass_count + 1)
+
+
+def _apply_action(state: GameState, action) -> GameState:
+    state = state._replace(consecutive_pass_count=0)
+    my_sign, opp_sign = _signs(state.color)
+    my = state.stones[state.color] | BIT[action]
+    opp = state.stones[1 - state.color]
+    empty = ~(my | opp) & FULL
+
+    # remove killed stones
+    adj_ixs = _adj_ixs(action, SIZE)
+    is_opp = (adj_ixs != -1) & (BIT[adj_ixs] & opp).any(axis=-1)
+
+    def killed_chain(xy, is_opp):
+        chain = _flood(jnp.where(is_opp, BIT[xy], EMPTY_BOARD), opp)
+        return jnp.where((_neighbours(chain) & empty).any(), EMPTY_BOARD, chain)
+
+    chains = jax.vmap(killed_chain)(adj_ixs, is_opp)  # (4, NUM_WORDS)
+    is_killed = chains.any(axis=-1)
+    captured = lax.reduce(chains, jnp.uint32(0), lax.bitwise_or, (0,))
+    num_captured = lax.population_count(chains).sum()
+    ko_ix = jnp.nonzero(is_killed, size=1)[0][0]
+    ko_may_occur = ((adj_ixs == -1) | is_opp).all()
+    to_reduce = jnp.where(_unpack(captured)[:, None], ZOBRIST_BOARD[opp_sign, :NUM_POINTS], 0)
+    zobrist_hash = state.zobrist_hash ^ lax.reduce(to_reduce, 0, lax.bitwise_xor, (0,))
+    zobrist_hash ^= ZOBRIST_BOARD[my_sign, action]
+
+    return state._replace(
+        stones=state.stones.at[state.color].set(my).at[1 - state.color].set(opp & ~captured),
+        num_captured=state.num_captured.at[state.color].add(num_captured),
+        ko=lax.select(ko_may_occur & (num_captured == 1), adj_ixs[ko_ix], -1),
+        zobrist_hash=zobrist_hash,
+    )
+
+
+def _is_psk(state: GameState):
+    not_passed = state.consecutive_pass_count == 0
+    has_same_hash = (state.zobrist_hash == state.hash_history).all(axis=-1).sum() > 1
+    return not_passed & has_same_hash
+
+
+@jax.named_scope("score")
+def _count_scores(state: GameState):
+    empty = ~(state.stones[0] | state.stones[1]) & FULL
+
+    def calc_point(c):
+        # empty points not reachable from opponent's stones
+        reachable = _flood(state.stones[1 - c], empty | state.stones[1 - c])
+        ji = lax.population_count(empty & ~reachable).sum()
+        return ji + lax.population_count(state.stones[c]).sum()
+
+    return jax.vmap(calc_point)(jnp.int32([0, 1]))
+
+
+def _unpack(bb: Array) -> Array:
+    # (..., NUM_WORDS) uint32 -> (..., NUM_POINTS) bool
+    ixs = jnp.arange(NUM_POINTS)
+    return ((bb[..., ixs // 32] >> (ixs % 32).astype(jnp.uint32)) & 1).astype(jnp.bool_)
+
+
+def _shift_up(bb: Array, k: int) -> Array:
+    # xy -> xy + k
+    carry = jnp.concatenate([jnp.zeros(1, dtype=jnp.uint32), bb[:-1] >> (32 - k)])
+    return (bb << k) | carry
+
+
+def _shift_down(bb: Array, k: int) -> Array:
+    # xy -> xy - k
+    carry = jnp.concatenate([bb[1:] << (32 - k), jnp.zeros(1, dtype=jnp.uint32)])
+    return (bb >> k) | carry
+
+
+def _neighbours(bb: Array) -> Array:
+    # points adjacent to any of the points
+    adj = (
+        (_shift_up(bb, 1) & NOT_FIRST_COL)
+        | (_shift_down(bb, 1) & NOT_LAST_COL)
+        | _shift_up(bb, SIZE)
+        | _shift_down(bb, SIZE)
+    )
+    return adj & FULL
+
+
+def _flood(seed: Array, area: Array) -> Array:
+    # connected points in `area` from `seed`
+    def body(x):
+        bb, _ = x
+        next_bb = (bb | _neighbours(bb)) & area
+        return next_bb, (next_bb != bb).any()
+
+    bb, _ = lax.while_loop(lambda x: x[1], body, (seed & area, jnp.bool_(True)))
+    return bb
+
+
+def _lowest_bit(bb: Array) -> Array:
+    ix = jnp.argmax(bb != 0)
+    return EMPTY_BOARD.at[ix].set(bb[ix] & (jnp.uint32(0) - bb[ix]))
@@ -14,13 +14,14 @@
 
 
 from typing import NamedTuple
-from functools import partial
+from functools import lru_cache, partial
 
 import numpy as np
 import jax
 from jax import Array
 import jax.numpy as jnp
 
+from pgx._src.games.shogi_tables import TABLES_PATH, board_effects
 
 MAX_TERMINATION_STEPS = 512  # From AZ paper
 
@@ -28,23 +29,6 @@ TRUE = jnp.bool_(True)
 FALSE = jnp.bool_(False)
 
 
-EMPTY = -1  # 空白
-PAWN = 0  # 歩
-LANCE = 1  # 香
-KNIGHT = 2  # 桂
-SILVER = 3  # 銀
-BISHOP = 4  # 角
-ROOK = 5  # 飛
-GOLD = 6  # 金
-KING = 7  # 玉
-PRO_PAWN = 8  # と
-PRO_LANCE = 9  # 成香
-PRO_KNIGHT = 10  # 成桂
-PRO_SILVER = 11  # 成銀
-HORSE = 12  # 馬
-DRAGON = 13  # 龍
-
-
 # fmt: off
 INIT_PIECE_BOARD = jnp.int32([[15, -1, 14, -1, -1, -1, 0, -1, 1],  # noqa: E241
                               [16, 18, 14, -1, -1, -1, 0,  5, 2],  # noqa: E241
@@ -58,237 +42,18 @@ INIT_PIECE_BOARD = jnp.int32([[15, -1, 14, -1, -1, -1, 0, -1, 1],  # noqa: E241
 # fmt: on
 
 
-# Can <piece,14> reach from <from,81> to <to,81> ignoring pieces on board?
-def can_move_to(piece, from_, to):
-    """Can <piece> move from <from_> to <to>?"""
-    if from_ == to:
-        return False
-    x0, y0 = from_ // 9, from_ % 9
-    x1, y1 = to // 9, to % 9
-    dx = x1 - x0
-    dy = y1 - y0
-    if piece == PAWN:
-        if dx == 0 and dy == -1:
-            return True
-        else:
-            return False
-    elif piece == LANCE:
-        if dx == 0 and dy < 0:
-            return True
-        else:
-            return False
-    elif piece == KNIGHT:
-        if dx in (-1, 1) and dy == -2:
-            return True
-        else:
-            return False
-    elif piece == SILVER:
-        if dx in (-1, 0, 1) and dy == -1:
-            return True
-        elif dx in (-1, 1) and dy == 1:
-            return True
-        else:
-            return False
-    elif piece == BISHOP:
-        if dx == dy or dx == -dy:
-            return True
-        else:
-            return False
-    elif piece == ROOK:
-        if dx == 0 or dy == 0:
-            return True
-        else:
-            return False
-    if piece in (GOLD, PRO_PAWN, PRO_LANCE, PRO_KNIGHT, PRO_SILVER):
-        if dx in (-1, 0, 1) and dy in (0, -1):
-            return True
-        elif dx == 0 and dy == 1:
-            return True
-        else:
-            return False
-    elif piece == KING:
-        if abs(dx) <= 1 and abs(dy) <= 1:
-            return True
-        else:
-            return False
-    elif piece == HORSE:
-        if abs(dx) <= 1 and abs(dy) <= 1:
-            return True
-        elif dx == dy or dx == -dy:
-            return True
-        else:
-            return False
-    elif piece == DRAGON:
-        if abs(dx) <= 1 and abs(dy) <= 1:
-            return True
-        if dx == 0 or dy == 0:
-            return True
-        else:
-            return False
-    else:
-        assert False
-
-
-def is_on_the_way(piece, from_, to, point):
-    if to == point:
-        return False
-    if piece not in (LANCE, BISHOP, ROOK, HORSE, DRAGON):
-        return False
-    if not can_move_to(piece, from_, to):
-        return False
-    if not can_move_to(piece, from_, point):
-        return False
-
-    x0, y0 = from_ // 9, from_ % 9
-    x1, y1 = to // 9, to % 9
-    x2, y2 = point // 9, point % 9
-    dx1, dy1 = x1 - x0, y1 - y0
-    dx2, dy2 = x2 - x0, y2 - y0
-
-    def sign(d):
-        if d == 0:
-            return 0
-        return d > 0
-
-    if (sign(dx1) != sign(dx2)) or (sign(dy1) != sign(dy2)):
-        return False
-
-    return abs(dx2) <= abs(dx1) and abs(dy2) <= abs(dy1)
-
-
-CAN_MOVE = np.zeros((14, 81, 81), dtype=jnp.bool_)
-for piece in range(14):
-    for from_ in range(81):
-        for to in range(81):
-            CAN_MOVE[piece, from_, to] = can_move_to(piece, from_, to)
-
-assert CAN_MOVE.sum() == 8228
-CAN_MOVE = jnp.array(CAN_MOVE)
-
-
-# When <lance/bishop/rook/horse/dragon,5> moves from <from,81> to <to,81>,
-# is <point,81> on the way between two points?
-BETWEEN = np.zeros((5, 81, 81, 81), dtype=np.bool_)
-for i, piece in enumerate((LANCE, BISHOP, ROOK, HORSE, DRAGON)):
-    for from_ in range(81):
-        for to in range(81):
-            for p in range(81):
-                BETWEEN[i, from_, to, p] = is_on_the_way(piece, from_, to, p)
-
-BETWEEN = jnp.array(BETWEEN)
-assert BETWEEN.sum() == 10564
-
-
-# Give <dir,10> and <to,81>, return the legal <from> idx
-# E.g. LEGAL_FROM_IDX[Up, to=19] = [20, 21, ..., -1] (filled by -1)
-# Used for computing dlshogi action
-#
-#  dir, to, from
-#  (10, 81, 81)
-#
-#  0 Up
-#  1 Up left
-#  2 Up right
-#  3 Left
-#  4 Right
-#  5 Down
-#  6 Down left
-#  7 Down right
-#  8 Up2 left
-#  9 Up2 right
-
-LEGAL_FROM_IDX = -np.ones((10, 81, 8), dtype=jnp.int32)  # type: ignore
-
-for dir_ in range(10):
-    for to in range(81):
-        x, y = to // 9, to % 9
-        if dir_ == 0:  # Up
-            dx, dy = 0, +1
-        elif dir_ == 1:  # Up left
-            dx, dy = -1, +1
-        elif dir_ == 2:  # Up right
-            dx, dy = +1, +1
-        elif dir_ == 3:  # Left
-            dx, dy = -1, 0
-        elif dir_ == 4:  # Right
-            dx, dy = +1, 0
-        elif dir_ == 5:  # Down
-            dx, dy = 0, -1
-        elif dir_ == 6:  # Down left
-            dx, dy = -1, -1
-        elif dir_ == 7:  # Down right
-            dx, dy = +1, -1
-        elif dir_ == 8:  # Up2 left
-            dx, dy = -1, +2
-        elif dir_ == 9:  # Up2 right
-            dx, dy = +1, +2
-        for i in range(8):
-            x += dx
-            y += dy
-            if x < 0 or 8 < x or y < 0 or 8 < y:
-                break
-            LEGAL_FROM_IDX[dir_, to, i] = x * 9 + y
-            if dir_ == 8 or dir_ == 9:
-                break
-
-LEGAL_FROM_IDX = jnp.array(LEGAL_FROM_IDX)  # type: ignore
-
-
-@jax.jit
-@jax.vmap
-def can_move_any_ix(from_):
-    return jnp.nonzero(
-        (CAN_MOVE[:, from_, :] | CAN_MOVE[:, :, from_]).any(axis=0),
-        size=36,
-        fill_value=-1,
-    )[0]
-
-
-@jax.jit
-@jax.vmap
-def neighbour_ix(from_):
-    return jnp.nonzero(
-        (CAN_MOVE[7, from_, :] | CAN_MOVE[2, :, from_]),
-        size=10,
-        fill_value=-1,
-    )[0]
-
-
-NEIGHBOUR_IX = neighbour_ix(jnp.arange(81))
-
-
-def between_ix(p, from_, to):
-    return jnp.nonzero(BETWEEN[p, from_, to], size=8, fill_value=-1)[0]
-
-
-BETWEEN_IX = jax.jit(
-    jax.vmap(
-        jax.vmap(jax.vmap(between_ix, (None, None, 0)), (None, 0, None)),
-        (0, None, None),
-    )
-)(jnp.arange(5), jnp.arange(81), jnp.arange(81))
-
-
-CAN_MOVE_ANY = can_move_any_ix(jnp.arange(81))  # (81, 36)
+class Tables(NamedTuple):
+    CAN_MOVE: Array  # (14, 81, 81) can <piece> move from <from> to <to> ignoring pieces on board?
+    BETWEEN_IX: Array  # (5, 81, 81, 8) points between <from> and <to> of lance/bishop/rook/horse/dragon
+    LEGAL_FROM_IDX: Array  # (10, 81, 8) <from> candidates of <dir> and <to> (for dlshogi action)
+    AROUND_IX: Array  # (81, 8)
 
 
-def _around(c):
-    x, y = c // 9, c % 9
-    dx = jnp.int32([-1, -1, 0, +1, +1, +1, 0, -1])
-    dy = jnp.int32([0, -1, -1, -1, 0, +1, +1, +1])
-
-    def f(i):
-        new_x, new_y = x + dx[i], y + dy[i]
-        return jax.lax.select(
-            (new_x < 0) | (new_x >= 9) | (new_y < 0) | (new_y >= 9),
-            -1,
-            new_x * 9 + new_y,
-        )
-
-    return jax.vmap(f)(jnp.arange(8))
-
-
-AROUND_IX = jax.vmap(_around)(jnp.arange(81))
+@lru_cache(maxsize=None)
+def _tables() -> Tables:
+    # precomputed by shogi_tables.py and loaded on first use
+    with np.load(TABLES_PATH) as f, jax.ensure_compile_time_eval():
+        return Tables(**{k: jnp.array(f[k]) for k in Tables._fields})
 
 
 EMPTY = jnp.int32(-1)  # 空白
@@ -322,8 +87,6 @@ OPP_PRO_SILVER = jnp.int32(25)  # 成銀
 OPP_HORSE = jnp.int32(26)  # 馬
 OPP_DRAGON = jnp.int32(27)  # 龍
 
-ALL_SQ = jnp.arange(81)
-
 INIT_LEGAL_ACTION_MASK = np.zeros(81 * 27, dtype=jnp.bool_)
 # fmt: off
 ixs = np.int32([5, 7, 14, 23, 25, 32, 34, 41, 43, 50, 52, 59, 61, 68, 77, 79, 115, 124, 133, 142, 187, 196, 205, 214, 268, 277, 286, 295, 304, 331])
@@ -333,6 +96,8 @@ INIT_LEGAL_ACTION_MASK = jnp.bool_(INIT_LEGAL_ACTION_MASK)
 assert INIT_LEGAL_ACTION_MASK.shape == (81 * 27,)
 assert INIT_LEGAL_ACTION_MASK.sum() == 30
 
+INIT_EFFECTS = jnp.int32(board_effects(np.asarray(INIT_PIECE_BOARD)))
+
 
 class GameState(NamedTuple):
     step_count: Array = jnp.int32(0)
@@ -340,10 +105,11 @@ class GameState(NamedTuple):
     board: Array = INIT_PIECE_BOARD  # (81,) flip in turn
     hand: Array = jnp.zeros((2, 7), dtype=jnp.int32)  # flip in turn
     # cache
-    # Redundant information used only in _is_checked for speeding-up
-    cache_m2b: Array = -jnp.ones(8, dtype=jnp.int32)
+    # Redundant information computed once per step by _set_cache
     cache_king: Array = jnp.int32(44)
-    # 
+    # squares of (my, opp) pieces which can move to each square along each direction (-1 if none)
+    # shared by legal action mask, check detection, and observation
+    effects: Array = INIT_EFFECTS  # (2, 10, 81)
     legal_action_mask: Array = INIT_LEGAL_ACTION_MASK
 
 
@@ -360,11 +126,13 @@ class Game:
     def legal_action_mask(self, state: GameState) -> Array:
         return _legal_action_mask(state)
     
+    @jax.named_scope("is_terminal")
     def is_terminal(self, state: GameState) -> Array:
         terminated = ~state.legal_action_mask.any()
         terminated = terminated | (MAX_TERMINATION_STEPS <= state.step_count)
         return terminated
     
+    @jax.named_scope("rewards")
     def rewards(self, state: GameState) -> Array:
         has_legal_action = state.legal_action_mask.any()
         rewards = jnp.float32([[-1.0, 1.0], [1.0, -1.0]])[state.color]
@@ -430,7 +198,7 @@ class Action(NamedTuple):
         is_drop = direction >= 20
         is_promotion = (10 <= direction) & (direction < 20)
         # LEGAL_FROM_IDX[UP, 19] = [20, 21, ... -1]
-        legal_from_idx = LEGAL_FROM_IDX[direction % 10, to]  # (81,)
+        legal_from_idx = _tables().LEGAL_FROM_IDX[direction % 10, to]  # (81,)
         from_cand = state.board[legal_from_idx]  # (8,)
         mask = (legal_from_idx >= 0) & (PAWN <= from_cand) & (from_cand < OPP_PAWN)
         i = jnp.argmax(mask)
@@ -451,10 +219,12 @@ def _step(state: GameState, action: Array) -> GameState:
     # flip state
     state = _flip(state)
     state = state._replace(color=(state.color + 1) % 2, step_count=state.step_count + 1)
+    state = _set_cache(state)
     state = state._replace(legal_action_mask=_legal_action_mask(state))
     return state
 
 
+@jax.named_scope("apply_move")
 def _step_move(state: GameState, action: Action) -> GameState:
     pb = state.board
     # remove piece from the original position
@@ -477,6 +247,7 @@ def _step_move(state: GameState, action: Action) -> GameState:
     return state._replace(board=pb, hand=hand)  # type: ignore
 
 
+@jax.named_scope("apply_drop")
 def _step_drop(state: GameState, action: Action) -> GameState:
     # add piece to board
     pb = state.board.at[action.to].set(action.piece)
@@ -485,44 +256,60 @@ def _step_drop(state: GameState, action: Action) -> GameState:
     return state._replace(board=pb, hand=hand)  # type: ignore
 
 
+@jax.named_scope("effects")
 def _set_cache(state: GameState):
     return state._replace(  # type: ignore
-        cache_m2b=jnp.nonzero(jax.vmap(_is_major_piece)(state.board), size=8, fill_value=-1)[0],
         cache_king=jnp.argmin(jnp.abs(state.board - KING)),
+        effects=_effects(state.board),
     )
 
 
+@jax.named_scope("legal_action_mask")
 def _legal_action_mask(state: GameState):
-    # update cache
-    state = _set_cache(state)
-
-    a = jax.vmap(partial(Action._from_dlshogi_action, state=state))(action=jnp.arange(27 * 81))
-
-    @jax.vmap
-    def is_legal_move_wo_pro(i):
-        return _is_legal_move_wo_pro(a.from_[i], a.to[i], state)
-
-    @jax.vmap
-    def is_legal_drop_wo_piece(to):
-        return _is_legal_drop_wo_piece(to, state)
-
-    pseudo_legal_moves = is_legal_move_wo_pro(jnp.arange(10 * 81))
-    pseudo_legal_drops = is_legal_drop_wo_piece(jnp.arange(81))
+    # suppose that the cache is updated
+    board = state.board
+    king_pos = state.cache_king
+    to = jnp.arange(81)
+
+    # moves of (direction, to) labels; the moving piece is the one which can move to `to` along `direction`
+    from_ = state.effects[0]  # (10, 81)
+    piece = jnp.where(from_ >= 0, board[from_], EMPTY)
+    is_mine = (PAWN <= board) & (board < OPP_PAWN)
+    pseudo_legal_moves = (from_ >= 0) & ~is_mine[None, :]
+
+    # Leaving the king in check is decided by the checkers and pins seen from the king
+    # instead of simulating each move.
+    checkers = state.effects[1, :, king_pos]  # (10,)
+    num_checks = (checkers >= 0).sum()
+    between = jax.vmap(partial(_between, board, king_pos))(checkers)  # (10, 8)
+    block = jnp.zeros(81, dtype=jnp.bool_).at[between].set(True, mode="drop")
+    capture_or_block = block.at[jnp.where(checkers >= 0, checkers, 81)].set(True, mode="drop")
+    pinned, pin_line = _pins(board, king_pos)
+    is_pinned = (pinned[None, None, :] == from_[:, :, None]) & (pinned >= 0)  # (10, 81, 10)
+    ok = ~is_pinned.any(axis=-1) | (is_pinned & pin_line.T[to][None, :, :]).any(axis=-1)
+    ok &= (num_checks == 0) | ((num_checks == 1) & capture_or_block[None, :])
+    # king should not move to the squares attacked by the opponent (sliders attack through the king)
+    is_attacked = (state.effects[1] >= 0).any(axis=0)
+    is_attacked = is_attacked.at[jax.vmap(partial(_behind_king, board, king_pos))(checkers)].set(True, mode="drop")
+    legal_moves = pseudo_legal_moves & jnp.where(piece == KING, ~is_attacked[None, :], ok)
 
-    @jax.vmap
-    def is_legal_move(i):
-        return pseudo_legal_moves[i % (10 * 81)] & jax.lax.cond(
-            a.is_promotion[i], _is_promotion_legal, _is_no_promotion_legal, *(a.from_[i], a.to[i], state)
-        )
+    # promotion
+    must_promote = ((piece == PAWN) | (piece == LANCE)) & (to % 9 == 0)
+    must_promote |= (piece == KNIGHT) & (to % 9 < 2)
+    can_promote = ~((GOLD <= piece) & (piece <= DRAGON)) & ((from_ % 9 < 3) | (to % 9 < 3))
 
-    @jax.vmap
-    def is_legal_drop(i):
-        return pseudo_legal_drops[i % 81] & _is_legal_drop_wo_ignoring_check(a.piece[i], a.to[i], state)
+    # drops
+    pseudo_legal_drops = (board == EMPTY) & ((num_checks == 0) | ((num_checks == 1) & block))
+    legal_drops = jax.vmap(
+        jax.vmap(_is_legal_drop_wo_ignoring_check, (None, 0, None)), (0, None, None)
+    )(jnp.arange(7), to, state)
+    legal_drops &= pseudo_legal_drops[None, :]
 
     legal_action_mask = jnp.hstack(
         (
-            is_legal_move(jnp.arange(20 * 81)),
-            is_legal_drop(jnp.arange(20 * 81, 27 * 81)),
+            (legal_moves & ~must_promote).flatten(),
+            (legal_moves & can_promote).flatten(),
+            legal_drops.flatten(),
         )
     )  # (27 * 81)
 
@@ -536,35 +323,91 @@ def _legal_action_mask(state: GameState):
     return legal_action_mask
 
 
+def _effects(board: Array):
+    # see GameState.effects
+    my_effects = _attackers(board, jnp.arange(81))
+    opp_effects = _attackers(_flip_board(board), jnp.arange(81))
+    opp_effects = jnp.where(opp_effects >= 0, 80 - opp_effects, -1)[:, ::-1]
+    return jnp.stack([my_effects, opp_effects])
+
+
+def _attackers(board: Array, to: Array):
+    # For each direction, the piece which can move to `to` is the first piece along LEGAL_FROM_IDX[direction, to].
+    # Returns its square (-1 if none or opponent's) of shape (10,) + to.shape
+    from_ix = _tables().LEGAL_FROM_IDX[:, to]  # (10, ..., 8)
+    pieces = jnp.where(from_ix >= 0, board[from_ix], EMPTY)
+    first = jnp.argmax(pieces != EMPTY, axis=-1)[..., None]
+    from_ = jnp.take_along_axis(from_ix, first, axis=-1)[..., 0]
+    piece = jnp.take_along_axis(pieces, first, axis=-1)[..., 0]
+    ok = (PAWN <= piece) & (piece < OPP_PAWN) & _tables().CAN_MOVE[piece % 14, from_, to]
+    return jnp.where(ok, from_, -1)
+
+
+def _between(board: Array, king_pos: Array, checker: Array):
+    # squares between the king and opponent's checking piece (81 if none)
+    flipped_piece = jnp.where(checker >= 0, board[checker] - 14, EMPTY)
+    i = _major_piece_ix(flipped_piece)
+    between_ix = _tables().BETWEEN_IX[i, 80 - checker, 80 - king_pos, :]
+    return jnp.where((checker >= 0) & (i >= 0) & (between_ix >= 0), 80 - between_ix, 81)
+
+
+def _behind_king(board: Array, king_pos: Array, checker: Array):
+    # square next to the king on the opposite side of the checking piece, if the checker reaches there (81 if none)
+    kx, ky = king_pos // 9, king_pos % 9
+    x, y = kx + jnp.sign(kx - checker // 9), ky + jnp.sign(ky - checker % 9)
+    behind = x * 9 + y
+    ok = (checker >= 0) & (0 <= x) & (x < 9) & (0 <= y) & (y < 9)
+    ok &= _tables().CAN_MOVE[(board[checker] - 14) % 14, 80 - checker, 80 - behind]
+    return jnp.where(ok, behind, 81)
+
+
+def _pins(board: Array, king_pos: Array):
+    # Look from the king along the rays of LEGAL_FROM_IDX in the flipped (opponent's) view:
+    # if the first piece is mine and the second one is opponent's which can move to the king ignoring pieces,
+    # the first one is pinned and can move only on the line.
+    # Returns the pinned squares (10,) and the lines (10, 81)
+    board = _flip_board(board)
+    king_pos = 80 - king_pos
+    ray = _tables().LEGAL_FROM_IDX[:, king_pos]  # (10, 8)
+    pieces = jnp.where(ray >= 0, board[ray], EMPTY)
+    ixs = jnp.arange(8)
+    is_occupied = pieces != EMPTY
+    first = jnp.argmax(is_occupied, axis=-1)
+    second = jnp.argmax(is_occupied & (ixs > first[:, None]), axis=-1)
+    p1, p2 = pieces[jnp.arange(10), first], pieces[jnp.arange(10), second]
+    s1, s2 = ray[jnp.arange(10), first], ray[jnp.arange(10), second]
+    is_pin = (p1 >= OPP_PAWN) & (second > first) & (PAWN <= p2) & (p2 < OPP_PAWN)
+    is_pin &= _tables().CAN_MOVE[p2 % 14, s2, king_pos]
+    pinned = jnp.where(is_pin, 80 - s1, -1)
+    # back to my view (-1 becomes 81 and is dropped)
+    line = jnp.where((ray >= 0) & (ixs <= second[:, None]), 80 - ray, 81)
+    pin_line = jax.vmap(lambda ix: jnp.zeros(81, dtype=jnp.bool_).at[ix].set(True, mode="drop"))(line)
+    return pinned, pin_line
+
+
 def _is_drop_pawn_mate(state: GameState):
     # check pawn drop mate
     opp_king_pos = jnp.argmin(jnp.abs(state.board - OPP_KING))
     to = opp_king_pos + 1
-    flip_state = _flip(state._replace(board=state.board.at[to].set(PAWN)))
+    board = state.board.at[to].set(PAWN)
     # Not checkmate if
     #   (1) can capture checking pawn, or
     #   (2) king can escape
-    # fmt: off
-    flipped_to = 80 - to
-    flip_state = _set_cache(flip_state)
-    can_capture_pawn = jax.vmap(partial(
-        _is_legal_move_wo_pro, to=flipped_to, state=flip_state
-    ))(from_=CAN_MOVE_ANY[flipped_to]).any()
-    from_ = 80 - opp_king_pos
-    can_king_escape = jax.vmap(
-        partial(_is_legal_move_wo_pro, from_=from_, state=flip_state)
-    )(to=AROUND_IX[from_]).any()
+    # (1) opponent's pieces other than the king which are not pinned (effects to `to` are not changed by the pawn)
+    capturers = state.effects[1, :, to]  # (10,)
+    pinned, pin_line = _pins(_flip_board(board), 80 - opp_king_pos)
+    flipped = jnp.where(capturers >= 0, 80 - capturers, -1)
+    is_pinned = (pinned[None, :] == flipped[:, None]) & (pinned >= 0)  # (10, 10)
+    ok = ~is_pinned.any(axis=-1) | (is_pinned & pin_line[:, 80 - to][None, :]).any(axis=-1)
+    can_capture_pawn = ((capturers >= 0) & (capturers != opp_king_pos) & ok).any()
+    # (2) squares around the king (including `to`) which are not attacked after the drop
+    around = _tables().AROUND_IX[opp_king_pos]
+    is_attacked = (_attackers(board, around) >= 0).any(axis=0)
+    can_king_escape = ((around >= 0) & (board[around] < OPP_PAWN) & ~is_attacked).any()
     is_pawn_mate = ~(can_capture_pawn | can_king_escape)
-    # fmt: on
     return is_pawn_mate, to
 
 
-def _is_legal_drop_wo_piece(to: Array, state: GameState):
-    is_illegal = state.board[to] != EMPTY
-    is_illegal |= _is_checked(state._replace(board=state.board.at[to].set(PAWN)))
-    return ~is_illegal
-
-
 def _is_legal_drop_wo_ignoring_check(piece: Array, to: Array, state: GameState):
     is_illegal = state.board[to] != EMPTY
     # don't have the piece
@@ -577,101 +420,10 @@ def _is_legal_drop_wo_ignoring_check(piece: Array, to: Array, state: GameState):
     return ~is_illegal
 
 
-def _is_legal_move_wo_pro(
-    from_: Array,
-    to: Array,
-    state: GameState,
-):
-    ok = _is_pseudo_legal_move(from_, to, state)
-    ok &= ~_is_checked(
-        state._replace(
-            board=state.board.at[from_].set(EMPTY).at[to].set(state.board[from_]),
-            cache_king=jax.lax.select(  # update cache
-                state.board[from_] == KING,
-                jnp.int32(to),
-                state.cache_king,
-            )
-        )
-    )
-    return ok
-
-
-def _is_pseudo_legal_move(
-    from_: Array,
-    to: Array,
-    state: GameState,
-):
-    ok = _is_pseudo_legal_move_wo_obstacles(from_, to, state)
-    # there is an obstacle between from_ and to
-    i = _major_piece_ix(state.board[from_])
-    between_ix = BETWEEN_IX[i, from_, to, :]
-    is_illegal = (i >= 0) & ((between_ix >= 0) & (state.board[between_ix] != EMPTY)).any()
-    return ok & ~is_illegal
-
-
-def _is_pseudo_legal_move_wo_obstacles(
-    from_: Array,
-    to: Array,
-    state: GameState,
-):
-    board = state.board
-    # source is not my piece
-    piece = board[from_]
-    is_illegal = (from_ < 0) | ~((PAWN <= piece) & (piece < OPP_PAWN))
-    # destination is my piece
-    is_illegal |= (PAWN <= board[to]) & (board[to] < OPP_PAWN)
-    # piece cannot move like that
-    is_illegal |= ~CAN_MOVE[piece, from_, to]
-    return ~is_illegal
-
-
-def _is_no_promotion_legal(
-    from_: Array,
-    to: Array,
-    state: GameState,
-):
-    # source is not my piece
-    piece = state.board[from_]
-    # promotion
-    is_illegal = ((piece == PAWN) | (piece == LANCE)) & (to % 9 == 0)  # Must promote
-    is_illegal |= (piece == KNIGHT) & (to % 9 < 2)  # Must promote
-    return ~is_illegal
-
-
-def _is_promotion_legal(
-    from_: Array,
-    to: Array,
-    state: GameState,
-):
-    # source is not my piece
-    piece = state.board[from_]
-    # promotion
-    is_illegal = (GOLD <= piece) & (piece <= DRAGON)  # Pieces cannot promote
-    is_illegal |= (from_ % 9 >= 3) & (to % 9 >= 3)  # irrelevant to the opponent's territory
-    return ~is_illegal
-
-
 def _is_checked(state: GameState):
     # Use cached king position, simpler implementation is:
     # jnp.argmin(jnp.abs(state.pieceboard - KING))
-    king_pos = state.cache_king
-    flipped_king_pos = 80 - king_pos
-
-    @jax.vmap
-    def can_capture_king(from_):
-        return _is_pseudo_legal_move(from_=from_, to=flipped_king_pos, state=_flip(state))
-
-    @jax.vmap
-    def can_capture_king_local(from_):
-        return _is_pseudo_legal_move_wo_obstacles(from_=from_, to=flipped_king_pos, state=_flip(state))
-
-    # Simpler implementation without cache of major piece places
-    # from_ = CAN_MOVE_ANY[flipped_king_pos]
-    # return can_capture_king(from_).any()
-    from_ = 80 - state.cache_m2b
-    from_ = jnp.where(from_ == 81, -1, from_)
-    neighbours = NEIGHBOUR_IX[flipped_king_pos]
-    return can_capture_king(from_).any() | can_capture_king_local(neighbours).any()
+    return (state.effects[1, :, state.cache_king] >= 0).any()
 
 
 def _flip_piece(piece):
@@ -683,29 +435,18 @@ def _rotate(board: Array) -> Array:
 
 
 def _flip(state: GameState):
-    empty_mask = state.board == EMPTY
-    pb = (state.board + 14) % 28
-    pb = jnp.where(empty_mask, EMPTY, pb)
-    pb = pb[::-1]
     return state._replace(
-        board=pb,
+        board=_flip_board(state.board),
         hand=state.hand[jnp.int32((1, 0))],
+        effects=jnp.where(state.effects >= 0, 80 - state.effects, -1)[::-1, :, ::-1],
     )
 
 
-def _is_major_piece(piece):
-    return (
-        (piece == LANCE)
-        | (piece == BISHOP)
-        | (piece == ROOK)
-        | (piece == HORSE)
-        | (piece == DRAGON)
-        | (piece == OPP_LANCE)
-        | (piece == OPP_BISHOP)
-        | (piece == OPP_ROOK)
-        | (piece == OPP_HORSE)
-        | (piece == OPP_DRAGON)
-    )
+def _flip_board(board: Array):
+    empty_mask = board == EMPTY
+    pb = (board + 14) % 28
+    pb = jnp.where(empty_mask, EMPTY, pb)
+    return pb[::-1]
 
 
 def _major_piece_ix(piece):
@@ -726,53 +467,19 @@ def _major_piece_ix(piece):
 
 
 def _observe(state: GameState, flip: bool = False) -> Array:
-    state, flip_state = jax.lax.cond(
-        flip,
-        lambda: (state, _flip(state)),
-        lambda: (_flip(state), state),
-    )
+    state = jax.lax.cond(flip, lambda: state, lambda: _flip(state))
 
-    def pieces(state):
+    def pieces(offset):
         # piece positions
-        my_pieces = jnp.arange(OPP_PAWN)
-        my_piece_feat = jax.vmap(lambda p: state.board == p)(my_pieces)
-        return my_piece_feat
-
-    def effect_all(state):
-        def effect(from_, to):
-            piece = state.board[from_]
-            can_move = CAN_MOVE[piece, from_, to]
-            major_piece_ix = _major_piece_ix(piece)
-            between_ix = BETWEEN_IX[major_piece_ix, from_, to, :]
-            has_obstacles = jax.lax.select(
-                major_piece_ix >= 0,
-                ((between_ix >= 0) & (state.board[between_ix] != EMPTY)).any(),
-                FALSE,
-            )
-            return can_move & ~has_obstacles
-
-        effects = jax.vmap(jax.vmap(effect, (None, 0)), (0, None))(ALL_SQ, ALL_SQ)
-        mine = (PAWN <= state.board) & (state.board < OPP_PAWN)
-        return jnp.where(mine.reshape(81, 1), effects, FALSE)
-
-    def piece_and_effect(state):
-        my_pieces = jnp.arange(OPP_PAWN)
-        my_effect = effect_all(state)
-
-        @jax.vmap
-        def filter_effect(p):
-            mask = state.board == p
-            return jnp.where(mask.reshape(81, 1), my_effect, FALSE).any(axis=0)
-
-        my_effect_feat = filter_effect(my_pieces)
-        my_effect_sum = my_effect.sum(axis=0)
-
-        @jax.vmap
-        def effect_sum(n) -> Array:
-            return my_effect_sum >= n  # type: ignore
-
-        effect_sum_feat = effect_sum(jnp.arange(1, 4))
-        return my_effect_feat, effect_sum_feat
+        return jax.vmap(lambda p: state.board == p + offset)(jnp.arange(14))
+
+    def piece_and_effect(effects, offset):
+        # effects are shared with the legal action mask (see GameState.effects)
+        from_pieces = jnp.where(effects >= 0, state.board[effects] - offset, EMPTY)  # (10, 81)
+        effect_feat = jax.vmap(lambda p: (from_pieces == p).any(axis=0))(jnp.arange(14))
+        effect_sum = (effects >= 0).sum(axis=0)
+        effect_sum_feat = jax.vmap(lambda n: effect_sum >= n)(jnp.arange(1, 4))
+        return effect_feat, effect_sum_feat
 
     def num_hand(n, hand, p):
         return jnp.tile(hand[p] >= n, reps=(9, 9))
@@ -789,17 +496,14 @@ def _observe(state: GameState, flip: bool = False) -> Array:
         return [pawn_feat, lance_feat, knight_feat, silver_feat, gold_feat, bishop_feat, rook_feat]
         # fmt: on
 
-    my_piece_feat = pieces(state)
-    my_effect_feat, my_effect_sum_feat = piece_and_effect(state)
-    opp_piece_feat = pieces(flip_state)
-    opp_effect_feat, opp_effect_sum_feat = piece_and_effect(flip_state)
-    opp_piece_feat = opp_piece_feat[:, ::-1]
-    opp_effect_feat = opp_effect_feat[:, ::-1]
-    opp_effect_sum_feat = opp_effect_sum_feat[:, ::-1]
+    my_piece_feat = pieces(0)
+    my_effect_feat, my_effect_sum_feat = piece_and_effect(state.effects[0], 0)
+    opp_piece_feat = pieces(14)
+    opp_effect_feat, opp_effect_sum_feat = piece_and_effect(state.effects[1], 14)
     my_hand_feat = hand_feat(state.hand[0])
     opp_hand_feat = hand_feat(state.hand[1])
-    # NOTE: update cache
-    checked = jnp.tile(_is_checked(_set_cache(state)), reps=(1, 9, 9))
+    king_pos = jnp.argmin(jnp.abs(state.board - KING))
+    checked = jnp.tile((state.effects[1, :, king_pos] >= 0).any(), reps=(1, 9, 9))
     feat1 = [
         my_piece_feat.reshape(14, 9, 9),
         my_effect_feat.reshape(14, 9, 9),
@@ -0,0 +1,257 @@
+# Copyright 2023 The Pgx Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Precomputed tables of shogi.
+# Building them by pure-Python loops is slow at import time, so they are shipped as shogi_tables.npz
+# and loaded lazily by pgx._src.games.shogi.
+#
+# Regenerate:  python -m pgx._src.games.shogi_tables
+# Check:       python -m pgx._src.games.shogi_tables --check
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+TABLES_PATH = Path(__file__).parent / "shogi_tables.npz"
+
+PAWN, LANCE, KNIGHT, SILVER, BISHOP, ROOK, GOLD, KING = range(8)
+PRO_PAWN, PRO_LANCE, PRO_KNIGHT, PRO_SILVER, HORSE, DRAGON = range(8, 14)
+
+# (dx, dy) of directions of dlshogi action
+#  0 Up
+#  1 Up left
+#  2 Up right
+#  3 Left
+#  4 Right
+#  5 Down
+#  6 Down left
+#  7 Down right
+#  8 Up2 left
+#  9 Up2 right
+DIRECTIONS = [(0, +1), (-1, +1), (+1, +1), (-1, 0), (+1, 0), (0, -1), (-1, -1), (+1, -1), (-1, +2), (+1, +2)]
+
+
+# Can <piece,14> reach from <from,81> to <to,81> ignoring pieces on board?
+def can_move_to(piece, from_, to):
+    """Can <piece> move from <from_> to <to>?"""
+    if from_ == to:
+        return False
+    x0, y0 = from_ // 9, from_ % 9
+    x1, y1 = to // 9, to % 9
+    dx = x1 - x0
+    dy = y1 - y0
+    if piece == PAWN:
+        if dx == 0 and dy == -1:
+            return True
+        else:
+            return False
+    elif piece == LANCE:
+        if dx == 0 and dy < 0:
+            return True
+        else:
+            return False
+    elif piece == KNIGHT:
+        if dx in (-1, 1) and dy == -2:
+            return True
+        else:
+            return False
+    elif piece == SILVER:
+        if dx in (-1, 0, 1) and dy == -1:
+            return True
+        elif dx in (-1, 1) and dy == 1:
+            return True
+        else:
+            return False
+    elif piece == BISHOP:
+        if dx == dy or dx == -dy:
+            return True
+        else:
+            return False
+    elif piece == ROOK:
+        if dx == 0 or dy == 0:
+            return True
+        else:
+            return False
+    if piece in (GOLD, PRO_PAWN, PRO_LANCE, PRO_KNIGHT, PRO_SILVER):
+        if dx in (-1, 0, 1) and dy in (0, -1):
+            return True
+        elif dx == 0 and dy == 1:
+            return True
+        else:
+            return False
+    elif piece == KING:
+        if abs(dx) <= 1 and abs(dy) <= 1:
+            return True
+        else:
+            return False
+    elif piece == HORSE:
+        if abs(dx) <= 1 and abs(dy) <= 1:
+            return True
+        elif dx == dy or dx == -dy:
+            return True
+        else:
+            return False
+    elif piece == DRAGON:
+        if abs(dx) <= 1 and abs(dy) <= 1:
+            return True
+        if dx == 0 or dy == 0:
+            return True
+        else:
+            return False
+    else:
+        assert False
+
+
+def is_on_the_way(piece, from_, to, point):
+    if to == point:
+        return False
+    if piece not in (LANCE, BISHOP, ROOK, HORSE, DRAGON):
+        return False
+    if not can_move_to(piece, from_, to):
+        return False
+    if not can_move_to(piece, from_, point):
+        return False
+
+    x0, y0 = from_ // 9, from_ % 9
+    x1, y1 = to // 9, to % 9
+    x2, y2 = point // 9, point % 9
+    dx1, dy1 = x1 - x0, y1 - y0
+    dx2, dy2 = x2 - x0, y2 - y0
+
+    def sign(d):
+        if d == 0:
+            return 0
+        return d > 0
+
+    if (sign(dx1) != sign(dx2)) or (sign(dy1) != sign(dy2)):
+        return False
+
+    return abs(dx2) <= abs(dx1) and abs(dy2) <= abs(dy1)
+
+
+def _nonzero_ix(mask: np.ndarray, size: int) -> np.ndarray:
+    # first `size` indices of True along the last axis, filled by -1 (same as jnp.nonzero with size)
+    ix = -np.ones(mask.shape[:-1] + (size,), dtype=np.int32)
+    for i in np.ndindex(mask.shape[:-1]):
+        nz = np.nonzero(mask[i])[0][:size]
+        ix[i][: len(nz)] = nz
+    return ix
+
+
+def generate() -> Dict[str, np.ndarray]:
+    # (14, 81, 81)
+    CAN_MOVE = np.zeros((14, 81, 81), dtype=np.bool_)
+    for piece in range(14):
+        for from_ in range(81):
+            for to in range(81):
+                CAN_MOVE[piece, from_, to] = can_move_to(piece, from_, to)
+    assert CAN_MOVE.sum() == 8228
+
+    # When <lance/bishop/rook/horse/dragon,5> moves from <from,81> to <to,81>,
+    # is <point,81> on the way between two points?
+    BETWEEN = np.zeros((5, 81, 81, 81), dtype=np.bool_)
+    for i, piece in enumerate((LANCE, BISHOP, ROOK, HORSE, DRAGON)):
+        for from_ in range(81):
+            for to in range(81):
+                if not CAN_MOVE[piece, from_, to]:
+                    continue
+                for p in range(81):
+                    BETWEEN[i, from_, to, p] = is_on_the_way(piece, from_, to, p)
+    assert BETWEEN.sum() == 10564
+
+    # Give <dir,10> and <to,81>, return the legal <from> idx
+    # E.g. LEGAL_FROM_IDX[Up, to=19] = [20, 21, ..., -1] (filled by -1)
+    # Used for computing dlshogi action
+    LEGAL_FROM_IDX = -np.ones((10, 81, 8), dtype=np.int32)
+    for dir_, (dx, dy) in enumerate(DIRECTIONS):
+        for to in range(81):
+            x, y = to // 9, to % 9
+            for i in range(8):
+                x += dx
+                y += dy
+                if x < 0 or 8 < x or y < 0 or 8 < y:
+                    break
+                LEGAL_FROM_IDX[dir_, to, i] = x * 9 + y
+                if dir_ == 8 or dir_ == 9:
+                    break
+
+    # (81, 8) points around each point (clockwise from left), filled by -1
+    AROUND_IX = -np.ones((81, 8), dtype=np.int32)
+    for c in range(81):
+        x, y = c // 9, c % 9
+        for i, (dx, dy) in enumerate(zip([-1, -1, 0, +1, +1, +1, 0, -1], [0, -1, -1, -1, 0, +1, +1, +1])):
+            if 0 <= x + dx < 9 and 0 <= y + dy < 9:
+                AROUND_IX[c, i] = (x + dx) * 9 + (y + dy)
+
+    return {
+        "CAN_MOVE": CAN_MOVE,
+        "BETWEEN_IX": _nonzero_ix(BETWEEN, 8),  # (5, 81, 81, 8)
+        "LEGAL_FROM_IDX": LEGAL_FROM_IDX,  # (10, 81, 8)
+        "AROUND_IX": AROUND_IX,  # (81, 8)
+    }
+
+
+def board_effects(board) -> np.ndarray:
+    """Squares of (my, opponent's) pieces which can move to each square along each direction (-1 if none).
+
+    Pure-Python version of pgx._src.games.shogi._effects, which does not need the tables.
+    Opponent's directions are seen from the opponent and all squares are seen from the player to move.
+    """
+    board = [int(p) for p in board]
+    flipped = [-1 if p < 0 else (p + 14) % 28 for p in board[::-1]]
+    effects = -np.ones((2, 10, 81), dtype=np.int32)
+    for c, b in enumerate((board, flipped)):
+        for dir_, (dx, dy) in enumerate(DIRECTIONS):
+            for to in range(81):
+                x, y = to // 9, to % 9
+                for _ in range(8 if dir_ < 8 else 1):
+                    x, y = x + dx, y + dy
+                    if x < 0 or 8 < x or y < 0 or 8 < y:
+                        break
+                    from_ = x * 9 + y
+                    if b[from_] < 0:
+                        continue
+                    if b[from_] < 14 and can_move_to(b[from_], from_, to):
+                        effects[c, dir_, to if c == 0 else 80 - to] = from_ if c == 0 else 80 - from_
+                    break
+    return effects
+
+
+def check(path: Path = TABLES_PATH) -> bool:
+    # shipped tables should be the same as the generated ones
+    expected = generate()
+    with np.load(path) as f:
+        if set(f.files) != set(expected):
+            return False
+        return all(f[k].dtype == v.dtype and np.array_equal(f[k], v) for k, v in expected.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate precomputed tables of shogi")
+    parser.add_argument("--check", action="store_true", help="check the shipped tables instead of writing")
+    parser.add_argument("--path", type=Path, default=TABLES_PATH)
+    args = parser.parse_args()
+    if args.check:
+        ok = check(args.path)
+        print(f"{args.path}: {'OK' if ok else 'MISMATCH'}")
+        sys.exit(0 if ok else 1)
+    np.savez_compressed(args.path, **generate())
+    print(f"saved {args.path}")
+
+
+if __name__ == "__main__":
+    main()
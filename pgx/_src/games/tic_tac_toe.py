@@ -54,12 +54,15 @@ class Game:
         x = jax.lax.select(color == 0, jnp.int32([0, 1]), jnp.int32([1, 0]))
         return jnp.stack(plane(x), -1)
 
+    @jax.named_scope("legal_action_mask")
     def legal_action_mask(self, state: GameState) -> Array:
         return state.board < 0
 
+    @jax.named_scope("is_terminal")
     def is_terminal(self, state: GameState) -> Array:
         return (state.winner >= 0) | jnp.all(state.board != -1)
 
+    @jax.named_scope("rewards")
     def rewards(self, state: GameState) -> Array:
         return jax.lax.select(
             state.winner >= 0,
@@ -0,0 +1,175 @@
+# Copyright 2023 The Pgx Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Columnar on-disk format of batched pytrees (State, Trajectory, CompactState, ...):
+#
+#   <path>/meta.json     format version, env id/version, number of records, and dtype/shape of each column
+#   <path>/treedef.pkl   pytree structure to restore
+#   <path>/<i>_<name>.bin  raw C-order array of the i-th leaf, shape (num_records, *shape)
+#
+# Records are appended along the first axis. meta.json is updated after all columns are written,
+# so readers only see complete records.
+
+import json
+import os
+import pickle
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import jax
+import numpy as np
+
+from pgx.core import Env
+
+FORMAT_VERSION = 1
+_META = "meta.json"
+_TREEDEF = "treedef.pkl"
+
+
+class MemmapWriter:
+    """Append batched pytrees (e.g., `State`, `pgx.Trajectory`, or `pgx.CompactState`) to a columnar directory.
+    Each leaf is stored in its own file and can be read by `MemmapReader` without copying via `np.memmap`.
+
+    !!! example "Example usage"
+
+        ```py
+        writer = pgx.MemmapWriter("selfplay/", env)
+        for _ in range(num_iterations):
+            state, traj = pgx.rollout(env, policy_fn, 256, 1024, key, state=state)
+            writer.append(traj)  # appended along the first axis (num_steps)
+        ```
+
+    Args:
+        path: directory. Existing records are kept and new records are appended to them.
+        env: environment whose id and version are stored as metadata
+    """
+
+    def __init__(self, path: Union[str, os.PathLike], env: Optional[Env] = None):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._env_id = None if env is None else env.id
+        self._env_version = None if env is None else env.version
+        self._meta: Optional[Dict[str, Any]] = None
+        if (self.path / _META).exists():
+            self._meta = _load_meta(self.path)
+            assert env is None or (self._meta["env_id"], self._meta["env_version"]) == (env.id, env.version)
+
+    def __len__(self) -> int:
+        return 0 if self._meta is None else self._meta["length"]
+
+    def append(self, tree) -> None:
+        """Append records of the pytree along the first axis of all leaves."""
+        leaves_with_path, treedef = jax.tree_util.tree_flatten_with_path(tree)
+        leaves = [np.asarray(x) for _, x in leaves_with_path]
+        num_records = leaves[0].shape[0]
+        assert all(x.shape[0] == num_records for x in leaves), "all leaves must have the same first axis"
+        if self._meta is None:
+            self._meta = self._create(leaves_with_path, treedef)
+        columns = self._meta["columns"]
+        assert len(leaves) == len(columns), "pytree structure differs from the existing records"
+        for x, column in zip(leaves, columns):
+            assert (x.dtype.str, list(x.shape[1:])) == (column["dtype"], column["shape"]), f"mismatch: {column}"
+        for x, column in zip(leaves, columns):
+            with open(self.path / column["file"], "ab") as f:
+                # discard the bytes of records not committed to meta.json (e.g., interrupted append)
+                f.truncate(self._meta["length"] * x.itemsize * int(np.prod(x.shape[1:])))
+                f.write(np.ascontiguousarray(x).tobytes())
+        self._meta["length"] += num_records
+        _dump_meta(self.path, self._meta)
+
+    def _create(self, leaves_with_path, treedef) -> Dict[str, Any]:
+        with open(self.path / _TREEDEF, "wb") as f:
+            pickle.dump(treedef, f)
+        columns = []
+        for i, (path, x) in enumerate(leaves_with_path):
+            name = jax.tree_util.keystr(path)
+            x = np.asarray(x)
+            file = f"{i}_{re.sub(r'[^0-9A-Za-z_.]+', '_', name).strip('._')}.bin"
+            columns.append({"name": name, "file": file, "dtype": x.dtype.str, "shape": list(x.shape[1:])})
+        meta = {
+            "format_version": FORMAT_VERSION,
+            "env_id": self._env_id,
+            "env_version": self._env_version,
+            "length": 0,
+            "columns": columns,
+        }
+        _dump_meta(self.path, meta)
+        return meta
+
+
+class MemmapReader:
+    """Read records written by `MemmapWriter`.
+    Slicing returns the pytree of `np.memmap` views (zero-copy), and integer arrays read only the selected records.
+
+    !!! example "Example usage"
+
+        ```py
+        reader = pgx.MemmapReader("selfplay/")
+        traj = reader[100:200]  # views of the 100-th to 199-th records
+        batch = reader[np.random.randint(len(reader), size=256)]
+        ```
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        self.path = Path(path)
+        with open(self.path / _TREEDEF, "rb") as f:
+            self._treedef = pickle.load(f)
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Reload metadata to read the records appended after opening."""
+        self._meta = _load_meta(self.path)
+        self._columns: List[np.ndarray] = [
+            (
+                np.memmap(self.path / c["file"], dtype=c["dtype"], mode="r", shape=(self._meta["length"], *c["shape"]))
+                if self._meta["length"] > 0
+                else np.zeros((0, *c["shape"]), dtype=c["dtype"])
+            )
+            for c in self._meta["columns"]
+        ]
+
+    @property
+    def env_id(self) -> Optional[str]:
+        return self._meta["env_id"]
+
+    @property
+    def env_version(self) -> Optional[str]:
+        return self._meta["env_version"]
+
+    @property
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Memory-mapped array of each leaf, keyed by its path (e.g., `"._x.board"`)."""
+        return {c["name"]: x for c, x in zip(self._meta["columns"], self._columns)}
+
+    def __len__(self) -> int:
+        return self._meta["length"]
+
+    def __getitem__(self, ix):
+        return jax.tree_util.tree_unflatten(self._treedef, [x[ix] for x in self._columns])
+
+
+def _dump_meta(path: Path, meta: Dict[str, Any]) -> None:
+    # write and rename so that readers never see a partially written file
+    tmp = path / (_META + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, path / _META)
+
+
+def _load_meta(path: Path) -> Dict[str, Any]:
+    with open(path / _META) as f:
+        meta = json.load(f)
+    assert meta["format_version"] == FORMAT_VERSION, f"unsupported format version: {meta['format_version']}"
+    return meta
@@ -0,0 +1,66 @@
+# Copyright 2023 The Pgx Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Literal
+
+import jax.numpy as jnp
+
+from pgx._src.types import Array
+
+ObservationFormat = Literal["default", "bool", "uint8", "bfloat16", "packed"]
+
+
+def format_observation(obs: Array, observation_format: ObservationFormat) -> Array:
+    """Convert the observation of the default format into `observation_format`. See `Env`."""
+    if observation_format == "bool":
+        return obs != 0
+    elif observation_format == "uint8":
+        return (obs != 0).astype(jnp.uint8)
+    elif observation_format == "bfloat16":
+        return obs.astype(jnp.bfloat16)
+    elif observation_format == "packed":
+        return _pack_bits(obs != 0)
+    return obs
+
+
+def unpack_observation(obs: Array, size: int, dtype=jnp.float32) -> Array:
+    """Restore the observation of `observation_format="packed"` on device, e.g., right before the network.
+
+    !!! example "Example usage"
+
+        ```py
+        env = pgx.make("chess", observation_format="packed")
+        state = env.init(key)  # state.observation: (8, 8, 15) uint8
+        obs = pgx.unpack_observation(state.observation, 119)  # (8, 8, 119) float32
+        ```
+
+    Args:
+        obs: packed observation. Can be batched.
+        size: size of the last axis of the original observation (e.g., 119 in chess)
+        dtype: dtype of the returned observation
+
+    Returns:
+        Array: observation of 0/1 with shape `(..., size)`
+    """
+    assert obs.shape[-1] == (size + 7) // 8, f"size {size} does not match the packed shape {obs.shape}"
+    bits = (obs[..., None] >> jnp.arange(8, dtype=jnp.uint8)) & 1
+    return bits.reshape(obs.shape[:-1] + (-1,))[..., :size].astype(dtype)
+
+
+def _pack_bits(x: Array) -> Array:
+    # (..., n) bool -> (..., ceil(n / 8)) uint8, little-endian within each byte
+    n = x.shape[-1]
+    x = jnp.pad(x, [(0, 0)] * (x.ndim - 1) + [(0, -n % 8)])
+    x = x.reshape(x.shape[:-1] + (-1, 8)).astype(jnp.uint8)
+    return (x << jnp.arange(8, dtype=jnp.uint8)).sum(axis=-1, dtype=jnp.uint8)
@@ -0,0 +1,196 @@
+# Copyright 2023 The Pgx Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import re
+import sys
+import time
+from collections import Counter
+from typing import Any, Callable, Dict
+
+import jax
+
+from pgx._src.games import GameProtocol
+from pgx._src.rollout import rollout
+from pgx.core import Env, State
+from pgx.experimental.utils import act_randomly
+
+
+def _chess_phases(env: Env) -> Dict[str, Callable[[State], Any]]:
+    from pgx._src.games.chess import _legal_action_mask, _update_history, _zobrist_hash
+
+    return {
+        "legal_action_mask": lambda s: _legal_action_mask(s._x),  # type: ignore
+        "update_history": lambda s: _update_history(s._x),  # type: ignore
+        "hash": lambda s: _zobrist_hash(s._x),  # type: ignore
+    }
+
+
+def _shogi_phases(env: Env) -> Dict[str, Callable[[State], Any]]:
+    from pgx._src.games.shogi import _legal_action_mask, _set_cache
+
+    return {
+        "legal_action_mask": lambda s: _legal_action_mask(s._x),  # type: ignore
+        "effects": lambda s: _set_cache(s._x),  # type: ignore
+    }
+
+
+def _go_phases(env: Env) -> Dict[str, Callable[[State], Any]]:
+    from pgx._src.games import go, go_bitboard
+
+    if isinstance(env._game, go_bitboard.Game):  # type: ignore
+        return {"superko": lambda s: go_bitboard._is_psk(s._x)}  # type: ignore
+    return {
+        "hash": lambda s: go._compute_hash(s._x),  # type: ignore
+        "superko": lambda s: go._is_psk(s._x),  # type: ignore
+    }
+
+
+def _gardner_chess_phases(env: Env) -> Dict[str, Callable[[State], Any]]:
+    from pgx.gardner_chess import _legal_action_mask, _update_history, _zobrist_hash
+
+    return {"legal_action_mask": _legal_action_mask, "update_history": _update_history, "hash": _zobrist_hash}
+
+
+def _animal_shogi_phases(env: Env) -> Dict[str, Callable[[State], Any]]:
+    from pgx.animal_shogi import _legal_action_mask
+
+    return {"legal_action_mask": _legal_action_mask}
+
+
+def _hex_phases(env: Env) -> Dict[str, Callable[[State], Any]]:
+    from pgx.hex import _is_game_end
+
+    size = env.size  # type: ignore
+    # whether the player who made the last move has connected their sides
+    return {"is_terminal": lambda s: _is_game_end(-s._board, size, 1 - s._turn)}  # type: ignore
+
+
+def _kuhn_poker_phases(env: Env) -> Dict[str, Callable[[State], Any]]:
+    from pgx.kuhn_poker import _get_unit_reward
+
+    return {"rewards": _get_unit_reward}
+
+
+def _leduc_holdem_phases(env: Env) -> Dict[str, Callable[[State], Any]]:
+    from pgx.leduc_holdem import _get_unit_reward
+
+    return {"rewards": _get_unit_reward}
+
+
+def _sparrow_mahjong_phases(env: Env) -> Dict[str, Callable[[State], Any]]:
+    from pgx.sparrow_mahjong import _check_ron, _hands_to_score
+
+    return {"rewards": _hands_to_score, "is_terminal": lambda s: _check_ron(s, _hands_to_score(s))}
+
+
+# internal phases of each env, which take the env state
+_PHASES: Dict[str, Callable[[Env], Dict[str, Callable[[State], Any]]]] = {
+    "chess": _chess_phases,
+    "shogi": _shogi_phases,
+    "go_9x9": _go_phases,
+    "go_19x19": _go_phases,
+    "gardner_chess": _gardner_chess_phases,
+    "animal_shogi": _animal_shogi_phases,
+    "hex": _hex_phases,
+    "kuhn_poker": _kuhn_poker_phases,
+    "leduc_holdem": _leduc_holdem_phases,
+    "sparrow_mahjong": _sparrow_mahjong_phases,
+}
+
+# instruction of optimized HLO text, e.g., "%add.8 = f32[] add(f32[] %Arg_0.6, f32[] %Arg_1.7), ..."
+_HLO_INSTRUCTION = re.compile(r"^\s*(?:ROOT\s+)?%?[\w.\-]+\s*=\s*.*?\s([a-z][a-z0-9\-]*)\(")
+
+
+def profile(env: Env, batch_size: int = 1, num_steps: int = 10, num_iters: int = 10, verbose: bool = True):
+    """Jit each phase of the environment separately and report its cost, to find which phase to optimize.
+
+    Phases are `init`, `step`, and `observe` of the env, `legal_action_mask`, `is_terminal`, and `rewards` of
+    the underlying game, and game-specific internals (e.g., `update_history` and `hash` of chess).
+    They are measured on `batch_size` states after `num_steps` random steps.
+    The same phases are annotated by `jax.named_scope`, so they are also visible in `jax.profiler` traces.
+
+    !!! example "Example usage"
+
+        ```py
+        results = pgx.profile(pgx.make("chess"), batch_size=1024)
+        results["legal_action_mask"]["time"]  # seconds per call
+        ```
+
+    Returns:
+        Dict[str, Dict[str, Any]]: for each phase,
+            `time` (seconds per call of the batched function),
+            `flops` and `bytes_accessed` (from XLA `cost_analysis()`),
+            `num_ops` (number of optimized HLO instructions), and `ops` (their counts by opcode)
+    """
+    key = jax.random.PRNGKey(0)
+    policy_fn = _random_policy
+    state, _ = rollout(env, policy_fn, num_steps, batch_size, key, fields=())
+    keys = jax.random.split(jax.random.PRNGKey(1), batch_size)
+    action = policy_fn(jax.random.PRNGKey(2), state)
+
+    phases: Dict[str, Any] = {
+        "init": (jax.vmap(env.init), (keys,)),
+        "step": (jax.vmap(env.step), (state, action, keys)),
+        "observe": (jax.vmap(env.observe), (state, state.current_player)),
+    }
+    game = getattr(env, "_game", getattr(env, "game", None))
+    if isinstance(game, GameProtocol):
+        for name in ("legal_action_mask", "is_terminal", "rewards"):
+            phases[name] = (jax.vmap(lambda s, f=getattr(game, name): f(s._x)), (state,))
+    for name, fn in _PHASES.get(env.id, lambda env: {})(env).items():
+        phases[name] = (jax.vmap(fn), (state,))
+
+    results = {}
+    for name, (fn, args) in phases.items():
+        results[name] = _profile_phase(fn, args, num_iters)
+
+    if verbose:
+        print(f"{'phase':<20} {'time(ms)':>10} {'flops':>12} {'bytes':>12} {'#ops':>8}", file=sys.stderr)
+        for name, r in results.items():
+            print(
+                f"{name:<20} {r['time'] * 1e3:>10.3f} {r['flops']:>12.0f} {r['bytes_accessed']:>12.0f} "
+                f"{r['num_ops']:>8}",
+                file=sys.stderr,
+            )
+    return results
+
+
+def _random_policy(key, state):
+    return act_randomly(key, state.legal_action_mask)
+
+
+def _profile_phase(fn, args, num_iters: int) -> Dict[str, Any]:
+    compiled = jax.jit(fn).lower(*args).compile()
+    cost = compiled.cost_analysis()
+    if isinstance(cost, list):  # one dict for each computation in older versions of jax
+        cost = cost[0] if cost else {}
+    cost = cost or {}
+    ops: Counter = Counter()
+    for line in compiled.as_text().splitlines():
+        m = _HLO_INSTRUCTION.match(line)
+        if m is not None:
+            ops[m.group(1)] += 1
+
+    jax.block_until_ready(compiled(*args))  # warm up
+    start = time.perf_counter()
+    for _ in range(num_iters):
+        out = compiled(*args)
+    jax.block_until_ready(out)
+    return {
+        "time": (time.perf_counter() - start) / num_iters,
+        "flops": float(cost.get("flops", 0.0)),
+        "bytes_accessed": float(cost.get("bytes accessed", 0.0)),
+        "num_ops": sum(ops.values()),
+        "ops": dict(ops.most_common()),
+    }
@@ -0,0 +1,138 @@
+# Copyright 2023 The Pgx Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from functools import partial
+from typing import Callable, NamedTuple, Optional, Tuple
+
+import jax
+import jax.numpy as jnp
+
+from pgx._src.types import Array, PRNGKey
+from pgx.core import Env, EnvParams, State
+from pgx.experimental.wrappers import auto_reset
+
+
+class Trajectory(NamedTuple):
+    """Buffers of `rollout` with shape `(num_steps, batch_size, ...)`. Fields not stored are `None`.
+
+    Attributes:
+        observation (Array): observation of `current_player` before taking the action
+        legal_action_mask (Array): legal action mask before taking the action
+        action (Array): action taken
+        rewards (Array): rewards after taking the action
+        current_player (Array): player who took the action
+        terminated (Array): terminated after taking the action (the state is reset to the initial state then)
+        truncated (Array): truncated after taking the action
+    """
+
+    observation: Optional[Array] = None
+    legal_action_mask: Optional[Array] = None
+    action: Optional[Array] = None
+    rewards: Optional[Array] = None
+    current_player: Optional[Array] = None
+    terminated: Optional[Array] = None
+    truncated: Optional[Array] = None
+
+
+@partial(
+    jax.jit,
+    static_argnames=("env", "policy_fn", "num_steps", "batch_size", "fields"),
+    donate_argnames=("buffers",),
+)
+def rollout(
+    env: Env,
+    policy_fn: Callable[[PRNGKey, State], Array],
+    num_steps: int,
+    batch_size: int,
+    key: PRNGKey,
+    state: Optional[State] = None,
+    fields: Tuple[str, ...] = Trajectory._fields,
+    buffers: Optional[Trajectory] = None,
+    params: Optional[EnvParams] = None,
+) -> Tuple[State, Trajectory]:
+    """Run `num_steps` steps of `batch_size` environments with auto-reset in a single jitted loop on device.
+
+    Each step writes the specified fields into preallocated buffers of shape `(num_steps, batch_size, ...)`.
+    `env`, `policy_fn`, `num_steps`, `batch_size`, and `fields` are static, so pass the same `policy_fn` object
+    to avoid recompilation (e.g., take network parameters from `state` or close over them in an outer `jax.jit`).
+
+    !!! example "Example usage"
+
+        ```py
+        env = pgx.make("go_9x9")
+        policy_fn = lambda key, state: pgx.experimental.act_randomly(key, state.legal_action_mask)
+        state, traj = pgx.rollout(env, policy_fn, num_steps=128, batch_size=1024, key=jax.random.PRNGKey(0))
+        # continue from the last state, reusing (donating) the buffers of the previous trajectory
+        state, traj = pgx.rollout(env, policy_fn, 128, 1024, jax.random.PRNGKey(1), state=state, buffers=traj)
+        ```
+
+    Args:
+        env: environment
+        policy_fn: function which receives a PRNG key and the batched state and returns actions of shape `(batch_size,)`
+        num_steps: number of steps
+        batch_size: number of parallel environments
+        key: pseudo-random generator key
+        state: batched state to start from. Default (None) starts from the initial states.
+        fields: fields of `Trajectory` to store
+        buffers: trajectory to be overwritten (donated). Default (None) allocates new buffers.
+        params: runtime parameters shared by all environments (see `pgx.EnvParams`).
+            They are traced, so changing them does not recompile. Default (None) is `env.default_params`.
+
+    Returns:
+        Tuple[State, Trajectory]: the last state and the trajectory
+    """
+    assert set(fields) <= set(Trajectory._fields), f"unknown fields: {set(fields) - set(Trajectory._fields)}"
+    init_fn = jax.vmap(env.init)
+    step_fn = jax.vmap(auto_reset(lambda s, a, k: env.step(s, a, k, params), env.init))
+    if state is None:
+        key, subkey = jax.random.split(key)
+        state = init_fn(jax.random.split(subkey, batch_size))
+
+    if buffers is None:
+        spec = env.spec
+        action_spec = jax.eval_shape(policy_fn, key, state)
+        shapes = {
+            "observation": (spec.observation_shape, spec.observation_dtype),
+            "legal_action_mask": (spec.state.legal_action_mask.shape, spec.state.legal_action_mask.dtype),
+            "action": (action_spec.shape[1:], action_spec.dtype),
+            "rewards": (spec.state.rewards.shape, spec.state.rewards.dtype),
+            "current_player": (spec.state.current_player.shape, spec.state.current_player.dtype),
+            "terminated": ((), jnp.bool_),
+            "truncated": ((), jnp.bool_),
+        }
+        buffers = Trajectory(
+            **{name: jnp.zeros((num_steps, batch_size) + shapes[name][0], shapes[name][1]) for name in fields}
+        )
+
+    def body(i, x):
+        state, key, buffers = x
+        key, key1, key2 = jax.random.split(key, 3)
+        action = policy_fn(key1, state)
+        observation = state.observation
+        if "observation" in fields and env.lazy_observation:
+            observation = jax.vmap(env.observe)(state, state.current_player)
+        before = {
+            "observation": observation,
+            "legal_action_mask": state.legal_action_mask,
+            "action": action,
+            "current_player": state.current_player,
+        }
+        state = step_fn(state, action, jax.random.split(key2, batch_size))
+        after = {"rewards": state.rewards, "terminated": state.terminated, "truncated": state.truncated}
+        values = {**before, **after}
+        buffers = buffers._replace(**{name: getattr(buffers, name).at[i].set(values[name]) for name in fields})
+        return state, key, buffers
+
+    state, _, buffers = jax.lax.fori_loop(0, num_steps, body, (state, key, buffers))
+    return state, buffers
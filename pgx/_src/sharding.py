@@ -0,0 +1,116 @@
+# Copyright 2023 The Pgx Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Callable, Dict, Optional, Tuple
+
+import jax
+import numpy as np
+from jax.sharding import Mesh, NamedSharding, PartitionSpec
+
+from pgx._src.rollout import Trajectory, rollout
+from pgx._src.types import Array, PRNGKey
+from pgx.core import Env, EnvParams, State
+
+
+class ShardedEnv:
+    """Batched environment whose states are sharded along the batch axis over the devices of a mesh.
+    This replaces `jax.pmap` with manual reshapes: all arrays keep the global batch shape `(batch_size, ...)`
+    and `init`, `step`, `observe`, and `rollout` run under `jax.jit` with explicit shardings.
+
+    Multiple CPU devices are available by `XLA_FLAGS=--xla_force_host_platform_device_count=<N>`.
+
+    !!! example "Example usage"
+
+        ```py
+        env = pgx.ShardedEnv(pgx.make("go_9x9"))  # uses all devices by default
+        keys = jax.random.split(jax.random.PRNGKey(0), 1024)  # batch size must be divisible by #devices
+        state = env.init(keys)
+        state = env.step(state, action, keys)
+        ```
+
+    Args:
+        env: environment
+        mesh: device mesh. Default (None) is a 1D mesh of all devices.
+        axis_name: mesh axis to shard the batch. Default (None) is the first axis of the mesh.
+    """
+
+    def __init__(self, env: Env, mesh: Optional[Mesh] = None, axis_name: Optional[str] = None):
+        if mesh is None:
+            mesh = Mesh(np.array(jax.devices()), ("batch",))
+        if axis_name is None:
+            axis_name = mesh.axis_names[0]
+        self.env = env
+        self.mesh = mesh
+        self.axis_name = axis_name
+        self.sharding = NamedSharding(mesh, PartitionSpec(axis_name))  # (batch_size, ...)
+        self.trajectory_sharding = NamedSharding(mesh, PartitionSpec(None, axis_name))  # (num_steps, batch_size, ...)
+        s = self.sharding
+        self._init = jax.jit(jax.vmap(env.init), in_shardings=s, out_shardings=s)
+        self._step = jax.jit(jax.vmap(env.step), in_shardings=(s, s, s, s), out_shardings=s)
+        self._observe = jax.jit(jax.vmap(env.observe), in_shardings=(s, s), out_shardings=s)
+        self._rollout: Dict[tuple, Callable] = {}  # jitted rollout for each static arguments
+
+    @property
+    def num_shards(self) -> int:
+        return self.mesh.shape[self.axis_name]
+
+    def shard(self, x):
+        """Put a batched pytree (e.g., state or actions) on the devices sharded along the batch axis."""
+        return jax.device_put(x, self.sharding)
+
+    def init(self, keys: Array) -> State:
+        self._check_batch_size(keys.shape[0])
+        return self._init(keys)
+
+    def step(self, state: State, action: Array, keys: Array, params: Optional[EnvParams] = None) -> State:
+        """`params` (see `pgx.EnvParams`) are batched along the batch axis like `state`, or None."""
+        return self._step(state, action, keys, params)
+
+    def observe(self, state: State, player_id: Array) -> Array:
+        return self._observe(state, player_id)
+
+    def rollout(
+        self,
+        policy_fn: Callable[[PRNGKey, State], Array],
+        num_steps: int,
+        batch_size: int,
+        key: PRNGKey,
+        state: Optional[State] = None,
+        fields: Tuple[str, ...] = Trajectory._fields,
+        buffers: Optional[Trajectory] = None,
+        params: Optional[EnvParams] = None,
+    ) -> Tuple[State, Trajectory]:
+        """Sharded version of `pgx.rollout`. Trajectory buffers are sharded along the batch axis (the second axis).
+        `buffers` are donated and `params` are shared by all environments as in `pgx.rollout`."""
+        if state is None:
+            key, subkey = jax.random.split(key)
+            state = self.init(jax.random.split(subkey, batch_size))
+        self._check_batch_size(batch_size)
+        static_args = (policy_fn, num_steps, batch_size, fields)
+        if static_args not in self._rollout:
+
+            def rollout_fn(key, state, buffers, params):
+                env = self.env
+                return rollout(env, policy_fn, num_steps, batch_size, key, state, fields, buffers, params)
+
+            self._rollout[static_args] = jax.jit(
+                rollout_fn,
+                in_shardings=(None, self.sharding, self.trajectory_sharding, None),
+                out_shardings=(self.sharding, self.trajectory_sharding),
+                donate_argnums=(2,),
+            )
+        return self._rollout[static_args](key, state, buffers, params)
+
+    def _check_batch_size(self, batch_size: int) -> None:
+        assert batch_size % self.num_shards == 0, f"batch size {batch_size} is not divisible by {self.num_shards}"
@@ -0,0 +1,109 @@
+# Copyright 2023 The Pgx Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import time
+from typing import Any, Dict, Optional, Sequence, Union
+
+import jax
+import jax.numpy as jnp
+
+from pgx.core import Env
+
+
+def warmup(
+    env: Env,
+    batch_sizes: Sequence[int] = (1,),
+    cache_dir: Optional[Union[str, os.PathLike]] = None,
+    verbose: bool = False,
+) -> Dict[str, Dict[Any, Any]]:
+    """Compile `jax.jit(jax.vmap(f))` of `env.init`, `env.step`, and `env.observe` for each batch size ahead of time,
+    and return the compiled executables with their compile times.
+    Call the executables directly to use them without compiling again in this process.
+
+    If `cache_dir` is given, JAX persistent compilation cache is also enabled there and the executables are stored.
+    Processes restarted with the same `cache_dir` load them from disk instead of compiling again.
+    Note that only the calls with the same signature hit the cache:
+
+        init = jax.jit(jax.vmap(env.init))  # init(keys)
+        step = jax.jit(jax.vmap(env.step))  # step(state, action, keys)
+        observe = jax.jit(jax.vmap(env.observe))  # observe(state, player_id)
+
+    !!! example "Example usage"
+
+        ```py
+        env = pgx.make("go_19x19")
+        compiled = pgx.warmup(env, batch_sizes=[1024], cache_dir="/tmp/pgx_cache")
+        state = compiled["init"][1024](keys)
+        state = compiled["step"][1024](state, action, keys)
+        compiled["compile_time"]["step"][1024]  # seconds
+        ```
+
+    !!! warning "Global JAX configuration"
+
+        If `cache_dir` is given, the JAX configuration of the process is changed and NOT restored, so that
+        the other compilations in the process also use the cache: `jax_compilation_cache_dir` is set to `cache_dir`,
+        `jax_persistent_cache_min_compile_time_secs` is set to `0`, and the compilation cache is reset.
+
+    Args:
+        env: environment
+        batch_sizes: batch sizes to compile
+        cache_dir: directory of persistent compilation cache. Default (None) does not change JAX configuration,
+            so the compiled executables are only available through the returned values.
+        verbose: also print the compile time of each function
+
+    Returns:
+        Dict[str, Dict]: `compiled[name][batch_size]` is the compiled executable of `name`
+            (`"init"`, `"step"`, or `"observe"`), and `compiled["compile_time"][name][batch_size]` is
+            its compile time in seconds (including lowering)
+    """
+    if cache_dir is not None:
+        _set_cache_dir(cache_dir)
+
+    compiled: Dict[str, Dict[Any, Any]] = {"init": {}, "step": {}, "observe": {}}
+    compile_time: Dict[str, Dict[int, float]] = {name: {} for name in compiled}
+    for batch_size in batch_sizes:
+
+        def batched(x, batch_size=batch_size):
+            return jax.ShapeDtypeStruct((batch_size,) + x.shape, x.dtype)
+
+        keys = batched(jax.ShapeDtypeStruct((2,), jnp.uint32))
+        state = jax.tree_util.tree_map(batched, env.spec.state)
+        action = batched(jax.ShapeDtypeStruct((), jnp.int32))
+        args = {
+            "init": (env.init, (keys,)),
+            "step": (env.step, (state, action, keys)),
+            "observe": (env.observe, (state, state.current_player)),
+        }
+        for name, (fn, fn_args) in args.items():
+            start = time.perf_counter()
+            compiled[name][batch_size] = jax.jit(jax.vmap(fn)).lower(*fn_args).compile()
+            elapsed = compile_time[name][batch_size] = time.perf_counter() - start
+            if verbose:
+                print(f"{env.id} {name} (batch_size={batch_size}): {elapsed:.3f} sec", file=sys.stderr)
+
+    compiled["compile_time"] = compile_time
+    return compiled
+
+
+def _set_cache_dir(cache_dir: Union[str, os.PathLike]) -> None:
+    # imported here so that `import pgx` does not depend on this experimental module
+    from jax.experimental.compilation_cache import compilation_cache
+
+    jax.config.update("jax_compilation_cache_dir", os.fspath(cache_dir))
+    # environment functions are worth caching even if they compile fast
+    jax.config.update("jax_persistent_cache_min_compile_time_secs", 0)
+    # the cache is initialized only once in a process, so reset it in case something is already compiled
+    compilation_cache.reset_cache()
@@ -286,6 +286,7 @@ def _step_drop(state: State, action: Action) -> State:
     return state.replace(_board=board, _hand=hand, _zobrist_hash=zobrist_hash)  # type: ignore
 
 
+@jax.named_scope("legal_action_mask")
 def _legal_action_mask(state: State):
     def is_legal(label: Array):
         action = Action._from_label(label)
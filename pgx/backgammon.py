@@ -53,7 +53,13 @@ class Backgammon(core.Env):
     def __init__(self):
         super().__init__()
 
-    def step(self, state: core.State, action: Array, key: Optional[Array] = None) -> core.State:
+    def step(
+        self,
+        state: core.State,
+        action: Array,
+        key: Optional[Array] = None,
+        params: Optional[core.EnvParams] = None,
+    ) -> core.State:
         assert key is not None, (
             "v2.0.0 changes the signature of step. Please specify PRNGKey at the third argument:\n\n"
             "  * <  v2.0.0: step(state, action)\n"
@@ -61,7 +67,7 @@ class Backgammon(core.Env):
             "See v2.0.0 release note for more details:\n\n"
             "  https://github.com/sotetsuk/pgx/releases/tag/v2.0.0"
         )
-        return super().step(state, action, key)
+        return super().step(state, action, key, params)
 
     def _init(self, key: PRNGKey) -> State:
         return _init(key)
@@ -490,6 +496,7 @@ def _remains_at_inner(board: Array) -> bool:
     return jnp.take(board, _home_board()).sum() != 0  # type: ignore
 
 
+@jax.named_scope("legal_action_mask")
 def _legal_action_mask(board: Array, dice: Array) -> Array:
     no_op_mask = jnp.zeros(26 * 6, dtype=jnp.bool_).at[0:6].set(TRUE)
     legal_action_mask = jax.vmap(partial(_legal_action_mask_for_single_die, board=board))(die=dice).any(
@@ -172,6 +172,10 @@ class BridgeBidding(core.Env):
         assert isinstance(state, State)
         return _observe(state, player_id)
 
+    def _observe_all(self, state: core.State) -> Array:
+        assert isinstance(state, State)
+        return _observe_all(state)
+
     @property
     def id(self) -> core.EnvId:
         return "bridge_bidding"
@@ -292,15 +296,7 @@ def _step(
 def _observe(state: State, player_id: Array) -> Array:
     """Returns the observation of a given player"""
     # make vul of observation
-    is_player_vul, is_non_player_vul = jax.lax.cond(
-        (_player_position(state.current_player, state) == 0) | (_player_position(state.current_player, state) == 2),
-        lambda: (state._vul_NS, state._vul_EW),
-        lambda: (state._vul_EW, state._vul_NS),
-    )
-    vul = jnp.array(
-        [~is_player_vul, is_player_vul, ~is_non_player_vul, is_non_player_vul],
-        dtype=jnp.bool_,
-    )
+    vul = _observe_vul(state)
 
     # make hand of observation
     hand = jnp.zeros(52, dtype=jnp.bool_)
@@ -324,6 +320,45 @@ def _observe(state: State, player_id: Array) -> Array:
     return jnp.concatenate((vul, obs_history, hand))
 
 
+def _observe_all(state: State) -> Array:
+    """Returns the observations of all players. The bidding history is made only once and rotated for each player"""
+    vul = _observe_vul(state)
+
+    # bidding history from the view of the player at position 0 (N)
+    # indices of the history are (4 + bid * 12 + kind * 4 + relative_bidder), so relative bidders are the last axis
+    obs_history = jnp.zeros(424, dtype=jnp.bool_)
+    _, _, _, obs_history = jax.lax.fori_loop(
+        0,
+        state._turn.astype(jnp.int32),
+        _make_obs_history,
+        (state, state._shuffled_players[0], 0, obs_history),
+    )
+
+    # hands of each position
+    cards = _convert_card_pgx_to_openspiel(state._hand.reshape(4, 13))
+    hands = jnp.zeros((4, 52), dtype=jnp.bool_).at[jnp.arange(4)[:, None], cards].set(True)
+
+    def make(position):
+        history = jnp.roll(obs_history.reshape(-1, 4), -position, axis=1).flatten()
+        return jnp.concatenate((vul, history, hands[position]))
+
+    positions = jnp.argmax(state._shuffled_players == jnp.arange(4)[:, None], axis=1)
+    return jax.vmap(make)(positions)
+
+
+def _observe_vul(state: State) -> Array:
+    # vulnerability from the view of the current player (shared by all players)
+    is_player_vul, is_non_player_vul = jax.lax.cond(
+        (_player_position(state.current_player, state) == 0) | (_player_position(state.current_player, state) == 2),
+        lambda: (state._vul_NS, state._vul_EW),
+        lambda: (state._vul_EW, state._vul_NS),
+    )
+    return jnp.array(
+        [~is_player_vul, is_player_vul, ~is_non_player_vul, is_non_player_vul],
+        dtype=jnp.bool_,
+    )
+
+
 def _make_obs_history(turn, vuls):
     state, player_id, last_bid, obs_history = vuls
     action = state._bidding_history[turn]
@@ -398,6 +433,7 @@ def _continue_step(
     # fmt: on
 
 
+@jax.named_scope("is_terminal")
 def _is_terminated(state: State) -> bool:
     """Check if the game is finished
     Four consecutive passes if not bid (pass out), otherwise three consecutive passes
@@ -409,6 +445,7 @@ def _is_terminated(state: State) -> bool:
     )
 
 
+@jax.named_scope("rewards")
 def _reward(
     state: State,
 ) -> Array:
@@ -680,6 +717,7 @@ def _position_to_team(position: Array) -> Array:
     return position % 2
 
 
+@jax.named_scope("legal_action_mask")
 def _update_legal_action_X_XX(
     state: State,
 ) -> Tuple[bool, bool]:
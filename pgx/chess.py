@@ -93,6 +93,13 @@ class Chess(core.Env):
         x = jax.lax.cond(state.current_player == player_id, lambda: state._x, lambda: _flip(state._x))
         return self.game.observe(x, color)
 
+    def _observe_all(self, state: core.State) -> Array:
+        assert isinstance(state, State)
+        # flip only once for the opponent, instead of flipping under vmap for every player
+        x = state._x
+        obs = jnp.stack([self.game.observe(x, x.color), self.game.observe(_flip(x), 1 - x.color)])
+        return obs[(jnp.arange(2) != state.current_player).astype(jnp.int32)]
+
     @property
     def id(self) -> core.EnvId:
         return "chess"
@@ -105,6 +112,10 @@ class Chess(core.Env):
     def num_players(self) -> int:
         return 2
 
+    @property
+    def max_legal_actions(self) -> int:
+        return 218  # known maximum number of legal moves in chess
+
 
 def _from_fen(fen: str):
     from pgx.experimental.chess import from_fen
@@ -13,11 +13,13 @@
 # limitations under the License.
 
 import abc
-from typing import Literal, Optional, Tuple, get_args
+from functools import cached_property
+from typing import Any, Literal, NamedTuple, Optional, Tuple, get_args
 
 import jax
 import jax.numpy as jnp
 
+from pgx._src.observation import ObservationFormat, format_observation
 from pgx._src.struct import dataclass
 from pgx._src.types import Array, PRNGKey
 
@@ -156,6 +158,42 @@ class State(abc.ABC):
         save_svg(self, filename, color_theme=color_theme, scale=scale)
 
 
+class EnvSpec(NamedTuple):
+    """Static specification of an environment. See `Env.spec`.
+
+    Attributes:
+        num_actions (int): size of action space
+        observation_shape (Tuple[int, ...]): shape of observation
+        observation_dtype (Any): dtype of observation
+        state (State): state pytree whose leaves are `jax.ShapeDtypeStruct`
+    """
+
+    num_actions: int
+    observation_shape: Tuple[int, ...]
+    observation_dtype: Any
+    state: State
+
+
+@dataclass
+class EnvParams:
+    """Base class of runtime parameters passed to `Env.step` as traced values (like gymnax and brax).
+    Unlike constructor arguments, they do not change shapes, so changing them does not recompile,
+    and they can be batched by `jax.vmap` to differ among environments.
+    Most environments have no runtime parameters. See `Env.default_params`.
+
+    !!! example "Example usage"
+
+        ```py
+        env = pgx.make("go_9x9")
+        params = env.default_params.replace(komi=jnp.float32(6.5))  # pgx.go.GoParams
+        state = env.step(state, action, key, params)
+        # a different komi for each environment in the batch
+        params = jax.vmap(lambda k: params.replace(komi=k))(jnp.float32([5.5, 6.5, 7.5]))
+        state = jax.vmap(env.step)(state, action, keys, params)
+        ```
+    """
+
+
 class Env(abc.ABC):
     """Environment class API.
 
@@ -168,10 +206,58 @@ class Env(abc.ABC):
         state = env.step(state, action)
         ```
 
+    !!! note "Lazy observation"
+
+        By default, `init` and `step` compute `state.observation` for `state.current_player`.
+        If `lazy_observation=True` is given to `pgx.make`, they skip it and `state.observation` is
+        a placeholder of zeros. Call `observe` explicitly when needed.
+        This saves the cost of observation in search and rollout loops where most observations are not used.
+
+        ```py
+        env = pgx.make("chess", lazy_observation=True)
+        state = env.step(state, action)
+        obs = env.observe(state, state.current_player)
+        ```
+
+    !!! note "Observation format"
+
+        `observation_format` given to `pgx.make` changes the dtype (and shape) of observations
+        to save memory and transfer:
+
+        - `"default"`: as defined by each environment (e.g., `float32` in chess and `bool` in Go)
+        - `"bool"`, `"uint8"`: `obs != 0`
+        - `"packed"`: `obs != 0` bit-packed into `uint8` along the last axis
+            (e.g., `(8, 8, 119)` -> `(8, 8, 15)` in chess). Restore it on device by `pgx.unpack_observation`.
+        - `"bfloat16"`: `obs.astype(jnp.bfloat16)`
+
+        Binary features are kept exactly in all formats. Few non-binary features (e.g., move counters of chess and
+        piece counts of backgammon) are kept only by `"default"` and `"bfloat16"`.
+
+        ```py
+        env = pgx.make("chess", observation_format="packed")
+        state = env.init(key)  # state.observation: (8, 8, 15) uint8
+        obs = pgx.unpack_observation(state.observation, 119)  # (8, 8, 119) float32
+        ```
+
     """
 
+    # fixed per instance by `make`, since jitted functions close over the env
+    _lazy_observation: bool = False
+    _observation_format: ObservationFormat = "default"
+
     def __init__(self): ...
 
+    @property
+    def lazy_observation(self) -> bool:
+        """Whether `init` and `step` skip computing `state.observation`. Set by `pgx.make`."""
+        return self._lazy_observation
+
+    @property
+    def observation_format(self) -> ObservationFormat:
+        """Format of observations. Set by `pgx.make`."""
+        return self._observation_format
+
+    @jax.named_scope("init")
     def init(self, key: PRNGKey) -> State:
         """Return the initial state. Note that no internal state of
         environment changes.
@@ -184,16 +270,25 @@ class Env(abc.ABC):
 
         """
         state = self._init(key)
+        if self.lazy_observation:
+            # placeholder of this env's observation shape and format (the State default may be of another size)
+            observation = jnp.zeros(self.observation_shape, dtype=self.spec.observation_dtype)
+            return state.replace(observation=observation)  # type: ignore
         observation = self.observe(state, state.current_player)
         return state.replace(observation=observation)  # type: ignore
 
+    @jax.named_scope("step")
     def step(
         self,
         state: State,
         action: Array,
         key: Optional[Array] = None,
+        params: Optional[EnvParams] = None,
     ) -> State:
-        """Step function."""
+        """Step function. `params` (see `EnvParams`) defaults to `default_params`."""
+        if params is None:
+            params = self.default_params
+        assert isinstance(params, type(self.default_params)), f"{self.id} expects {type(self.default_params)}"
         is_illegal = ~state.legal_action_mask[action]
         current_player = state.current_player
 
@@ -202,7 +297,9 @@ class Env(abc.ABC):
         state = jax.lax.cond(
             (state.terminated | state.truncated),
             lambda: state.replace(rewards=jnp.zeros_like(state.rewards)),  # type: ignore
-            lambda: self._step(state.replace(_step_count=state._step_count + 1), action, key),  # type: ignore
+            lambda: self._step_with_params(
+                state.replace(_step_count=state._step_count + 1), action, key, params  # type: ignore
+            ),
         )
 
         # Taking illegal action leads to immediate game terminal with negative reward
@@ -221,15 +318,51 @@ class Env(abc.ABC):
             lambda: state,
         )
 
+        if self.lazy_observation:
+            return state
         observation = self.observe(state, state.current_player)
         state = state.replace(observation=observation)  # type: ignore
 
         return state
 
+    @jax.named_scope("observe")
     def observe(self, state: State, player_id: Array) -> Array:
         """Observation function."""
         obs = self._observe(state, player_id)
-        return jax.lax.stop_gradient(obs)
+        return jax.lax.stop_gradient(format_observation(obs, self.observation_format))
+
+    @jax.named_scope("observe_all")
+    def observe_all(self, state: State) -> Array:
+        """Observations of all players in a single call, with shape `(num_players, *observation_shape)`.
+        Same as `jax.vmap(env.observe, in_axes=(None, 0))(state, jnp.arange(env.num_players))`,
+        but some environments (e.g., chess and imperfect information games) compute the shared parts only once.
+        """
+        obs = self._observe_all(state)
+        return jax.lax.stop_gradient(format_observation(obs, self.observation_format))
+
+    def legal_actions(self, state: State) -> Tuple[Array, Array]:
+        """Legal actions as a padded list, for sparse policy heads and samplers (see `pgx.experimental`).
+        Batched states with any leading batch dimensions are also accepted.
+
+        At terminal states, where all actions are legal, the first `max_legal_actions` actions are returned.
+
+        !!! example "Example usage"
+
+            ```py
+            env = pgx.make("chess")
+            legal_actions, num_legal_actions = env.legal_actions(state)  # (218,), ()
+            action = legal_actions[jax.random.randint(key, (), 0, num_legal_actions)]
+            ```
+
+        Returns:
+            Tuple[Array, Array]: int32 action ids of shape `(..., max_legal_actions)` padded with -1,
+                and the number of legal actions of shape `(...)`
+        """
+        mask = state.legal_action_mask
+        flat_mask = mask.reshape(-1, mask.shape[-1])
+        legal_actions = jax.vmap(lambda m: jnp.nonzero(m, size=self.max_legal_actions, fill_value=-1)[0])(flat_mask)
+        num_legal_actions = jnp.minimum(mask.sum(axis=-1, dtype=jnp.int32), self.max_legal_actions)
+        return legal_actions.astype(jnp.int32).reshape(mask.shape[:-1] + (-1,)), num_legal_actions
 
     @abc.abstractmethod
     def _init(self, key: PRNGKey) -> State:
@@ -246,6 +379,20 @@ class Env(abc.ABC):
         """Implement game-specific observe function here."""
         ...
 
+    def _observe_all(self, state: State) -> Array:
+        """Override this to share the computation among players."""
+        return jax.vmap(self._observe, in_axes=(None, 0))(state, jnp.arange(self.num_players))
+
+    def _step_with_params(self, state: State, action: Array, key, params: EnvParams) -> State:
+        """Override this in environments with runtime parameters."""
+        del params
+        return self._step(state, action, key)
+
+    @property
+    def default_params(self) -> EnvParams:
+        """Runtime parameters used when `params` is not given to `step` (e.g., `komi` of Go). See `EnvParams`."""
+        return EnvParams()
+
     @property
     @abc.abstractmethod
     def id(self) -> EnvId:
@@ -266,18 +413,58 @@ class Env(abc.ABC):
         """Number of players (e.g., 2 in Tic-tac-toe)"""
         ...
 
+    @property
+    def spec(self) -> EnvSpec:
+        """Static specification (action size, observation shape/dtype, and state shapes/dtypes).
+        Derived by `jax.eval_shape` without any computation and cached. Reflects `observation_format`.
+
+        !!! example "Example usage"
+
+            ```py
+            env = pgx.make("chess")
+            env.spec.num_actions  # 4672
+            env.spec.observation_shape  # (8, 8, 119)
+            env.spec.state.legal_action_mask  # ShapeDtypeStruct(shape=(4672,), dtype=bool)
+            ```
+        """
+        spec = self._default_spec
+        if self.observation_format == "default":
+            return spec
+        obs = jax.eval_shape(lambda x: format_observation(x, self.observation_format), spec.state.observation)
+        return spec._replace(
+            observation_shape=tuple(obs.shape),
+            observation_dtype=obs.dtype,
+            state=spec.state.replace(observation=obs),  # type: ignore
+        )
+
+    @cached_property
+    def _default_spec(self) -> EnvSpec:
+        key = jax.ShapeDtypeStruct((2,), jnp.uint32)
+        state = jax.eval_shape(self._init, key)
+        obs = jax.eval_shape(self._observe, state, state.current_player)
+        state = state.replace(observation=obs)  # type: ignore
+        return EnvSpec(
+            num_actions=int(state.legal_action_mask.shape[0]),
+            observation_shape=tuple(obs.shape),
+            observation_dtype=obs.dtype,
+            state=state,
+        )
+
     @property
     def num_actions(self) -> int:
         """Return the size of action space (e.g., 9 in Tic-tac-toe)"""
-        state = self.init(jax.random.PRNGKey(0))
-        return int(state.legal_action_mask.shape[0])
+        return self.spec.num_actions
+
+    @property
+    def max_legal_actions(self) -> int:
+        """Upper bound of the number of legal actions in non-terminal states (e.g., 218 in chess).
+        Same as `num_actions` unless the environment knows a tighter bound."""
+        return self.num_actions
 
     @property
     def observation_shape(self) -> Tuple[int, ...]:
         """Return the matrix shape of observation"""
-        state = self.init(jax.random.PRNGKey(0))
-        obs = self._observe(state, state.current_player)
-        return obs.shape
+        return self.spec.observation_shape
 
     @property
     def _illegal_action_penalty(self) -> float:
@@ -314,15 +501,26 @@ def available_envs() -> Tuple[EnvId, ...]:
     return games
 
 
-def make(env_id: EnvId):  # noqa: C901
+def make(
+    env_id: EnvId,
+    *,
+    lazy_observation: bool = False,
+    observation_format: ObservationFormat = "default",
+):
     """Load the specified environment.
 
     !!! example "Example usage"
 
         ```py
         env = pgx.make("tic_tac_toe")
+        env = pgx.make("chess", lazy_observation=True, observation_format="packed")
         ```
 
+    Args:
+        env_id: environment id
+        lazy_observation: skip computing `state.observation` in `init` and `step`. See `Env`.
+        observation_format: format of observations. See `Env`.
+
     !!! note "`BridgeBidding` environment"
 
         `BridgeBidding` environment requires the domain knowledge of bridge game.
@@ -330,6 +528,14 @@ def make(env_id: EnvId):  # noqa: C901
         Use `BridgeBidding` class directly by `from pgx.bridge_bidding import BridgeBidding`.
 
     """
+    assert observation_format in get_args(ObservationFormat), f"unknown observation format: {observation_format}"
+    env = _make(env_id)
+    env._lazy_observation = bool(lazy_observation)
+    env._observation_format = observation_format
+    return env
+
+
+def _make(env_id: EnvId) -> Env:  # noqa: C901
     # NOTE: BridgeBidding environment requires the domain knowledge of bridge
     # So we forbid users to load the bridge environment by `make("bridge_bidding")`.
     if env_id == "2048":
@@ -1,4 +1,4 @@
-from pgx.experimental.utils import act_randomly
+from pgx.experimental.utils import act_randomly, act_randomly_sparse, gather_legal_logits, sample_legal_action
 from pgx.experimental.wrappers import auto_reset
 
-__all__ = ["act_randomly", "auto_reset"]
+__all__ = ["act_randomly", "act_randomly_sparse", "gather_legal_logits", "sample_legal_action", "auto_reset"]
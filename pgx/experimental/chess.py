@@ -2,7 +2,7 @@ import jax
 import jax.numpy as jnp
 import numpy as np
 
-from pgx._src.games.chess import Game, GameState, _flip_pos, _legal_action_mask, _update_history
+from pgx._src.games.chess import Game, GameState, _flip_pos, _legal_action_mask, _update_history, _zobrist_hash
 from pgx.chess import State
 
 TRUE = jnp.bool_(True)
@@ -67,7 +67,7 @@ def from_fen(fen: str):
         fullmove_count=jnp.int32(fullmove_cnt),
     )
     legal_action_mask = jax.jit(_legal_action_mask)(x)
-    x = x._replace(legal_action_mask=legal_action_mask)
+    x = x._replace(legal_action_mask=legal_action_mask, zobrist_hash=_zobrist_hash(x))
     x = _update_history(x)
 
     player_order = jnp.int32([0, 1])
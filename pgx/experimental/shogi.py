@@ -14,7 +14,7 @@
 
 import numpy as np
 import jax
-from pgx._src.games.shogi import _flip, Game, GameState
+from pgx._src.games.shogi import _flip, _set_cache, Game, GameState
 from pgx.shogi import State
 
 
@@ -92,6 +92,7 @@ def _from_board(color, piece_board, hand):
     # fmt: off
     state = jax.lax.cond(color % 2 == 1, lambda: state.replace(_x=_flip(state._x)), lambda: state)  # type: ignore
     # fmt: on
+    state = state.replace(_x=_set_cache(state._x))  # type: ignore
     return state.replace(legal_action_mask=Game().legal_action_mask(state._x))  # type: ignore
 
 
@@ -14,3 +14,29 @@ def act_randomly(rng: PRNGKey, legal_action_mask: Array) -> Array:
     )
     logits = jnp.log(legal_action_mask.astype(jnp.float32))
     return jax.random.categorical(rng, logits=logits, axis=1)
+
+
+def act_randomly_sparse(rng: PRNGKey, legal_actions: Array, num_legal_actions: Array) -> Array:
+    """Uniformly sample from the padded legal actions of `Env.legal_actions`, without full-width masking.
+    Batched inputs with any leading batch dimensions are accepted."""
+    ix = jax.random.randint(rng, num_legal_actions.shape, 0, jnp.maximum(num_legal_actions, 1))
+    return jnp.take_along_axis(legal_actions, ix[..., None], axis=-1)[..., 0]
+
+
+def gather_legal_logits(logits: Array, legal_actions: Array, num_legal_actions: Array) -> Array:
+    """Gather full-width logits `(..., num_actions)` at the padded legal actions into `(..., max_legal_actions)`.
+    Padded entries are `-inf`."""
+    legal_logits = jnp.take_along_axis(logits, jnp.maximum(legal_actions, 0), axis=-1)
+    return _mask_padding(legal_logits, num_legal_actions)
+
+
+def sample_legal_action(rng: PRNGKey, legal_logits: Array, legal_actions: Array, num_legal_actions: Array) -> Array:
+    """Sample an action from logits over the padded legal actions (e.g., from a sparse policy head
+    or `gather_legal_logits`). Padded entries are ignored."""
+    ix = jax.random.categorical(rng, _mask_padding(legal_logits, num_legal_actions), axis=-1)
+    return jnp.take_along_axis(legal_actions, ix[..., None], axis=-1)[..., 0]
+
+
+def _mask_padding(legal_logits: Array, num_legal_actions: Array) -> Array:
+    is_valid = jnp.arange(legal_logits.shape[-1]) < num_legal_actions[..., None]
+    return jnp.where(is_valid, legal_logits, -jnp.inf)
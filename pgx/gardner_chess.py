@@ -96,6 +96,7 @@ class State(core.State):
     _hash_history: Array = (
         jnp.zeros((MAX_TERMINATION_STEPS + 1, 2), dtype=jnp.uint32).at[0].set(jnp.uint32(INIT_ZOBRIST_HASH))
     )
+    # ring buffer written at _step_count (not shifted every step)
     _board_history: Array = jnp.zeros((8, 25), dtype=jnp.int32).at[0, :].set(INIT_BOARD)
     _possible_piece_positions: Array = jnp.int32(
         [
@@ -207,16 +208,12 @@ def _step(state: State, action: Array):
     return state
 
 
+@jax.named_scope("update_history")
 def _update_history(state: State):
-    # board history
-    board_history = jnp.roll(state._board_history, 25)
-    board_history = board_history.at[0].set(state._board)
-    state = state.replace(_board_history=board_history)  # type:ignore
-    # hash hist
-    hash_hist = jnp.roll(state._hash_history, 2)
-    hash_hist = hash_hist.at[0].set(state._zobrist_hash)
-    state = state.replace(_hash_history=hash_hist)  # type: ignore
-    return state
+    # O(1) writes to the ring buffers at the current step
+    board_history = state._board_history.at[state._step_count % 8].set(state._board)
+    hash_hist = state._hash_history.at[state._step_count].set(state._zobrist_hash)
+    return state.replace(_board_history=board_history, _hash_history=hash_hist)  # type: ignore
 
 
 def _apply_move(state: State, a: Action):
@@ -296,6 +293,7 @@ def has_insufficient_pieces(state: State):
     return is_insufficient
 
 
+@jax.named_scope("legal_action_mask")
 def _legal_action_mask(state):
     def is_legal(a: Action):
         ok = _is_pseudo_legal(state, a)
@@ -377,6 +375,7 @@ def _is_pseudo_legal(state: State, a: Action):
     return (a.to >= 0) & ok
 
 
+@jax.named_scope("hash")
 def _zobrist_hash(state):
     """
     >>> state = State()
@@ -396,6 +395,7 @@ def _zobrist_hash(state):
     return hash_
 
 
+@jax.named_scope("hash")
 def _update_zobrist_hash(state: State, action: Action):
     hash_ = state._zobrist_hash
     source_piece = state._board[action.from_]
@@ -431,7 +431,9 @@ def _observe(state: State, player_id: Array):
     state = jax.lax.cond(state.current_player == player_id, lambda: state, lambda: _flip(state))
 
     def make(i):
-        board = _rotate(state._board_history[i].reshape((5, 5)))
+        # i-th latest position
+        step = state._step_count - i
+        board = _rotate(state._board_history[step % 8].reshape((5, 5)))
 
         def piece_feat(p):
             return (board == p).astype(jnp.float32)
@@ -439,7 +441,7 @@ def _observe(state: State, player_id: Array):
         my_pieces = jax.vmap(piece_feat)(jnp.arange(1, 7))
         opp_pieces = jax.vmap(piece_feat)(-jnp.arange(1, 7))
 
-        h = state._hash_history[i, :]
+        h = jnp.where(step >= 0, state._hash_history[step], 0)
         rep = (state._hash_history == h).all(axis=1).sum() - 1
         rep = jax.lax.select((h == 0).all(), 0, rep)
         rep0 = ones * (rep == 0)
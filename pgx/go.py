@@ -12,12 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Optional
+from typing import Literal, Optional, Union
 
 import jax
 from jax import numpy as jnp
 
 import pgx._src.games.go as go
+import pgx._src.games.go_bitboard as go_bitboard
 import pgx.core as core
 from pgx._src.struct import dataclass
 from pgx._src.types import Array, PRNGKey
@@ -33,18 +34,46 @@ class State(core.State):
     observation: Array = jnp.zeros((19, 19, 17), dtype=jnp.bool_)
     _step_count: Array = jnp.int32(0)
     _player_order: Array = jnp.int32([0, 1])  # [0, 1] or [1, 0]
-    _x: go.GameState = go.GameState()
+    _x: Union[go.GameState, go_bitboard.GameState] = go.GameState()  # go_bitboard.GameState if backend="bitboard"
 
     @property
     def _size(self) -> int:
-        return int(jnp.sqrt(self._x.board.shape[-1]).astype(jnp.int32))
+        # from the static shape so that it also works under jit
+        return round((self.legal_action_mask.shape[-1] - 1) ** 0.5)
 
     @property
     def env_id(self) -> core.EnvId:
         return f"go_{self._size}x{self._size}"  # type: ignore
 
 
+@dataclass
+class GoParams(core.EnvParams):
+    """Runtime parameters of Go. See `pgx.EnvParams`.
+
+    Attributes:
+        komi (Array): komi added to the white player's score
+        max_termination_steps (Array): the game terminates at this step.
+            Superko is checked only against the positions within `superko_window` of the constructor,
+            which defaults to its `max_terminal_steps`, so do not exceed it to check all positions.
+    """
+
+    komi: Array = jnp.float32(7.5)
+    max_termination_steps: Array = jnp.int32(19 * 19 * 2)
+
+
 class Go(core.Env):
+    """Go environment. See `docs/go.md` for the rules, observation, and action.
+
+    Args:
+        backend: `"default"` or `"bitboard"` (only for `size=9`).
+            Both backends have the same observation, legal actions, rewards, and `score`,
+            but the internal state `_x` differs. The bitboard one (`go_bitboard.GameState`) stores the stones and
+            the board history as `uint32` bitboards, and its `_x.board` is a derived property of 1 (black),
+            -1 (white), and 0 (empty) instead of the signed chain ids of the default one.
+            SVG rendering, `pgx.compact`, and `pgx.profile` support both, but helpers of
+            `pgx._src.games.go` (e.g., `_count_ji` and `_compute_hash`) accept only the default state.
+    """
+
     def __init__(
         self,
         *,
@@ -52,11 +81,22 @@ class Go(core.Env):
         komi: float = 7.5,
         history_length: int = 8,
         max_terminal_steps: Optional[int] = None,
+        superko_window: Optional[int] = None,
+        backend: Literal["default", "bitboard"] = "default",
     ):
         super().__init__()
         assert isinstance(size, int)
-        self._game = go.Game(
-            size=size, komi=komi, history_length=history_length, max_termination_steps=max_terminal_steps
+        assert backend in ("default", "bitboard")
+        # superko_window defaults to max_terminal_steps and is the size of the hash ring buffer
+        assert superko_window is None or (isinstance(superko_window, int) and superko_window >= 1)
+        assert max_terminal_steps is None or (isinstance(max_terminal_steps, int) and max_terminal_steps >= 1)
+        game_cls = go_bitboard.Game if backend == "bitboard" else go.Game  # bitboard only supports 9x9
+        self._game = game_cls(
+            size=size,
+            komi=komi,
+            history_length=history_length,
+            max_termination_steps=max_terminal_steps,
+            superko_window=superko_window,
         )
 
     def _init(self, key: PRNGKey) -> State:
@@ -71,14 +111,18 @@ class Go(core.Env):
         )
 
     def _step(self, state: core.State, action: Array, key) -> State:
+        return self._step_with_params(state, action, key, self.default_params)
+
+    def _step_with_params(self, state: core.State, action: Array, key, params: core.EnvParams) -> State:
         del key
         assert isinstance(state, State)
+        assert isinstance(params, GoParams)
         x = self._game.step(state._x, action)
         return state.replace(  # type:ignore
             current_player=state._player_order[x.color],
             legal_action_mask=self._game.legal_action_mask(x),
-            rewards=self._game.rewards(x)[state._player_order],
-            terminated=self._game.is_terminal(x),
+            rewards=self._game.rewards(x, params.komi, params.max_termination_steps)[state._player_order],
+            terminated=self._game.is_terminal(x, params.max_termination_steps),
             _x=x,
         )
 
@@ -88,6 +132,32 @@ class Go(core.Env):
         my_turn = jax.lax.select(player_id == state.current_player, curr_color, 1 - curr_color)
         return self._game.observe(state._x, my_turn)
 
+    def score(self, state: State, params: Optional[GoParams] = None) -> Array:
+        """Area scores of each player (komi is added to the white player).
+        Batched states with any leading batch dimensions are also accepted.
+
+        Args:
+            state: (batched) Go state
+            params: runtime parameters whose `komi` is used (unbatched). Default (None) is `default_params`.
+
+        Returns:
+            Array: float32 array of shape `(..., 2)` in the player-id order
+        """
+        batch_shape = state._step_count.shape
+        x = jax.tree_util.tree_map(lambda a: a.reshape((-1,) + a.shape[len(batch_shape) :]), state._x)
+        player_order = state._player_order.reshape(-1, 2)
+        komi = self.default_params.komi if params is None else params.komi
+        scores = jax.vmap(self._game.score, in_axes=(0, None))(x, komi)
+        scores = jax.vmap(lambda s, order: s[order])(scores, player_order)
+        return scores.reshape(batch_shape + (2,))
+
+    @property
+    def default_params(self) -> GoParams:
+        return GoParams(  # type: ignore
+            komi=jnp.float32(self._game.komi),
+            max_termination_steps=jnp.int32(self._game.max_termination_steps),
+        )
+
     @property
     def id(self) -> core.EnvId:
         return f"go_{int(self._game.size)}x{int(self._game.size)}"  # type: ignore
@@ -105,13 +105,17 @@ def _step(state: State, action: Array, size: int) -> State:
             lambda: b,
         )
 
-    board = jax.lax.fori_loop(0, 6, merge, board)
+    with jax.named_scope("apply_action"):
+        board = jax.lax.fori_loop(0, 6, merge, board)
     won = _is_game_end(board, size, state._turn)
-    reward = jax.lax.cond(
-        won,
-        lambda: jnp.float32([-1, -1]).at[state.current_player].set(1),
-        lambda: jnp.zeros(2, jnp.float32),
-    )
+    with jax.named_scope("rewards"):
+        reward = jax.lax.cond(
+            won,
+            lambda: jnp.float32([-1, -1]).at[state.current_player].set(1),
+            lambda: jnp.zeros(2, jnp.float32),
+        )
+    with jax.named_scope("legal_action_mask"):
+        legal_action_mask = state.legal_action_mask.at[:-1].set(board == 0).at[-1].set(state._step_count == 1)
 
     state = state.replace(  # type:ignore
         current_player=1 - state.current_player,
@@ -119,7 +123,7 @@ def _step(state: State, action: Array, size: int) -> State:
         _board=board * -1,
         rewards=reward,
         terminated=won,
-        legal_action_mask=state.legal_action_mask.at[:-1].set(board == 0).at[-1].set(state._step_count == 1),
+        legal_action_mask=legal_action_mask,
     )
 
     return state
@@ -171,6 +175,7 @@ def _neighbour(xy, size):
     return jnp.where(on_board, xs * size + ys, -1)
 
 
+@jax.named_scope("is_terminal")
 def _is_game_end(board, size, turn):
     top, bottom = jax.lax.cond(
         turn == 0,
@@ -62,6 +62,10 @@ class KuhnPoker(core.Env):
         assert isinstance(state, State)
         return _observe(state, player_id)
 
+    def _observe_all(self, state: core.State) -> Array:
+        assert isinstance(state, State)
+        return _observe_all(state)
+
     @property
     def id(self) -> core.EnvId:
         return "kuhn_poker"
@@ -113,7 +117,8 @@ def _step(state: State, action):
         lambda: (terminated, reward),
     )
 
-    legal_action = jax.lax.select(terminated, jnp.bool_([0, 0]), jnp.bool_([1, 1]))
+    with jax.named_scope("legal_action_mask"):
+        legal_action = jax.lax.select(terminated, jnp.bool_([0, 0]), jnp.bool_([1, 1]))
 
     return state.replace(  # type:ignore
         current_player=1 - state.current_player,
@@ -125,6 +130,7 @@ def _step(state: State, action):
     )
 
 
+@jax.named_scope("rewards")
 def _get_unit_reward(state: State):
     return jax.lax.cond(
         state._cards[state.current_player] > state._cards[1 - state.current_player],
@@ -146,3 +152,12 @@ def _observe(state: State, player_id) -> Array:
     obs = obs.at[5 + state._pot[1 - player_id]].set(TRUE)
 
     return obs
+
+
+def _observe_all(state: State) -> Array:
+    players = jnp.arange(2)
+    obs = jnp.zeros((2, 7), dtype=jnp.bool_)
+    obs = obs.at[players, state._cards].set(TRUE)
+    obs = obs.at[players, 3 + state._pot].set(TRUE)
+    obs = obs.at[players, 5 + state._pot[::-1]].set(TRUE)
+    return obs
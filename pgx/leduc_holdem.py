@@ -70,6 +70,10 @@ class LeducHoldem(core.Env):
         assert isinstance(state, State)
         return _observe(state, player_id)
 
+    def _observe_all(self, state: core.State) -> Array:
+        assert isinstance(state, State)
+        return _observe_all(state)
+
     @property
     def id(self) -> core.EnvId:
         return "leduc_holdem"
@@ -118,15 +122,16 @@ def _step(state: State, action):
 
     reward *= jnp.min(chips)
 
-    legal_action = jax.lax.switch(
-        action,
-        [
-            lambda: jnp.bool_([1, 1, 0]),  # CALL
-            lambda: jnp.bool_([1, 1, 1]),  # RAISE
-            lambda: jnp.bool_([0, 0, 0]),  # FOLD
-        ],
-    )
-    legal_action = legal_action.at[RAISE].set(raise_count < MAX_RAISE)
+    with jax.named_scope("legal_action_mask"):
+        legal_action = jax.lax.switch(
+            action,
+            [
+                lambda: jnp.bool_([1, 1, 0]),  # CALL
+                lambda: jnp.bool_([1, 1, 1]),  # RAISE
+                lambda: jnp.bool_([0, 0, 0]),  # FOLD
+            ],
+        )
+        legal_action = legal_action.at[RAISE].set(raise_count < MAX_RAISE)
 
     return state.replace(  # type:ignore
         current_player=current_player,
@@ -140,6 +145,7 @@ def _step(state: State, action):
     )
 
 
+@jax.named_scope("is_terminal")
 def _check_round_over(state, action):
     fold = action == FOLD
     call = (state._last_action != INVALID_ACTION) & (action == CALL)
@@ -161,6 +167,7 @@ def _check_round_over(state, action):
     return round_over, terminated, reward
 
 
+@jax.named_scope("rewards")
 def _get_unit_reward(state: State):
     win_by_one_pair = state._cards[state.current_player] == state._cards[2]
     lose_by_one_pair = state._cards[1 - state.current_player] == state._cards[2]
@@ -199,3 +206,15 @@ def _observe(state: State, player_id) -> Array:
     obs = obs.at[20 + state._chips[1 - player_id]].set(TRUE)
 
     return obs
+
+
+def _observe_all(state: State) -> Array:
+    players = jnp.arange(2)
+    # the public card is shared by both players
+    public = jnp.zeros(34, dtype=jnp.bool_)
+    public = jax.lax.select(state._round == 1, public.at[3 + state._cards[2]].set(TRUE), public)
+    obs = jnp.tile(public, (2, 1))
+    obs = obs.at[players, state._cards[:2]].set(TRUE)
+    obs = obs.at[players, 6 + state._chips].set(TRUE)
+    obs = obs.at[players, 20 + state._chips[::-1]].set(TRUE)
+    return obs
@@ -194,6 +194,7 @@ def _check_line(pos, opp, shift, mask):
     return result
 
 
+@jax.named_scope("rewards")
 def _get_reward(my, opp, curr_player):
     my = jnp.count_nonzero(my)
     opp = jnp.count_nonzero(opp)
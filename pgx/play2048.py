@@ -64,7 +64,13 @@ class Play2048(core.Env):
     def __init__(self):
         super().__init__()
 
-    def step(self, state: core.State, action: Array, key: Optional[Array] = None) -> core.State:
+    def step(
+        self,
+        state: core.State,
+        action: Array,
+        key: Optional[Array] = None,
+        params: Optional[core.EnvParams] = None,
+    ) -> core.State:
         assert key is not None, (
             "v2.0.0 changes the signature of step. Please specify PRNGKey at the third argument:\n\n"
             "  * <  v2.0.0: step(state, action)\n"
@@ -72,7 +78,7 @@ class Play2048(core.Env):
             "See v2.0.0 release note for more details:\n\n"
             "  https://github.com/sotetsuk/pgx/releases/tag/v2.0.0"
         )
-        return super().step(state, action, key)
+        return super().step(state, action, key, params)
 
     def _init(self, key: PRNGKey) -> State:
         return _init(key)
@@ -142,6 +148,7 @@ def _step(state: State, action, key):
     )
 
 
+@jax.named_scope("legal_action_mask")
 def _legal_action_mask(board_2d):
     return jax.vmap(_can_slide_left)(
         jnp.array(
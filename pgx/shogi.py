@@ -83,4 +83,8 @@ class Shogi(core.Env):
 
     @property
     def num_players(self) -> int:
-        return 2
\ No newline at end of file
+        return 2
+
+    @property
+    def max_legal_actions(self) -> int:
+        return 593  # known maximum number of legal moves in shogi
\ No newline at end of file
@@ -136,6 +136,10 @@ class SparrowMahjong(core.Env):
         assert isinstance(state, State)
         return _observe(state, player_id)
 
+    def _observe_all(self, state: core.State) -> Array:
+        assert isinstance(state, State)
+        return _observe_all(state)
+
     @property
     def id(self) -> core.EnvId:
         return "sparrow_mahjong"
@@ -211,6 +215,7 @@ def _hand_to_score(hand: Array):
     return BASE_SCORES[ix], YAKU_SCORES[ix]
 
 
+@jax.named_scope("rewards")
 def _hands_to_score(state: State) -> Array:
     scores = jnp.zeros(3, dtype=jnp.int32)
     for i in range(N_PLAYER):
@@ -234,6 +239,7 @@ def _hands_to_score(state: State) -> Array:
     return scores
 
 
+@jax.named_scope("is_terminal")
 def _check_ron(state: State, scores) -> Array:
     winning_players = jax.lax.fori_loop(
         0,
@@ -248,6 +254,7 @@ def _check_ron(state: State, scores) -> Array:
     return winning_players
 
 
+@jax.named_scope("is_terminal")
 def _check_tsumo(state: State, scores) -> Array:
     return _is_completed(state._hands[state._turn]) & (scores[state._turn] >= 0)
 
@@ -308,7 +315,8 @@ def _draw_tile(state: State) -> State:
     hands = state._hands.at[turn % N_PLAYER, tile_type].add(1)
     n_red_in_hands = state._n_red_in_hands.at[turn % N_PLAYER, tile_type].add(is_red)
     draw_ix = state._draw_ix + 1
-    legal_action_mask = hands[turn % N_PLAYER] > 0
+    with jax.named_scope("legal_action_mask"):
+        legal_action_mask = hands[turn % N_PLAYER] > 0
     state = state.replace(  # type: ignore
         current_player=current_player,
         legal_action_mask=legal_action_mask,
@@ -435,6 +443,37 @@ def _observe(state: State, player_id: Array):
     return jnp.transpose(obs)
 
 
+def _observe_all(state: State):
+    """Same features as `_observe` for all players. Discards of each seat are made only once and shared"""
+    seats = jnp.arange(N_PLAYER)
+    # all discards of each seat (empty slots are mapped to the out-of-bound index NUM_TILE_TYPES and dropped)
+    rivers = jnp.where(state._rivers >= 0, state._rivers, NUM_TILE_TYPES)
+    all_discards = jnp.zeros((N_PLAYER, NUM_TILE_TYPES), dtype=jnp.bool_)
+    all_discards = all_discards.at[seats[:, None], rivers].set(True, mode="drop")
+    # last 3 discards of each seat
+    ix = (state._rivers >= 0).sum(axis=1)[:, None] - jnp.arange(1, 4)  # (N_PLAYER, 3)
+    last_tiles = jnp.where(ix >= 0, state._rivers[seats[:, None], ix], NUM_TILE_TYPES)
+    last_discards = jnp.zeros((N_PLAYER, 3, NUM_TILE_TYPES), dtype=jnp.bool_)
+    last_discards = last_discards.at[seats[:, None], jnp.arange(3), last_tiles].set(True, mode="drop")
+    dora = jnp.zeros(NUM_TILE_TYPES, dtype=jnp.bool_).at[state._dora].set(True)
+
+    def make(turn):
+        obs = jnp.vstack(
+            [
+                state._hands[turn] >= jnp.arange(1, 5)[:, None],  # hand
+                state._n_red_in_hands[turn] >= 1,  # red dora
+                dora,
+                all_discards[(turn + seats) % N_PLAYER],
+                last_discards[(turn + 1) % N_PLAYER],
+                last_discards[(turn + 2) % N_PLAYER],
+            ]
+        )
+        return jnp.transpose(obs)
+
+    turns = jnp.abs(state._shuffled_players - seats[:, None]).argmin(axis=1)
+    return jax.vmap(make)(turns)
+
+
 def _tile_type_to_str(tile_type) -> str:
     if tile_type < 9:
         s = str(tile_type + 1)
@@ -21,7 +21,7 @@ setup(
     keywords="",
     packages=find_packages(),
     package_data={
-        "": ["LICENSE", "*.svg"]
+        "": ["LICENSE", "*.svg", "*.npz"]
     },
     include_package_data=True,
     install_requires=_read_requirements("requirements.txt"),
@@ -0,0 +1,16 @@
+import json
+
+from pgx.bench import compare, main
+
+
+def test_bench(tmp_path):
+    argv = ["--envs", "tic_tac_toe", "--batch-sizes", "1", "2", "--num-steps", "2"]
+    results = main(argv + ["--output", str(tmp_path / "bench.json")])
+    result = results["results"]["tic_tac_toe"]
+    assert set(result["steps_per_sec"]) == set(result["compile_time"]) == {1, 2}
+    assert result["compact_state_bytes"] <= result["state_bytes"]
+    with open(tmp_path / "bench.json") as f:
+        baseline = json.load(f)
+    assert compare(results, baseline) == []
+    baseline["results"]["tic_tac_toe"]["steps_per_sec"]["2"] *= 10
+    assert len(compare(results, baseline)) == 1
@@ -1,8 +1,12 @@
 import jax
+import numpy as np
 import jax.numpy as jnp
+from jax import lax
 import pgx
 from pgx.chess import State, Chess
 from pgx._src.games.chess import GameState, Action, KING, QUEEN, EMPTY, ROOK, PAWN, _legal_action_mask, CAN_MOVE, _zobrist_hash, INIT_ZOBRIST_HASH
+from pgx._src.games.chess import LEGAL_DEST, BETWEEN, _apply_move, _is_attacked, _is_checked
+from pgx._src.games.chess import KNIGHT, BISHOP, RAYS, _attackers, _pin_directions, _to_bitboards, _bb_or
 from pgx.experimental.utils import act_randomly
 from pgx.experimental.chess import from_fen, to_fen
 
@@ -705,6 +709,180 @@ def test_buggy_samples():
     assert state.legal_action_mask.sum() == len(expected_legal_actions), f"\nactual:{jnp.nonzero(state.legal_action_mask)[0]}\nexpected\n{expected_legal_actions}"
 
 
+def test_legal_action_mask_by_simulation():
+    # legal action mask from checkers and pins should be the same as the one by simulating each move
+    env = Chess()
+    init_fn = jax.jit(jax.vmap(env.init))
+    step_fn = jax.jit(jax.vmap(env.step))
+    ref_fn = jax.jit(jax.vmap(_legal_action_mask_by_simulation))
+    key = jax.random.PRNGKey(0)
+    key, subkey = jax.random.split(key)
+    state = init_fn(jax.random.split(subkey, 64))
+    for _ in range(200):
+        expected = ref_fn(state._x)
+        assert ((state.legal_action_mask == expected) | state.terminated[:, None]).all()
+        key, subkey = jax.random.split(key)
+        state = step_fn(state, act_randomly(subkey, state.legal_action_mask))
+
+
+def _legal_action_mask_by_simulation(state: GameState):
+    # reference implementation which checks each pseudo-legal move by simulation
+    def legal_normal_moves(from_):
+        piece = state.board[from_]
+
+        def legal_label(to):
+            ok = (from_ >= 0) & (piece > 0) & (to >= 0) & (state.board[to] <= 0)
+            between_ixs = BETWEEN[from_, to]
+            ok &= CAN_MOVE[piece, from_, to] & ((between_ixs < 0) | (state.board[between_ixs] == EMPTY)).all()
+            c0, c1 = from_ // 8, to // 8
+            pawn_should = ((c1 == c0) & (state.board[to] == EMPTY)) | ((c1 != c0) & (state.board[to] < 0))
+            ok &= (piece != PAWN) | pawn_should
+            return lax.select(ok, Action(from_=from_, to=to)._to_label(), -1)
+
+        return jax.vmap(legal_label)(LEGAL_DEST[piece, from_])
+
+    def legal_en_passants():
+        to = state.en_passant
+
+        def legal_labels(from_):
+            ok = (from_ >= 0) & (from_ < 64) & (to >= 0) & (state.board[from_] == PAWN) & (state.board[to - 1] == -PAWN)
+            a = Action(from_=from_, to=to)
+            return lax.select(ok, a._to_label(), -1)
+
+        return jax.vmap(legal_labels)(jnp.int32([to - 9, to + 7]))
+
+    def is_not_checked(label):
+        a = Action._from_label(label)
+        return ~_is_checked(_apply_move(state, a))
+
+    def legal_underpromotions(mask):
+        def legal_labels(label):
+            a = Action._from_label(label)
+            ok = (state.board[a.from_] == PAWN) & (a.to >= 0)
+            ok &= mask[Action(from_=a.from_, to=a.to)._to_label()]
+            return lax.select(ok, label, -1)
+
+        labels = jnp.int32([from_ * 73 + i for i in range(9) for from_ in [6, 14, 22, 30, 38, 46, 54, 62]])
+        return jax.vmap(legal_labels)(labels)
+
+    # normal move and en passant
+    possible_piece_positions = jnp.nonzero(state.board > 0, size=16, fill_value=-1)[0]
+    a1 = jax.vmap(legal_normal_moves)(possible_piece_positions).flatten()
+    a2 = legal_en_passants()
+    actions = jnp.hstack((a1, a2))  # include -1
+    # filter out -1
+    ixs = jnp.nonzero(actions >= 0, size=250, fill_value=0)[0]
+    actions = actions[ixs]
+    # filter ignoring checks and suicides
+    actions = jnp.where(jax.vmap(is_not_checked)(actions), actions, -1)
+    mask = jnp.zeros(64 * 73 + 1, dtype=jnp.bool_)  # +1 for sentinel
+    mask = mask.at[actions].set(True)
+
+    # castling
+    b = state.board
+    can_castle_queen_side = state.castling_rights[0, 0]
+    can_castle_queen_side &= (b[0] == ROOK) & (b[8] == EMPTY) & (b[16] == EMPTY) & (b[24] == EMPTY) & (b[32] == KING)
+    can_castle_king_side = state.castling_rights[0, 1]
+    can_castle_king_side &= (b[32] == KING) & (b[40] == EMPTY) & (b[48] == EMPTY) & (b[56] == ROOK)
+    not_checked = ~jax.vmap(_is_attacked, in_axes=(None, 0))(state, jnp.int32([16, 24, 32, 40, 48]))
+    mask = mask.at[2364].set(mask[2364] | (can_castle_queen_side & not_checked[:3].all()))
+    mask = mask.at[2367].set(mask[2367] | (can_castle_king_side & not_checked[2:].all()))
+
+    # set underpromotions
+    actions = legal_underpromotions(mask)
+    mask = mask.at[actions].set(True)
+
+    return mask[:-1]
+
+
+def test_attackers_and_pins():
+    # bitboard attackers/pins should match a plain ray scan on random boards and on positions from random play
+    bbs_fn = jax.jit(jax.vmap(_to_bitboards))
+    attackers_fn = jax.jit(jax.vmap(jax.vmap(_attackers, in_axes=(None, None, 0)), in_axes=(0, 0, None)))
+    pins_fn = jax.jit(jax.vmap(_pin_directions))
+    checked_fn = jax.jit(jax.vmap(lambda board: _is_checked(GameState(board=board))))
+
+    rng = np.random.default_rng(0)
+    boards = []
+    for _ in range(128):
+        board = np.zeros(64, dtype=np.int32)
+        ixs = rng.choice(64, size=rng.integers(2, 33), replace=False)
+        board[ixs[2:]] = rng.choice([-5, -4, -3, -2, -1, 1, 2, 3, 4, 5], size=len(ixs) - 2)
+        board[ixs[0]], board[ixs[1]] = KING, -KING
+        boards.append(board)
+    init_fn = jax.jit(jax.vmap(env.init))
+    step_fn = jax.jit(jax.vmap(env.step))
+    key = jax.random.PRNGKey(0)
+    key, subkey = jax.random.split(key)
+    state = init_fn(jax.random.split(subkey, 16))
+    for i in range(100):
+        if i % 10 == 0:
+            boards.extend(np.asarray(state._x.board)[~np.asarray(state.terminated)])
+        key, subkey = jax.random.split(key)
+        state = step_fn(state, act_randomly(subkey, state.legal_action_mask))
+
+    boards = np.stack(boards)
+    bbs = bbs_fn(jnp.array(boards))
+    occ = jax.vmap(lambda x: _bb_or(x[:6]) | _bb_or(x[7:]))(bbs)
+    attackers = np.asarray(attackers_fn(bbs, occ, jnp.arange(64)))  # (N, 64, 2)
+    attackers = (attackers[..., None] >> np.arange(32, dtype=np.uint32)) & 1
+    attackers = attackers.reshape(len(boards), 64, 64).astype(np.bool_)
+    king_pos = np.argmax(boards == KING, axis=-1)
+    pins = np.asarray(pins_fn(bbs, occ, jnp.array(king_pos)))
+    checked = np.asarray(checked_fn(jnp.array(boards)))
+    rays = np.asarray(RAYS)
+    for i, board in enumerate(boards):
+        for pos in range(64):
+            expected = _attackers_by_ray_scan(board, pos)
+            assert (np.nonzero(attackers[i, pos])[0] == expected).all(), f"{board}, {pos}"
+        expected = _pins_by_ray_scan(board, king_pos[i])
+        assert set(np.nonzero(pins[i, :64] >= 0)[0]) == set(expected), board
+        for sq in expected:
+            assert sq in rays[king_pos[i], pins[i, sq]]
+        assert checked[i] == (len(_attackers_by_ray_scan(board, king_pos[i])) > 0)
+
+
+ORTHOGONAL = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+DIAGONAL = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+
+
+def _ray(pos, dc, dr):
+    c, r = pos // 8 + dc, pos % 8 + dr
+    while 0 <= c < 8 and 0 <= r < 8:
+        yield c * 8 + r
+        c, r = c + dc, r + dr
+
+
+def _attackers_by_ray_scan(board, pos):
+    # reference implementation which walks each ray and offset from pos
+    attackers = []
+    for dirs, sliders in ((ORTHOGONAL, (ROOK, QUEEN)), (DIAGONAL, (BISHOP, QUEEN))):
+        for dc, dr in dirs:
+            for sq in _ray(pos, dc, dr):
+                if board[sq] != EMPTY:
+                    if -board[sq] in sliders:
+                        attackers.append(sq)
+                    break
+    c, r = pos // 8, pos % 8
+    knight = [(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)]
+    for piece, offsets in ((KNIGHT, knight), (KING, ORTHOGONAL + DIAGONAL), (PAWN, [(1, 1), (-1, 1)])):
+        for dc, dr in offsets:
+            if 0 <= c + dc < 8 and 0 <= r + dr < 8 and board[(c + dc) * 8 + r + dr] == -piece:
+                attackers.append((c + dc) * 8 + r + dr)
+    return sorted(attackers)
+
+
+def _pins_by_ray_scan(board, king_pos):
+    # reference implementation: my piece followed by an opponent's slider moving along the same ray
+    pinned = []
+    for dirs, sliders in ((ORTHOGONAL, (ROOK, QUEEN)), (DIAGONAL, (BISHOP, QUEEN))):
+        for dc, dr in dirs:
+            pieces = [sq for sq in _ray(king_pos, dc, dr) if board[sq] != EMPTY][:2]
+            if len(pieces) == 2 and board[pieces[0]] > 0 and -board[pieces[1]] in sliders:
+                pinned.append(pieces[0])
+    return pinned
+
+
 def test_observe():
     state = init(jax.random.PRNGKey(0))
     assert state.observation.shape == (8, 8, 119)
@@ -1073,6 +1251,72 @@ def test_zobrist_hash():
     assert (state._x.hash_history[0] == INIT_ZOBRIST_HASH).all()
     assert (_zobrist_hash(state._x) == INIT_ZOBRIST_HASH).all()
 
+    # incrementally updated hash and stored repetition counts should be the same as the ones computed from scratch
+    def rep_history(x):
+        # hashes of the positions stored in each slot of the ring buffer
+        steps = x.step_count - (x.step_count - jnp.arange(8)) % 8
+        hashes = jnp.where((steps >= 0)[:, None], x.hash_history[steps], 0)
+        return jax.vmap(lambda h: lax.select((h == 0).all(), 0, (x.hash_history == h).all(axis=1).sum() - 1))(hashes)
+
+    init_fn = jax.jit(jax.vmap(env.init))
+    step_fn = jax.jit(jax.vmap(env.step))
+    hash_fn = jax.jit(jax.vmap(_zobrist_hash))
+    rep_fn = jax.jit(jax.vmap(rep_history))
+    state = init_fn(jax.random.split(subkey, 64))
+    for _ in range(200):
+        assert (state._x.zobrist_hash == hash_fn(state._x)).all()
+        assert (state._x.hash_history[jnp.arange(64), state._x.step_count] == state._x.zobrist_hash).all()
+        assert (state._x.rep_history == rep_fn(state._x)).all()
+        key, subkey = jax.random.split(key)
+        state = step_fn(state, act_randomly(subkey, state.legal_action_mask))
+
+    # castling, en passant and promotion
+    for fen, actions in [
+        ("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1", [2367, 2364]),
+        ("4k3/8/8/8/3p4/8/4P3/4K3 w - - 0 1", [2426, 2088]),
+        ("4k3/1P6/8/8/8/8/8/4K3 w - - 0 1", [1028]),
+    ]:
+        state = from_fen(fen)
+        for a in actions:
+            assert state.legal_action_mask[a]
+            state = step(state, a)
+            assert (state._x.zobrist_hash == _zobrist_hash(state._x)).all()
+
+
+def test_observation_format():
+    key = jax.random.PRNGKey(0)
+    state = init(key)
+    for _ in range(10):
+        key, subkey = jax.random.split(key)
+        state = step(state, act_randomly(subkey, state.legal_action_mask))
+    obs = state.observation
+    packed = pgx.make("chess", observation_format="packed").observe(state, state.current_player)
+    # binary features are exact and counters are kept only by bfloat16
+    binary = jnp.ones(119, dtype=jnp.bool_).at[jnp.array([113, 118])].set(False)
+    assert (pgx.unpack_observation(packed, 119)[..., binary] == obs[..., binary]).all()
+    fmt_env = pgx.make("chess", observation_format="bfloat16")
+    assert jnp.allclose(fmt_env.observe(state, state.current_player).astype(jnp.float32), obs, atol=1e-2)
+
+
+def test_legal_actions():
+    assert env.max_legal_actions == 218
+    legal_actions, num_legal_actions = jax.jit(env.legal_actions)(init(jax.random.PRNGKey(0)))
+    assert legal_actions.shape == (218,) and num_legal_actions == 20
+
+
+def test_spec():
+    assert env.spec.num_actions == 4672
+    assert env.spec.observation_shape == (8, 8, 119)
+
+
+def test_compact():
+    # narrow dtypes and packed masks
+    state = jax.jit(jax.vmap(env.init))(jax.random.split(jax.random.PRNGKey(0), 64))
+    compact_state = jax.jit(pgx.compact)(state)
+    compact_x = jax.tree_util.tree_unflatten(compact_state.treedef, compact_state.leaves)._x
+    assert compact_x.board.dtype == jnp.int8
+    assert compact_x.legal_action_mask.dtype == jnp.uint32 and compact_x.legal_action_mask.shape == (64, 146)
+
 
 def test_api():
     import pgx
@@ -0,0 +1,205 @@
+import jax
+import jax.numpy as jnp
+import pytest
+
+import pgx
+from pgx.experimental import act_randomly
+
+act_randomly = jax.jit(act_randomly)
+
+# environments whose observation shapes differ from the defaults of their State classes are included
+ENV_IDS = ["tic_tac_toe", "chess", "go_9x9", "hex", "kuhn_poker"]
+
+
+def _assert_same_shapes(x, y):
+    assert jax.tree_util.tree_structure(x) == jax.tree_util.tree_structure(y)
+    for a, b in zip(jax.tree_util.tree_leaves(x), jax.tree_util.tree_leaves(y)):
+        assert a.shape == b.shape and a.dtype == b.dtype, f"{a}, {b}"
+
+
+def test_lazy_observation():
+    for env_id in ENV_IDS:
+        env = pgx.make(env_id)
+        lazy_env = pgx.make(env_id, lazy_observation=True)
+        assert not env.lazy_observation and lazy_env.lazy_observation
+        with pytest.raises(AttributeError):
+            lazy_env.lazy_observation = False  # fixed per instance
+        # states have the shapes of the spec, so that they can be passed to warmed up or exported functions
+        key = jax.random.PRNGKey(0)
+        _assert_same_shapes(jax.eval_shape(lazy_env.init, key), lazy_env.spec.state)
+        for fmt in ("packed", "uint8"):
+            fmt_env = pgx.make(env_id, lazy_observation=True, observation_format=fmt)
+            _assert_same_shapes(jax.eval_shape(fmt_env.init, key), fmt_env.spec.state)
+        init, step = jax.jit(env.init), jax.jit(env.step)
+        lazy_init, lazy_step = jax.jit(lazy_env.init), jax.jit(lazy_env.step)
+        state, lazy_state = init(key), lazy_init(key)
+        for _ in range(10):
+            key, subkey = jax.random.split(key)
+            action = act_randomly(subkey, state.legal_action_mask)
+            state, lazy_state = step(state, action, subkey), lazy_step(lazy_state, action, subkey)
+            # observation is not updated but can be computed on demand
+            assert (lazy_state.observation == 0).all()
+            assert (lazy_env.observe(lazy_state, lazy_state.current_player) == state.observation).all()
+            assert (lazy_state.legal_action_mask == state.legal_action_mask).all()
+
+
+def test_export():
+    from pgx._src.export import _export_module
+
+    try:
+        _export_module()
+    except ImportError:
+        pytest.skip("jax.export is not available")
+    for env_id in ENV_IDS:
+        _test_export(pgx.make(env_id))
+    _test_export(pgx.make("go_9x9", lazy_observation=True))
+
+
+def _test_export(env):
+    exported = pgx.deserialize_env(pgx.export_env(env))
+    assert exported.id == env.id and exported.version == env.version
+    init_fn = jax.jit(jax.vmap(env.init))
+    step_fn = jax.jit(jax.vmap(env.step))
+    observe_fn = jax.jit(jax.vmap(env.observe))
+    # one artifact serves any batch size
+    for batch_size in (1, 3):
+        key = jax.random.PRNGKey(batch_size)
+        keys = jax.random.split(key, batch_size)
+        state, exported_state = init_fn(keys), exported.init(keys)
+        for _ in range(5):
+            key, subkey = jax.random.split(key)
+            action = act_randomly(subkey, state.legal_action_mask)
+            keys = jax.random.split(subkey, batch_size)
+            state, exported_state = step_fn(state, action, keys), exported.step(exported_state, action, keys)
+            assert isinstance(exported_state, type(state))
+            for x, y in zip(jax.tree_util.tree_leaves(state), jax.tree_util.tree_leaves(exported_state)):
+                assert (x == y).all()
+        observation = exported.observe(exported_state, exported_state.current_player)
+        assert (observation == observe_fn(state, state.current_player)).all()
+
+
+def test_spec():
+    for env_id in ENV_IDS:
+        env = pgx.make(env_id)
+        spec = env.spec
+        assert spec is env.spec  # cached
+        state = jax.jit(env.init)(jax.random.PRNGKey(0))
+        assert spec.num_actions == env.num_actions == state.legal_action_mask.shape[-1]
+        assert spec.observation_shape == env.observation_shape == state.observation.shape
+        assert spec.observation_dtype == state.observation.dtype
+        _assert_same_shapes(spec.state, state)
+
+
+def test_compact():
+    compact_fn = jax.jit(pgx.compact)
+    expand_fn = jax.jit(pgx.expand)
+    for env_id in ENV_IDS:
+        env = pgx.make(env_id)
+        init_fn = jax.jit(jax.vmap(env.init))
+        step_fn = jax.jit(jax.vmap(env.step))
+        key = jax.random.PRNGKey(0)
+        state = init_fn(jax.random.split(key, 16))
+        for _ in range(30):
+            compact_state = compact_fn(state)
+            for x, y in zip(jax.tree_util.tree_leaves(state), jax.tree_util.tree_leaves(expand_fn(compact_state))):
+                assert x.dtype == y.dtype and (x == y).all(), env_id
+            key, subkey = jax.random.split(key)
+            state = step_fn(state, act_randomly(subkey, state.legal_action_mask), jax.random.split(subkey, 16))
+        # packing is decided by the shape of each state, so batch axes are kept
+        compact_state = compact_fn(state)
+        assert all(x.shape[0] == 16 for x in compact_state.leaves)
+        vmapped = jax.jit(jax.vmap(pgx.compact))(state)
+        for x, y in zip(compact_state.leaves, vmapped.leaves):
+            assert x.dtype == y.dtype and x.shape == y.shape and (x == y).all()
+        for ix in (slice(3, 10), jnp.int32([15, 0, 7])):
+            sliced = jax.tree_util.tree_map(lambda x: x[ix], compact_state)
+            for x, y in zip(jax.tree_util.tree_leaves(state), jax.tree_util.tree_leaves(expand_fn(sliced))):
+                assert x.dtype == y.dtype and (x[ix] == y).all()
+
+
+def test_observation_format():
+    for env_id in ENV_IDS:
+        env = pgx.make(env_id)
+        key = jax.random.PRNGKey(0)
+        step = jax.jit(env.step)
+        state = jax.jit(env.init)(key)
+        for _ in range(3):
+            key, subkey = jax.random.split(key)
+            state = step(state, act_randomly(subkey, state.legal_action_mask), subkey)
+        obs = state.observation
+        *leading_shape, size = env.observation_shape
+        for fmt, dtype, shape in [
+            ("bool", jnp.bool_, env.observation_shape),
+            ("uint8", jnp.uint8, env.observation_shape),
+            ("bfloat16", jnp.bfloat16, env.observation_shape),
+            ("packed", jnp.uint8, tuple(leading_shape) + ((size + 7) // 8,)),
+        ]:
+            fmt_env = pgx.make(env_id, observation_format=fmt)
+            assert fmt_env.observation_format == fmt
+            assert fmt_env.spec.observation_shape == shape and fmt_env.spec.observation_dtype == dtype
+            fmt_obs = fmt_env.observe(state, state.current_player)
+            assert fmt_obs.shape == shape and fmt_obs.dtype == dtype
+            fmt_state = jax.jit(fmt_env.init)(key)
+            assert fmt_state.observation.shape == shape and fmt_state.observation.dtype == dtype
+            assert fmt_env.observe_all(state).shape == (fmt_env.num_players,) + shape
+        packed = pgx.make(env_id, observation_format="packed").observe(state, state.current_player)
+        assert (pgx.unpack_observation(packed, size) == (obs != 0).astype(jnp.float32)).all()
+        assert (env.observe(state, state.current_player) == obs).all()
+    with pytest.raises(AssertionError):
+        pgx.make("tic_tac_toe", observation_format="float16")
+    with pytest.raises(AttributeError):
+        env.observation_format = "packed"  # fixed per instance
+
+
+def test_observe_all():
+    # envs with their own _observe_all sharing the computation among players
+    for env_id in ENV_IDS + ["leduc_holdem", "sparrow_mahjong"]:
+        env = pgx.make(env_id)
+        observe_all = jax.jit(env.observe_all)
+        observe_each = jax.jit(jax.vmap(env.observe, in_axes=(None, 0)))
+        step = jax.jit(env.step)
+        players = jnp.arange(env.num_players)
+        key = jax.random.PRNGKey(0)
+        state = jax.jit(env.init)(key)
+        for _ in range(20):
+            assert (observe_all(state) == observe_each(state, players)).all(), env_id
+            key, subkey = jax.random.split(key)
+            state = step(state, act_randomly(subkey, state.legal_action_mask), subkey)
+
+
+def test_legal_actions():
+    from pgx.experimental import act_randomly_sparse, gather_legal_logits, sample_legal_action
+
+    batch_size = 8
+    for env_id in ENV_IDS:
+        env = pgx.make(env_id)
+        max_legal_actions = env.max_legal_actions
+        assert max_legal_actions <= env.num_actions
+        init_fn = jax.jit(jax.vmap(env.init))
+        step_fn = jax.jit(jax.vmap(env.step))
+        legal_actions_fn = jax.jit(env.legal_actions)
+        key = jax.random.PRNGKey(0)
+        state = init_fn(jax.random.split(key, batch_size))
+        for _ in range(20):
+            legal_actions, num_legal_actions = legal_actions_fn(state)
+            assert legal_actions.shape == (batch_size, max_legal_actions)
+            assert num_legal_actions.shape == (batch_size,)
+            for i in range(batch_size):
+                if state.terminated[i]:
+                    continue
+                expected = jnp.nonzero(state.legal_action_mask[i])[0]
+                assert num_legal_actions[i] == expected.shape[0], env_id
+                assert (legal_actions[i, : expected.shape[0]] == expected).all()
+                assert (legal_actions[i, expected.shape[0] :] == -1).all()
+            key, subkey = jax.random.split(key)
+            action = act_randomly_sparse(subkey, legal_actions, num_legal_actions)
+            assert state.legal_action_mask[jnp.arange(batch_size), action].all()
+            # logits gathered from the full-width policy
+            logits = jax.random.normal(subkey, (batch_size, env.num_actions))
+            legal_logits = gather_legal_logits(logits, legal_actions, num_legal_actions)
+            assert legal_logits.shape == (batch_size, max_legal_actions)
+            assert (jnp.isneginf(legal_logits[:, -1]) == (num_legal_actions < max_legal_actions)).all()
+            logits = logits.at[jnp.arange(batch_size), action].set(1e9)
+            legal_logits = gather_legal_logits(logits, legal_actions, num_legal_actions)
+            assert (sample_legal_action(subkey, legal_logits, legal_actions, num_legal_actions) == action).all()
+            state = step_fn(state, action, jax.random.split(subkey, batch_size))
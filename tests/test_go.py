@@ -2,8 +2,10 @@ from functools import partial
 import jax
 import jax.numpy as jnp
 import numpy as np
+import pgx
+import pytest
 
-from pgx._src.games.go import _count_ji, _count_scores
+from pgx._src.games.go import _compute_hash, _count, _count_ji, _count_scores, _empty_region_ids
 from pgx.go import Go, State
 from pgx.experimental.go import from_sgf
 
@@ -56,6 +58,16 @@ def test_end_by_pass():
     assert state._x.consecutive_pass_count == 2
     assert state.terminated
 
+    # under vmap, only the terminated states in the batch are scored
+    keys = jax.random.split(key, 2)
+    state = jax.jit(jax.vmap(env.init))(keys)
+    for action in ([25, 0], [25, 25]):
+        state = jax.jit(jax.vmap(env.step))(state, jnp.int32(action))
+    assert (state.terminated == jnp.bool_([True, False])).all()
+    expected = step(step(init(keys[0]), 25), 25)
+    assert (state.rewards[0] == expected.rewards).all() and (expected.rewards != 0).all()
+    assert (state.rewards[1] == 0).all()
+
 
 def test_step():
     """
@@ -646,6 +658,73 @@ def test_legal_action():
         state = env.step(state=state, action=a)
 
 
+def test_incremental_update():
+    # incrementally updated liberties and hashes should match the full recomputation
+    from pgx.experimental.utils import act_randomly
+
+    env = Go(size=BOARD_SIZE, max_terminal_steps=200)
+    init_fn = jax.jit(jax.vmap(env.init))
+    step_fn = jax.jit(jax.vmap(env.step))
+    count_fn = jax.jit(jax.vmap(partial(_count, size=BOARD_SIZE)))
+    hash_fn = jax.jit(jax.vmap(_compute_hash))
+    act_fn = jax.jit(act_randomly)
+    key = jax.random.PRNGKey(0)
+    key, subkey = jax.random.split(key)
+    state = init_fn(jax.random.split(subkey, 16))
+    for _ in range(100):
+        key, subkey = jax.random.split(key)
+        # avoid passing to continue playing
+        mask = state.legal_action_mask.at[:, -1].set(~state.legal_action_mask[:, :-1].any(axis=-1))
+        action = act_fn(subkey, mask)
+        state = step_fn(state, action)
+        assert (state._x.liberty == count_fn(state._x)).all()
+        assert (state._x.zobrist_hash == hash_fn(state._x)).all()
+
+
+def test_bitboard_backend():
+    # bitboard backend should behave exactly the same as the default one
+    from pgx.experimental.utils import act_randomly
+
+    env = Go(size=9, max_terminal_steps=150)
+    bb_env = Go(size=9, max_terminal_steps=150, backend="bitboard")
+    init_fn, bb_init_fn = jax.jit(jax.vmap(env.init)), jax.jit(jax.vmap(bb_env.init))
+    step_fn, bb_step_fn = jax.jit(jax.vmap(env.step)), jax.jit(jax.vmap(bb_env.step))
+    act_fn = jax.jit(act_randomly)
+    key = jax.random.PRNGKey(0)
+    key, subkey = jax.random.split(key)
+    keys = jax.random.split(subkey, 16)
+    state, bb_state = init_fn(keys), bb_init_fn(keys)
+    assert bb_state.env_id == "go_9x9"
+    for _ in range(150):
+        assert (jnp.clip(state._x.board, -1, 1) == bb_state._x.board).all()
+        assert (state.observation == bb_state.observation).all()
+        assert (state.legal_action_mask == bb_state.legal_action_mask).all()
+        assert (state.terminated == bb_state.terminated).all()
+        assert (state.rewards == bb_state.rewards).all()
+        assert (state._x.zobrist_hash == bb_state._x.zobrist_hash).all()
+        assert (state._x.ko == bb_state._x.ko).all()
+        key, subkey = jax.random.split(key)
+        # rarely pass to continue playing
+        mask = state.legal_action_mask.at[:, -1].set(~state.legal_action_mask[:, :-1].any(axis=-1))
+        action = act_fn(subkey, mask)
+        state, bb_state = step_fn(state, action), bb_step_fn(bb_state, action)
+    assert (env.score(state) == bb_env.score(bb_state)).all()
+
+    # SVG rendering and compact state also work for the bitboard state
+    s, bb_s = jax.tree_util.tree_map(lambda x: x[0], (state, bb_state))
+    assert bb_s.to_svg() == s.to_svg()
+    expanded = pgx.expand(pgx.compact(bb_state))
+    assert all((x == y).all() for x, y in zip(jax.tree_util.tree_leaves(expanded), jax.tree_util.tree_leaves(bb_state)))
+
+    # illegal action
+    state, bb_state = init_fn(keys), bb_init_fn(keys)
+    action = jnp.zeros(16, dtype=jnp.int32)
+    state, bb_state = step_fn(state, action), bb_step_fn(bb_state, action)
+    state, bb_state = step_fn(state, action), bb_step_fn(bb_state, action)
+    assert bb_state.terminated.all()
+    assert (state.rewards == bb_state.rewards).all()
+
+
 def test_counting_ji():
     key = jax.random.PRNGKey(0)
     count_ji = jax.jit(_count_ji, static_argnums=(2,))
@@ -1147,8 +1226,117 @@ def test_counting_point():
     assert jnp.all(count_scores(state._x, BOARD_SIZE) == jnp.array([15, 10], dtype=jnp.float32))
 
 
+def test_score():
+    from pgx._src.games.go import GameState
+
+    def _ref_scores(board, size):
+        # breadth-first search over the empty regions
+        scores = [int((board == 1).sum()), int((board == -1).sum())]
+        visited = np.zeros(size * size, dtype=bool)
+        for xy in range(size * size):
+            if board[xy] != 0 or visited[xy]:
+                continue
+            region, colors, stack = [], set(), [xy]
+            visited[xy] = True
+            while stack:
+                p = stack.pop()
+                region.append(p)
+                x, y = p // size, p % size
+                for nx, ny in [(x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)]:
+                    if not (0 <= nx < size and 0 <= ny < size):
+                        continue
+                    q = nx * size + ny
+                    if board[q] != 0:
+                        colors.add(int(board[q]))
+                    elif not visited[q]:
+                        visited[q] = True
+                        stack.append(q)
+            if -1 not in colors:
+                scores[0] += len(region)
+            if 1 not in colors:
+                scores[1] += len(region)
+        return scores
+
+    size = 9
+    count_scores = jax.jit(jax.vmap(lambda b: _count_scores(GameState(board=b), size)))
+    rng = np.random.default_rng(0)
+    for p in [0.1, 0.3, 0.5, 0.7]:
+        boards = rng.choice([-1, 0, 1], size=(32, size * size), p=[p / 2, 1 - p, p / 2]).astype(np.int32)
+        scores = count_scores(jnp.array(boards))
+        for board, score in zip(boards, scores):
+            assert score.tolist() == _ref_scores(board, size)
+
+    # batched api
+    env = Go(size=5, komi=0.5)
+    state = jax.jit(jax.vmap(jax.vmap(env.init)))(jax.random.split(jax.random.PRNGKey(0), 6).reshape(2, 3, 2))
+    scores = env.score(state)
+    assert scores.shape == (2, 3, 2)
+    assert (scores.sum(axis=-1) == 50.5).all()
+    state = step(init(jax.random.PRNGKey(0)), 12)  # BLACK
+    black = state._player_order[0]
+    assert env.score(state)[black] == 25
+    assert env.score(state)[1 - black] == 0.5
+
+
+def test_empty_region_ids():
+    def _ref_region_ids(board, size):
+        # smallest point of each empty region by breadth-first search, and the point itself for stones
+        ids = np.arange(size * size)
+        for xy in range(size * size):
+            if board[xy] != 0 or ids[xy] != xy:
+                continue
+            region, stack = {xy}, [xy]
+            while stack:
+                x, y = divmod(stack.pop(), size)
+                for nx, ny in [(x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)]:
+                    q = nx * size + ny
+                    if 0 <= nx < size and 0 <= ny < size and board[q] == 0 and q not in region:
+                        region.add(q)
+                        stack.append(q)
+            ids[list(region)] = min(region)
+        return ids
+
+    size = 19
+    # snake: a single empty path through all even rows
+    snake = np.zeros((size, size), dtype=np.int32)
+    for r in range(1, size, 2):
+        snake[r] = 1
+        snake[r, size - 1 if r % 4 == 1 else 0] = 0
+    # maze of concentric rings, each connected to the next ring by one gap
+    maze = np.zeros((size, size), dtype=np.int32)
+    for k in range(1, size // 2 + 1, 2):
+        maze[k : size - k, k : size - k] = 1
+        maze[k + 1 : size - k - 1, k + 1 : size - k - 1] = 0
+        maze[k, k + 1] = 0 if k % 4 == 1 else maze[k, k + 1]
+        maze[size - k - 1, size - k - 2] = 0 if k % 4 == 3 else maze[size - k - 1, size - k - 2]
+    # reversed snake: the smallest point is at the end of the path from the other end
+    boards = [snake.ravel(), maze.ravel(), snake[::-1, ::-1].ravel(), -snake.T.ravel()]
+    rng = np.random.default_rng(0)
+    boards += list(rng.choice([-1, 0, 1], size=(8, size * size), p=[0.25, 0.5, 0.25]).astype(np.int32))
+    region_ids = jax.jit(jax.vmap(lambda b: _empty_region_ids(b, size)))(jnp.array(np.stack(boards)))
+    for board, ids in zip(boards, region_ids):
+        assert (np.asarray(ids) == _ref_region_ids(board, size)).all()
+    assert len(set(np.asarray(region_ids[0])[snake.ravel() == 0])) == 1  # one long region
+    # the number of rounds depends on the board size
+    for size in (2, 5, 9):
+        boards = rng.choice([-1, 0, 1], size=(16, size * size), p=[0.2, 0.6, 0.2]).astype(np.int32)
+        region_ids = jax.jit(jax.vmap(lambda b: _empty_region_ids(b, size)))(jnp.array(boards))
+        for board, ids in zip(boards, region_ids):
+            assert (np.asarray(ids) == _ref_region_ids(board, size)).all()
+
+
 def test_PSK():
-    env = Go(size=5)
+    for superko_window, expected in [(None, True), (8, True), (1, False)]:
+        _test_PSK(superko_window, expected)
+    for superko_window in (0, -1):
+        with pytest.raises(AssertionError):
+            Go(size=5, superko_window=superko_window)
+    with pytest.raises(AssertionError):
+        Go(size=5, max_terminal_steps=0)  # also the default superko_window
+
+
+def _test_PSK(superko_window, expected):
+    env = Go(size=5, superko_window=superko_window)
     env.init = jax.jit(env.init)
     env.step = jax.jit(env.step)
     state = env.init(jax.random.PRNGKey(0))
@@ -1194,9 +1382,10 @@ def test_PSK():
     #  @ @ @ O +
     #  + @ O O O
     #  @ @ @ O +
-    assert state.terminated
+    assert state.terminated == expected
     # assert state._x._black_player == 1
-    assert (state.rewards == jnp.float32([-1, 1])).all()  # black wins
+    if expected:
+        assert (state.rewards == jnp.float32([-1, 1])).all()  # black wins
 
 
 def test_max_step_termination():
@@ -1211,6 +1400,41 @@ def test_max_step_termination():
     assert not (state.rewards == jnp.float32([0, 0])).all()  # should not tie
 
 
+def test_params():
+    for backend, size in [("default", 5), ("bitboard", 9)]:
+        env = Go(size=size, backend=backend)
+        # one compiled step for all parameters
+        step_fn = jax.jit(jax.vmap(env.step))
+        keys = jax.random.split(jax.random.PRNGKey(0), 3)
+        state = jax.jit(jax.vmap(env.init))(keys)
+        black = state._player_order[:, 0]
+        komi = jnp.float32([0.5, size * size - 0.5, size * size + 0.5])
+        params = jax.vmap(lambda k: env.default_params.replace(komi=k))(komi)
+        for action in [12, size * size, size * size]:  # BLACK, pass, pass
+            state = step_fn(state, jnp.int32([action] * 3), keys, params)
+        assert state.terminated.all()
+        black_rewards = state.rewards[jnp.arange(3), black]
+        assert (black_rewards == jnp.float32([1, 1, -1])).all()
+        scores = env.score(state, params.replace(komi=jnp.float32(0.5)))
+        assert (scores[jnp.arange(3), black] == size * size).all()
+        assert (scores[jnp.arange(3), 1 - black] == 0.5).all()
+
+        # max_termination_steps
+        state = jax.jit(jax.vmap(env.init))(keys)
+        params = jax.vmap(lambda n: env.default_params.replace(max_termination_steps=n))(jnp.int32([1, 2, 100]))
+        state = step_fn(state, jnp.int32([0, 0, 0]), keys, params)
+        assert (state.terminated == jnp.bool_([True, False, False])).all()
+        state = step_fn(state, jnp.int32([1, 1, 1]), keys, params)
+        assert (state.terminated == jnp.bool_([True, True, False])).all()
+
+    # rollout with shared params
+    env = Go(size=5)
+    policy_fn = lambda key, state: jnp.full(state.current_player.shape, 25)  # pass
+    params = env.default_params.replace(max_termination_steps=jnp.int32(1))
+    _, traj = pgx.rollout(env, policy_fn, 4, 2, jax.random.PRNGKey(0), params=params)
+    assert traj.terminated.all()
+
+
 def test_env_id():
     env = Go(size=9)
     init_fn = jax.jit(env.init)
@@ -1235,6 +1459,28 @@ def test_env_id():
     init_fn = jax.jit(jax.vmap(env.init))
     state = init_fn(jax.random.split(jax.random.PRNGKey(0)))
     assert state.env_id == "go_5x5"
+    # env_id is static under jit
+    assert jax.jit(lambda s: jnp.int32(len(s.env_id)))(state) == len("go_5x5")
+
+
+def test_compact():
+    import pgx
+    from pgx.experimental import act_randomly
+
+    for env in (Go(size=9), Go(size=9, backend="bitboard"), Go(size=19)):
+        init_fn = jax.jit(jax.vmap(env.init))
+        step_fn = jax.jit(jax.vmap(env.step))
+        compact_fn = jax.jit(pgx.compact)
+        expand_fn = jax.jit(pgx.expand)
+        key = jax.random.PRNGKey(0)
+        state = init_fn(jax.random.split(key, 8))
+        for _ in range(100):
+            compact_state = compact_fn(state)
+            assert compact_state.nbytes < sum(x.nbytes for x in jax.tree_util.tree_leaves(state))
+            for x, y in zip(jax.tree_util.tree_leaves(state), jax.tree_util.tree_leaves(expand_fn(compact_state))):
+                assert x.dtype == y.dtype and (x == y).all()
+            key, subkey = jax.random.split(key)
+            state = step_fn(state, act_randomly(subkey, state.legal_action_mask))
 
 
 def test_api():
@@ -0,0 +1,43 @@
+import jax
+import numpy as np
+
+import pgx
+from pgx.experimental import act_randomly
+
+
+def test_memmap(tmp_path):
+    env = pgx.make("tic_tac_toe")
+
+    def policy_fn(key, state):
+        return act_randomly(key, state.legal_action_mask)
+
+    # trajectories are appended along the first axis
+    writer = pgx.MemmapWriter(tmp_path / "traj", env)
+    reader = None
+    state, trajs = None, []
+    for i in range(3):
+        state, traj = pgx.rollout(env, policy_fn, 10, 4, jax.random.PRNGKey(i), state=state)
+        writer.append(traj)
+        trajs.append(traj)
+        if reader is None:
+            reader = pgx.MemmapReader(tmp_path / "traj")
+    assert len(reader) == 10
+    reader.refresh()
+    assert len(reader) == len(writer) == 30
+    assert (reader.env_id, reader.env_version) == (env.id, env.version)
+    assert isinstance(reader.columns[".observation"], np.memmap)
+    expected = jax.tree_util.tree_map(lambda *x: np.concatenate(x), *trajs)
+    for ix in (slice(5, 25), np.int32([29, 0, 13])):
+        for x, y in zip(jax.tree_util.tree_leaves(reader[ix]), jax.tree_util.tree_leaves(expected)):
+            assert (x == y[ix]).all()
+
+    # batched (compact) states can be stored and restored as well
+    state, _ = pgx.rollout(env, policy_fn, 10, 64, jax.random.PRNGKey(3), fields=())
+    writer = pgx.MemmapWriter(tmp_path / "state")
+    writer.append(pgx.compact(state))
+    writer = pgx.MemmapWriter(tmp_path / "state")  # reopen
+    writer.append(pgx.compact(state))
+    restored = pgx.expand(pgx.MemmapReader(tmp_path / "state")[64:])
+    assert isinstance(restored, type(state))
+    for x, y in zip(jax.tree_util.tree_leaves(restored), jax.tree_util.tree_leaves(state)):
+        assert x.dtype == y.dtype and (x == y).all()
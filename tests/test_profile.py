@@ -0,0 +1,22 @@
+import pgx
+
+
+def test_profile():
+    env = pgx.make("tic_tac_toe")
+    results = pgx.profile(env, batch_size=2, num_steps=2, num_iters=1, verbose=False)
+    assert set(results) == {"init", "step", "observe", "legal_action_mask", "is_terminal", "rewards"}
+    assert all(r["time"] > 0 and r["num_ops"] == sum(r["ops"].values()) for r in results.values())
+    assert results["step"]["num_ops"] > results["legal_action_mask"]["num_ops"]
+
+    # game-specific phases of envs without a GameProtocol game
+    expected = {
+        "hex": {"is_terminal"},
+        "kuhn_poker": {"rewards"},
+        "leduc_holdem": {"rewards"},
+        "sparrow_mahjong": {"rewards", "is_terminal"},
+    }
+    for env_id, phases in expected.items():
+        env = pgx.make(env_id)
+        results = pgx.profile(env, batch_size=2, num_steps=2, num_iters=1, verbose=False)
+        assert set(results) == {"init", "step", "observe"} | phases, env_id
+        assert all(r["time"] > 0 for r in results.values()), env_id
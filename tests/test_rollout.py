@@ -0,0 +1,40 @@
+import jax
+
+import pgx
+from pgx.experimental import act_randomly, auto_reset
+
+
+def test_rollout():
+    env = pgx.make("tic_tac_toe")
+
+    def policy_fn(key, state):
+        return act_randomly(key, state.legal_action_mask)
+
+    key = jax.random.PRNGKey(0)
+    state, traj = pgx.rollout(env, policy_fn, 20, 4, key)
+    assert traj.observation.shape == (20, 4, 3, 3, 2)
+    assert traj.rewards.shape == (20, 4, 2)
+    assert traj.terminated.any()
+
+    # same as the python loop
+    init_fn = jax.jit(jax.vmap(env.init))
+    step_fn = jax.jit(jax.vmap(auto_reset(env.step, env.init)))
+    key, subkey = jax.random.split(key)
+    expected = init_fn(jax.random.split(subkey, 4))
+    for i in range(20):
+        key, key1, key2 = jax.random.split(key, 3)
+        action = policy_fn(key1, expected)
+        assert (traj.observation[i] == expected.observation).all()
+        assert (traj.legal_action_mask[i] == expected.legal_action_mask).all()
+        assert (traj.current_player[i] == expected.current_player).all()
+        assert (traj.action[i] == action).all()
+        expected = step_fn(expected, action, jax.random.split(key2, 4))
+        assert (traj.rewards[i] == expected.rewards).all()
+        assert (traj.terminated[i] == expected.terminated).all()
+    assert (state.observation == expected.observation).all()
+
+    # continue with selected fields reusing buffers
+    state, traj = pgx.rollout(env, policy_fn, 20, 4, key, state=state, fields=("action", "rewards"))
+    assert traj.observation is None and traj.action.shape == (20, 4)
+    _, traj = pgx.rollout(env, policy_fn, 20, 4, key, state=state, fields=("action", "rewards"), buffers=traj)
+    assert traj.action.shape == (20, 4)
@@ -0,0 +1,65 @@
+import os
+import subprocess
+import sys
+
+import jax
+import jax.numpy as jnp
+
+import pgx
+from pgx.experimental import act_randomly
+
+
+def test_sharded_env():
+    if jax.device_count() > 1:
+        _test_sharded_env()
+        return
+    # force several CPU devices in a subprocess
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env_vars = {
+        **os.environ,
+        "XLA_FLAGS": "--xla_force_host_platform_device_count=4",
+        "JAX_PLATFORMS": "cpu",
+        "PYTHONPATH": os.pathsep.join([root, os.environ.get("PYTHONPATH", "")]),
+    }
+    code = "import test_sharding; test_sharding._test_sharded_env()"
+    subprocess.run([sys.executable, "-c", code], cwd=os.path.join(root, "tests"), env=env_vars, check=True)
+
+
+def _test_sharded_env():
+    env = pgx.make("tic_tac_toe")
+
+    def policy_fn(key, state):
+        return act_randomly(key, state.legal_action_mask)
+
+    sharded_env = pgx.ShardedEnv(env)
+    assert sharded_env.num_shards == jax.device_count() > 1
+    batch_size = 2 * sharded_env.num_shards
+    keys = jax.random.split(jax.random.PRNGKey(0), batch_size)
+    state, expected = sharded_env.init(keys), jax.jit(jax.vmap(env.init))(keys)
+    action = policy_fn(jax.random.PRNGKey(1), state)
+    state, expected = sharded_env.step(state, action, keys), jax.jit(jax.vmap(env.step))(expected, action, keys)
+    assert state.observation.sharding == sharded_env.sharding
+    assert len(state.observation.sharding.device_set) == sharded_env.num_shards
+    assert all(shard.data.shape[0] == 2 for shard in state.observation.addressable_shards)
+    for x, y in zip(jax.tree_util.tree_leaves(state), jax.tree_util.tree_leaves(expected)):
+        assert (x == y).all()
+    assert (sharded_env.observe(state, state.current_player) == state.observation).all()
+    state, traj = sharded_env.rollout(policy_fn, 10, batch_size, jax.random.PRNGKey(2), state=state)
+    _, expected_traj = pgx.rollout(env, policy_fn, 10, batch_size, jax.random.PRNGKey(2), state=expected)
+    assert traj.action.sharding == sharded_env.trajectory_sharding
+    assert (traj.action == expected_traj.action).all()
+    # buffers are reused
+    _, traj = sharded_env.rollout(policy_fn, 10, batch_size, jax.random.PRNGKey(3), state=state, buffers=traj)
+    assert traj.action.sharding == sharded_env.trajectory_sharding
+
+    # runtime parameters
+    go_env = pgx.make("go_9x9")
+    sharded_env = pgx.ShardedEnv(go_env)
+    state = sharded_env.init(keys)
+    params = jax.vmap(lambda n: go_env.default_params.replace(max_termination_steps=n))(1 + jnp.arange(batch_size) % 2)
+    state = sharded_env.step(state, jnp.zeros(batch_size, dtype=jnp.int32), keys, params)
+    assert state.terminated.sharding == sharded_env.sharding
+    assert (state.terminated == (jnp.arange(batch_size) % 2 == 0)).all()
+    params = go_env.default_params.replace(max_termination_steps=jnp.int32(1))
+    _, traj = sharded_env.rollout(policy_fn, 4, batch_size, jax.random.PRNGKey(4), params=params)
+    assert traj.terminated.all()
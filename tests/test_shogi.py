@@ -1,9 +1,16 @@
 import json
+from functools import partial
+
 import jax
 import jax.numpy as jnp
 
 from pgx.shogi import Shogi, State
-from pgx._src.games.shogi import Action, HORSE, PAWN, DRAGON
+from pgx._src.games.shogi import Action, HORSE, PAWN, DRAGON, EMPTY, GameState
+from pgx._src.games.shogi import LANCE, KNIGHT, GOLD, KING, OPP_PAWN, OPP_KING
+from pgx._src.games.shogi import _tables, _flip, _flip_board, _major_piece_ix
+from pgx._src.games.shogi import _is_legal_drop_wo_ignoring_check
+from pgx._src.games.shogi_tables import board_effects
+from pgx.experimental.utils import act_randomly
 from pgx.experimental.shogi import from_sfen, to_sfen
 
 env = Shogi()
@@ -406,6 +413,88 @@ def test_sfen():
     assert to_sfen(s) == sfen
 
 
+def test_legal_action_mask_by_simulation():
+    # legal action mask from the shared effects should be the same as the one by simulating each move
+    init_fn = jax.jit(jax.vmap(env.init))
+    step_fn = jax.jit(jax.vmap(env.step))
+    ref_fn = jax.jit(jax.vmap(_legal_action_mask_by_simulation))
+    key = jax.random.PRNGKey(0)
+    key, subkey = jax.random.split(key)
+    state = init_fn(jax.random.split(subkey, 64))
+    for i in range(200):
+        expected = ref_fn(state._x)
+        assert ((state.legal_action_mask == expected) | state.terminated[:, None]).all()
+        if i % 50 == 0:
+            # effects should be the same as the pure-Python version
+            for j in range(4):
+                assert (state._x.effects[j] == board_effects(state._x.board[j])).all()
+                assert (jax.vmap(_flip)(state._x).effects[j] == board_effects(_flip_board(state._x.board[j]))).all()
+        key, subkey = jax.random.split(key)
+        state = step_fn(state, act_randomly(subkey, state.legal_action_mask))
+
+
+def _is_checked_by_simulation(board):
+    # is my king attacked by opponent's pieces? brute force over every opponent's piece (seen from the opponent)
+    opp_board = _flip_board(board)
+    king_pos = 80 - jnp.argmin(jnp.abs(board - KING))
+
+    def can_capture(from_):
+        piece = opp_board[from_]
+        ok = (PAWN <= piece) & (piece < OPP_PAWN) & _tables().CAN_MOVE[piece % 14, from_, king_pos]
+        between_ix = _tables().BETWEEN_IX[_major_piece_ix(piece), from_, king_pos]
+        return ok & ~((_major_piece_ix(piece) >= 0) & (between_ix >= 0) & (opp_board[between_ix] != EMPTY)).any()
+
+    return jax.vmap(can_capture)(jnp.arange(81)).any()
+
+
+def _is_legal_move_by_simulation(state: GameState, action: Action):
+    board = state.board
+    from_, to, piece = action.from_, action.to, board[action.from_]
+    ok = (from_ >= 0) & (PAWN <= piece) & (piece < OPP_PAWN) & _tables().CAN_MOVE[piece % 14, from_, to]
+    ok &= ~((PAWN <= board[to]) & (board[to] < OPP_PAWN))
+    between_ix = _tables().BETWEEN_IX[_major_piece_ix(piece), from_, to]
+    ok &= ~((_major_piece_ix(piece) >= 0) & (between_ix >= 0) & (board[between_ix] != EMPTY)).any()
+    ok &= ~_is_checked_by_simulation(board.at[from_].set(EMPTY).at[to].set(piece))
+    can_promote = (piece < GOLD) & ((from_ % 9 < 3) | (to % 9 < 3))
+    must_promote = ((piece == PAWN) | (piece == LANCE)) & (to % 9 == 0)
+    must_promote |= (piece == KNIGHT) & (to % 9 < 2)
+    return ok & jnp.where(action.is_promotion, can_promote, ~must_promote)
+
+
+def _legal_action_mask_by_simulation(state: GameState):
+    # reference implementation which decodes every label and checks each move by simulation
+    def legal_moves(state):
+        a = jax.vmap(partial(Action._from_dlshogi_action, state))(jnp.arange(20 * 81))
+        return jax.vmap(partial(_is_legal_move_by_simulation, state))(a)
+
+    @jax.vmap
+    def is_legal_drop(i):
+        a = Action._from_dlshogi_action(state, i)
+        ok = _is_legal_drop_wo_ignoring_check(a.piece, a.to, state)
+        return ok & ~_is_checked_by_simulation(state.board.at[a.to].set(a.piece))
+
+    legal_action_mask = jnp.hstack((legal_moves(state), is_legal_drop(jnp.arange(20 * 81, 27 * 81))))
+    # drop pawn mate: the opponent has no legal move after dropping a pawn in front of the king
+    to = jnp.argmin(jnp.abs(state.board - OPP_KING)) + 1
+    opp_state = _flip(state._replace(board=state.board.at[to].set(PAWN)))
+    is_drop_pawn_mate = ~legal_moves(opp_state).any()
+    return legal_action_mask.at[20 * 81 + to].set(legal_action_mask[20 * 81 + to] & ~is_drop_pawn_mate)
+
+
+def test_tables():
+    # shipped tables should be consistent with the generator (regenerate by `python -m pgx._src.games.shogi_tables`)
+    from pgx._src.games.shogi_tables import check
+    assert check()
+
+
+def test_legal_actions():
+    # the position with the maximum number of legal moves
+    state = from_sfen("R8/2K1S1SSk/4B4/9/9/9/9/9/1L1L1L3 b RBGSNLP3g3n17p 1")
+    legal_actions, num_legal_actions = env.legal_actions(state)
+    assert env.max_legal_actions == num_legal_actions == state.legal_action_mask.sum() == 593
+    assert (legal_actions == jnp.nonzero(state.legal_action_mask)[0]).all()
+
+
 def test_api():
     import pgx
     env = pgx.make("shogi")
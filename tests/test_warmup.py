@@ -0,0 +1,46 @@
+import jax
+import jax.numpy as jnp
+
+import pgx
+
+
+def test_warmup(tmp_path):
+    from jax.experimental.compilation_cache import compilation_cache
+
+    env = pgx.make("tic_tac_toe")
+    cache_dir = jax.config.jax_compilation_cache_dir
+    min_compile_time = jax.config.jax_persistent_cache_min_compile_time_secs
+    try:
+        compiled = pgx.warmup(env, batch_sizes=[1, 4], cache_dir=tmp_path)
+        assert set(compiled) == {"init", "step", "observe", "compile_time"}
+        assert all(set(compiled[name]) == {1, 4} for name in ("init", "step", "observe"))
+        assert set(compiled["compile_time"]) == {"init", "step", "observe"}
+        assert all(set(v) == {1, 4} for v in compiled["compile_time"].values())
+        assert all(t > 0 for v in compiled["compile_time"].values() for t in v.values())
+        assert any(tmp_path.iterdir())  # executables are stored
+        # global configuration is changed so that other compilations also use the cache
+        assert jax.config.jax_compilation_cache_dir == str(tmp_path)
+        keys = jax.random.split(jax.random.PRNGKey(0), 4)
+        state = jax.jit(jax.vmap(env.init))(keys)
+        state = jax.jit(jax.vmap(env.step))(state, jnp.int32([0, 1, 2, 3]), keys)
+        assert (state._step_count == 1).all()
+    finally:
+        jax.config.update("jax_compilation_cache_dir", cache_dir)
+        jax.config.update("jax_persistent_cache_min_compile_time_secs", min_compile_time)
+        compilation_cache.reset_cache()
+
+    # compiled executables are returned and usable without the cache
+    compiled = pgx.warmup(env, batch_sizes=[4])
+    keys = jax.random.split(jax.random.PRNGKey(0), 4)
+    expected = jax.jit(jax.vmap(env.step))(jax.jit(jax.vmap(env.init))(keys), jnp.int32([0, 1, 2, 3]), keys)
+    state = compiled["step"][4](compiled["init"][4](keys), jnp.int32([0, 1, 2, 3]), keys)
+    for x, y in zip(jax.tree_util.tree_leaves(state), jax.tree_util.tree_leaves(expected)):
+        assert (x == y).all()
+    assert compiled["observe"][4](state, state.current_player).shape == (4,) + env.observation_shape
+
+    # states of lazy environments of a non-default size are accepted
+    env = pgx.make("go_9x9", lazy_observation=True)
+    compiled = pgx.warmup(env, batch_sizes=[2])
+    keys = jax.random.split(jax.random.PRNGKey(0), 2)
+    state = compiled["step"][2](jax.jit(jax.vmap(env.init))(keys), jnp.int32([0, 1]), keys)
+    assert (state._step_count == 1).all()